@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Candidates,Countries, Jobs, Agents  # Make sure this matches your actual model name
+from .models import BackgroundJob, Candidates,Countries, DuplicateMatch, Jobs, Agents, SetAsideNumber  # Make sure this matches your actual model name
 
 
 
@@ -28,3 +28,23 @@ class Agents(admin.ModelAdmin):
     list_display = ('full_name', 'email', 'phone_number', 'gender')
     search_fields = ('full_name', 'email', 'phone_number')
     list_filter = ('gender',)
+
+@admin.register(BackgroundJob)
+class BackgroundJobs(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('locked_by', 'locked_at', 'started_at', 'finished_at')
+
+@admin.register(DuplicateMatch)
+class DuplicateMatches(admin.ModelAdmin):
+    list_display = ('candidate_a', 'candidate_b', 'score', 'reasons', 'status', 'source', 'reviewed_by', 'reviewed_at')
+    list_filter = ('status', 'source')
+    raw_id_fields = ('candidate_a', 'candidate_b')
+    readonly_fields = ('score', 'reasons', 'source', 'created_at')
+
+@admin.register(SetAsideNumber)
+class SetAsideNumbers(admin.ModelAdmin):
+    list_display = ('candidate', 'field', 'value', 'kept_by', 'created_at')
+    list_filter = ('field',)
+    search_fields = ('value',)
+    raw_id_fields = ('candidate', 'kept_by')
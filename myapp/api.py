@@ -0,0 +1,198 @@
+import hashlib
+import json
+from datetime import datetime, time, timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import FileField
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
+
+from .filters import filter_candidates
+from .models import Agents, Candidates, Countries, Jobs
+from .pagination import keyset_paginate, parse_cursor, parse_page_size
+from .tokens import has_bearer_token
+
+API_VERSION = "v1"
+
+
+class Resource:
+    """An API collection: field name -> column, plus optional sync and filter support."""
+
+    def __init__(self, model, updated_field=None, filter_queryset=None):
+        self.model = model
+        fields = model._meta.concrete_fields
+        self.columns = {field.name: field.attname for field in fields}
+        self.file_fields = {field.name for field in fields if isinstance(field, FileField)}
+        self.updated_field = updated_field
+        self.filter_queryset = filter_queryset
+
+
+RESOURCES = {
+    "candidates": Resource(Candidates, updated_field="updated_at", filter_queryset=filter_candidates),
+    "jobs": Resource(Jobs, updated_field="updated_at"),
+    "agents": Resource(Agents),
+    "countries": Resource(Countries),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+def api_view(view):
+    """GET-only, authenticated by session or API token, errors rendered as JSON."""
+
+    @require_GET
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if not (request.user.is_authenticated or has_bearer_token(request, settings.API_TOKENS)):
+            response = _error("Authentication required.", 401)
+            response["WWW-Authenticate"] = 'Bearer realm="api"'
+            return response
+        resource = RESOURCES.get(kwargs.pop("resource"))
+        if resource is None:
+            return _error("Unknown resource.", 404)
+        try:
+            payload = view(request, resource, *args, **kwargs)
+        except ApiError as e:
+            return _error(str(e), e.status)
+        return _json_response(request, payload)
+
+    return wrapped
+
+
+def _json_response(request, payload):
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+    # server_time changes on every call; an older one in a cached copy is still safe to sync from.
+    stable = {key: value for key, value in payload.items() if key != "server_time"}
+    etag = f'"{hashlib.md5(json.dumps(stable, cls=DjangoJSONEncoder).encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Authorization", "Cookie"))
+    return response
+
+
+def _selected_fields(resource, request):
+    requested = [name.strip() for name in request.GET.get("fields", "").split(",") if name.strip()]
+    if not requested:
+        return list(resource.columns)
+    unknown = [name for name in requested if name not in resource.columns]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}.")
+    return ["id", *(name for name in requested if name != "id")]
+
+
+def _updated_since(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ApiError("updated_since must be an ISO 8601 date or datetime.")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _snapshot_time(value):
+    """The first page's ``server_time``, echoed back by later pages.
+
+    On the first page it is now minus ``API_SYNC_OVERLAP``: ``updated_at`` is
+    stamped before the writing transaction commits, so a row can become
+    visible after a read with a time earlier than that read.
+    """
+    if not value:
+        return timezone.now() - timedelta(seconds=settings.API_SYNC_OVERLAP)
+    moment = parse_datetime(value)
+    if moment is None or timezone.is_naive(moment):
+        raise ApiError("as_of must be the server_time of the first page.")
+    return moment
+
+
+def _serializer(request, resource, fields):
+    media_url = request.build_absolute_uri(settings.MEDIA_URL)
+
+    def serialize(row):
+        item = {}
+        for name in fields:
+            value = row[resource.columns[name]]
+            if name in resource.file_fields:
+                value = f"{media_url}{value}" if value else None
+            item[name] = value
+        return item
+
+    return serialize
+
+
+def _queryset(resource, fields):
+    return resource.model.objects.values(*(resource.columns[name] for name in fields))
+
+
+@api_view
+def resource_list(request, resource):
+    """One page of ``values()`` rows, cursor-paginated on the primary key.
+
+    ``?fields=`` limits the selected columns, ``?after=`` continues from a
+    cursor and ``?updated_since=`` returns only rows changed since then.
+
+    ``server_time`` is taken when the first page is read and carried through
+    the ``next`` links as ``?as_of=``, so every page of one sync reports the
+    same time. A row edited while the pages are being read may be missed if
+    it sorts before the cursor, but it was stamped after ``server_time``, so
+    the next sync (``updated_since=server_time``) returns it. So does a row
+    committed late by a transaction shorter than ``API_SYNC_OVERLAP``; rows
+    changed within the overlap come back again, so clients upsert by id.
+    """
+    fields = _selected_fields(resource, request)
+    queryset = _queryset(resource, fields)
+
+    since = request.GET.get("updated_since")
+    if since:
+        if not resource.updated_field:
+            raise ApiError("updated_since is not supported for this resource.")
+        queryset = queryset.filter(**{f"{resource.updated_field}__gte": _updated_since(since)})
+    if resource.filter_queryset:
+        queryset = resource.filter_queryset(queryset, request.GET)
+
+    server_time = _snapshot_time(request.GET.get("as_of")) if resource.updated_field else None
+    page_size = parse_page_size(request.GET.get("page_size"), settings.API_PAGE_SIZE, settings.API_MAX_PAGE_SIZE)
+    page = keyset_paginate(queryset, page_size, after=parse_cursor(request.GET.get("after")))
+
+    next_url = None
+    if page.has_next:
+        query = request.GET.copy()
+        query["after"] = page.next_cursor
+        if server_time:
+            query["as_of"] = server_time.isoformat()
+        next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+    serialize = _serializer(request, resource, fields)
+    return {
+        "version": API_VERSION,
+        "results": [serialize(row) for row in page],
+        "next": next_url,
+        # Pass as updated_since on the next sync to pick up later changes.
+        "server_time": server_time,
+    }
+
+
+@api_view
+def resource_detail(request, resource, pk):
+    fields = _selected_fields(resource, request)
+    row = _queryset(resource, fields).filter(pk=pk).first()
+    if row is None:
+        raise ApiError("Not found.", 404)
+    return {"version": API_VERSION, "result": _serializer(request, resource, fields)(row)}
@@ -0,0 +1,202 @@
+import logging
+import os
+import socket
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F, Q
+from django.http import QueryDict
+from django.utils import timezone
+
+from .cv_batch import stream_cv_zip
+from .exporter import export_columns, export_rows, stream_csv, write_xlsx
+from .importer import import_candidates, read_sheet
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# How many report rows an import job keeps in BackgroundJob.result.
+IMPORT_REPORT_ROWS = 1000
+# What run_job writes back when a job ends, so it never overwrites anything else.
+FINAL_FIELDS = ["status", "progress", "message", "error", "result", "result_file", "run_after", "finished_at",
+                "locked_by", "locked_at"]
+
+
+def enqueue(kind, user=None, params=None, input_file=None, max_attempts=3):
+    job = BackgroundJob(kind=kind, params=params or {}, created_by=user, max_attempts=max_attempts)
+    if input_file is not None:
+        job.input_file.save(os.path.basename(input_file.name), input_file, save=False)
+    job.save()
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def requeue_stale(now=None):
+    """Put back jobs whose worker died without finishing them.
+
+    Attempts are counted when a job is claimed, so a job that keeps killing
+    its worker fails once it has used up ``max_attempts``.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    stale = BackgroundJob.objects.filter(status=BackgroundJob.RUNNING, locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=BackgroundJob.FAILED, locked_by="", locked_at=None, finished_at=now, message="Failed",
+        error="The worker stopped responding while running this job.",
+    )
+    return failed + stale.update(status=BackgroundJob.QUEUED, locked_by="", locked_at=None, run_after=now)
+
+
+def claim_next(worker, batch=5, kinds=None):
+    """Atomically claim the oldest runnable job for ``worker``, optionally only of ``kinds``.
+
+    Claiming is a conditional ``UPDATE ... WHERE status='queued'`` on one
+    row, so concurrent workers on SQLite or Postgres never run the same job:
+    whoever updates the row first gets it, the others move on.
+    """
+    now = timezone.now()
+    candidates = BackgroundJob.objects.filter(status=BackgroundJob.QUEUED, run_after__lte=now)
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    candidates = candidates.order_by("run_after", "pk").values_list("pk", flat=True)[:batch]
+    for pk in candidates:
+        claimed = BackgroundJob.objects.filter(pk=pk, status=BackgroundJob.QUEUED).update(
+            status=BackgroundJob.RUNNING, locked_by=worker, locked_at=now, started_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(pk=pk)
+    return None
+
+
+def set_progress(job, progress, message=""):
+    """Record progress and renew the job's lock, so ``requeue_stale`` leaves a long run alone."""
+    job.progress = max(0, min(100, int(progress)))
+    job.message = message[:255]
+    job.locked_at = timezone.now()
+    BackgroundJob.objects.filter(pk=job.pk).update(progress=job.progress, message=job.message,
+                                                   locked_at=job.locked_at)
+
+
+def run_job(job):
+    """Run a claimed job, recording success, retry or failure."""
+    try:
+        HANDLERS[job.kind](job)
+    except Exception as exc:
+        logger.exception("Background job %s failed", job.pk)
+        job.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        job.locked_by, job.locked_at = "", None
+        if job.attempts < job.max_attempts:
+            job.status = BackgroundJob.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=30 * 2 ** (job.attempts - 1))
+            job.message = f"Retrying (attempt {job.attempts} of {job.max_attempts} failed)"
+        else:
+            job.status = BackgroundJob.FAILED
+            job.finished_at = timezone.now()
+            job.message = "Failed"
+    else:
+        job.status = BackgroundJob.SUCCEEDED
+        job.progress = 100
+        job.error = ""
+        job.finished_at = timezone.now()
+        job.locked_by, job.locked_at = "", None
+    job.save(update_fields=FINAL_FIELDS)
+    return job
+
+
+def cleanup(days=None):
+    """Delete finished jobs older than ``days`` together with their files."""
+    days = settings.JOB_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    old = BackgroundJob.objects.filter(
+        Q(status__in=(BackgroundJob.SUCCEEDED, BackgroundJob.FAILED)), finished_at__lt=cutoff,
+    )
+    count = 0
+    for job in old.iterator():
+        for fieldfile in (job.input_file, job.result_file):
+            if fieldfile:
+                fieldfile.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+def _save_result(job, handle, filename):
+    handle.seek(0)
+    job.result_file.save(filename, File(handle), save=False)
+
+
+# ------------------------------ HANDLERS ------------------------------------
+def run_import(job):
+    set_progress(job, 5, "Reading sheet")
+    with job.input_file.open("rb") as excel_file:
+        rows = read_sheet(excel_file)
+    set_progress(job, 30, f"Importing {len(rows)} row(s)")
+    result = import_candidates(rows, dry_run=job.params.get("dry_run", False))
+    job.result = {
+        "dry_run": result.dry_run,
+        "created": result.created_count,
+        "skipped": result.skipped_count,
+        "new_jobs": result.new_jobs,
+        "new_agents": result.new_agents,
+        "rows": result.rows[:IMPORT_REPORT_ROWS],
+        "truncated": len(result.rows) > IMPORT_REPORT_ROWS,
+    }
+    job.message = f"{result.created_count} imported, {result.skipped_count} skipped"
+
+
+def run_export(job):
+    params = QueryDict(job.params.get("query", ""))
+    columns = export_columns(params)
+    set_progress(job, 10, "Exporting candidates")
+    rows = export_rows(params, columns)
+    if params.get("format") == "csv":
+        with tempfile.TemporaryFile("w+b") as output:
+            for line in stream_csv(rows):
+                output.write(line.encode())
+            _save_result(job, output, "candidates.csv")
+    else:
+        with write_xlsx(rows) as output:
+            _save_result(job, output, "candidates.xlsx")
+    job.message = "Export ready"
+
+
+def run_cv_pack(job):
+    candidate_ids = job.params["candidate_ids"]
+    kinds = job.params.get("kinds", ["pdf"])
+    total = len(candidate_ids) * len(kinds)
+    with tempfile.TemporaryFile() as output:
+        for done, chunk in enumerate(stream_cv_zip(candidate_ids, kinds), start=1):
+            output.write(chunk)
+            if done % 10 == 0:
+                set_progress(job, 100 * done / (total + 1), f"{min(done, total)} of {total} CVs rendered")
+        _save_result(job, output, "cv_pack.zip")
+    job.message = f"{len(candidate_ids)} candidate CV(s) packed"
+
+
+def run_dedupe(job):
+    from .dedupe import check_candidates, find_all_duplicates  # numpy stays out of web workers
+
+    candidate_ids = job.params.get("candidate_ids")
+    if candidate_ids is None:
+        set_progress(job, 5, "Scanning all candidates")
+        candidates, compared, found = find_all_duplicates()
+        job.result = {"candidates": candidates, "compared": compared, "matches": found}
+    else:
+        found = check_candidates(candidate_ids)
+        job.result = {"candidates": len(candidate_ids), "matches": found}
+    job.message = f"{found} possible duplicate(s) queued for review"
+
+
+HANDLERS = {
+    "import_excel": run_import,
+    "export_excel": run_export,
+    "cv_pack": run_cv_pack,
+    "dedupe": run_dedupe,
+}
@@ -0,0 +1,250 @@
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from . import cv_cache
+from .models import Candidates, Countries
+from .seeding import SEED_DOMAIN, seed
+
+BENCHMARK_USER = "benchmark"
+IMPORT_ROWS = 200
+GRID_EDITS = 10
+
+
+class Scenario:
+    """One timed request: ``request(client, fixture) -> response``, optionally reset before each run."""
+
+    def __init__(self, name, request, before_each=None):
+        self.name = name
+        self.request = request
+        self.before_each = before_each
+
+
+class Fixture:
+    """Objects the scenarios share for one dataset size."""
+
+    def __init__(self):
+        self.candidate = Candidates.objects.filter(email__endswith=f"@{SEED_DOMAIN}").order_by("pk").first()
+        self.country = Countries.objects.order_by("pk").first()
+        self.grid_ids = list(Candidates.objects.order_by("pk").values_list("pk", flat=True)[:50])
+        self.edit_round = 0
+        self.sheet = import_sheet(IMPORT_ROWS)
+
+
+def import_sheet(rows, prefix="BENCH"):
+    """An .xlsx upload of ``rows`` new candidates whose passports start with ``prefix``."""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Full Name", "Passport Number", "Date of Birth", "Job Applied Title", "Referral Full Name",
+                  "Gender", "Phone Number"])
+    for number in range(rows):
+        sheet.append([f"Import Candidate {number}", f"{prefix}{number:06d}", "1994-05-17", "Driver",
+                      "Benchmark Agency", "Female", "0700000000"])
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _grid_post(client, fixture):
+    fixture.edit_round += 1
+    data = {"candidate_ids": fixture.grid_ids, "next": reverse("view_clients")}
+    for pk in fixture.grid_ids[:GRID_EDITS]:
+        data[f"full_name_{pk}"] = f"Benchmark Edit {pk} r{fixture.edit_round}"
+    return client.post(reverse("update_candidates"), data)
+
+
+def _import_post(client, fixture):
+    upload = SimpleUploadedFile("candidates.xlsx", fixture.sheet)
+    return client.post(reverse("import_excel"), {"excel_file": upload, "dry_run": "1"})
+
+
+def _clear_cv_cache():
+    shutil.rmtree(cv_cache.cache_dir(), ignore_errors=True)
+
+
+SCENARIOS = [
+    Scenario("view_clients", lambda client, f: client.get(reverse("view_clients"))),
+    Scenario("view_clients_filtered", lambda client, f: client.get(
+        reverse("view_clients"), {"status": "Approved", "country": f.country.pk})),
+    Scenario("dashboard_view", lambda client, f: client.get(reverse("dashboard_view"))),
+    Scenario("update_candidates", _grid_post),
+    Scenario("import_excel_dry_run", _import_post),
+    Scenario("export_excel_xlsx", lambda client, f: client.get(reverse("export_excel"), {"format": "xlsx"})),
+    Scenario("export_excel_csv", lambda client, f: client.get(reverse("export_excel"), {"format": "csv"})),
+    Scenario("download_cv_pdf_cold", lambda client, f: client.get(
+        reverse("download_cv_pdf", args=[f.candidate.pk])), before_each=_clear_cv_cache),
+    Scenario("download_cv_pdf_cached", lambda client, f: client.get(
+        reverse("download_cv_pdf", args=[f.candidate.pk]))),
+    Scenario("download_cv_word_cold", lambda client, f: client.get(
+        reverse("download_cv_word", args=[f.candidate.pk])), before_each=_clear_cv_cache),
+]
+
+
+def body_size(response):
+    # Iterating also drains streamed (and async-streamed) bodies, so their cost is timed.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return sum(len(chunk) for chunk in response)
+
+
+def measure(scenario, client, fixture, repeat):
+    """Time ``repeat`` runs after one warm-up; queries and size come from the last run."""
+    timings = []
+    for run in range(repeat + 1):
+        if scenario.before_each:
+            scenario.before_each()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = scenario.request(client, fixture)
+            size = body_size(response)
+            elapsed = time.perf_counter() - started
+        response.close()
+        if run:
+            timings.append(elapsed * 1000)
+    return {
+        "scenario": scenario.name,
+        "status": response.status_code,
+        "runs": repeat,
+        "min_ms": round(min(timings), 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "queries": len(queries),
+        "bytes": size,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=settings.BASE_DIR).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                    text=True, check=True, cwd=settings.BASE_DIR).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+# ------------------------------ WORKER STARTUP ----------------------------------
+# Libraries only the import/export, CV and duplicate-check code paths need. A web
+# worker that loads them at boot pays for them in start-up time and RSS.
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "xhtml2pdf", "reportlab", "docx", "pyhanko", "html5lib")
+STARTUP_TOP_IMPORTS = 15
+# What a gunicorn/uvicorn worker does before its first request, timed from inside the child.
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+from django.core.asgi import get_asgi_application
+get_asgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+seconds = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": seconds, "rss_kb": rss // 1024 if sys.platform == "darwin" else rss,
+                  "modules": sorted(sys.modules)}))
+"""
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def startup_profile():
+    """Boot the project the way a server worker does, in a fresh ``python -X importtime``.
+
+    Returns the boot time, peak RSS, which ``HEAVY_MODULES`` got loaded and
+    the slowest top-level imports (cumulative milliseconds).
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "project2.settings")}
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT], capture_output=True,
+                               text=True, check=True, cwd=settings.BASE_DIR, env=env)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match and not match.group(3):
+            imports.append((match.group(4), int(match.group(2)) / 1000))
+    imports.sort(key=lambda item: item[1], reverse=True)
+    loaded = set(result["modules"])
+    return {
+        "boot_ms": round(result["seconds"] * 1000, 1),
+        "rss_mb": round(result["rss_kb"] / 1024, 1),
+        "heavy_modules": [name for name in HEAVY_MODULES if name in loaded],
+        "top_imports": [{"module": name, "ms": round(ms, 1)} for name, ms in imports[:STARTUP_TOP_IMPORTS]],
+    }
+
+
+def run_suite(sizes, repeat=5, names=None, images=False, random_seed=0, progress=None):
+    """Seed the current database up to each size in turn and measure every scenario.
+
+    Meant for a throwaway database (the ``benchmark`` command creates a test
+    database). Returns a JSON-serialisable report.
+    """
+    scenarios = [scenario for scenario in SCENARIOS if not names or scenario.name in names]
+    commit, dirty = git_revision()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "repeat": repeat,
+        "images": images,
+        "startup": startup_profile(),
+        "results": [],
+    }
+    user, _ = get_user_model().objects.get_or_create(
+        username=BENCHMARK_USER, defaults={"is_staff": True, "is_superuser": True},
+    )
+    client = Client()
+    client.force_login(user)
+
+    media_root, cv_root = tempfile.mkdtemp(), tempfile.mkdtemp()
+    quiet = dict(BACKGROUND_JOBS=False, PROFILE_SAMPLE_RATE=0.0, METRICS_SLOW_REQUEST_SECONDS=float("inf"))
+    try:
+        with override_settings(MEDIA_ROOT=media_root, CV_CACHE_DIR=cv_root, **quiet):
+            for size in sorted(sizes):
+                existing = Candidates.objects.filter(email__endswith=f"@{SEED_DOMAIN}").count()
+                if size > existing:
+                    seed(size - existing, images=images, random_seed=random_seed + size)
+                fixture = Fixture()
+                for scenario in scenarios:
+                    result = {"size": size, **measure(scenario, client, fixture, repeat)}
+                    report["results"].append(result)
+                    if progress:
+                        progress(result)
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+        shutil.rmtree(cv_root, ignore_errors=True)
+    return report
+
+
+def compare(current, previous):
+    """``(scenario, size, previous ms, current ms, change %, query delta)`` for results in both reports."""
+    before = {(row["scenario"], row["size"]): row for row in previous["results"]}
+    rows = []
+    for row in current["results"]:
+        old = before.get((row["scenario"], row["size"]))
+        if old is None:
+            continue
+        change = (row["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        rows.append((row["scenario"], row["size"], old["median_ms"], row["median_ms"], change,
+                     row["queries"] - old["queries"]))
+    return rows
@@ -0,0 +1,210 @@
+import os
+import re
+from datetime import date
+from functools import lru_cache
+from io import BytesIO
+from urllib.parse import unquote
+
+import django
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import default_storage
+from django.template.loader import get_template
+
+from .thumbnails import ensure_derivative
+
+CV_TEMPLATE = "myapp/cv_template.html"  # Use same template as view
+
+PDF_CONTENT_TYPE = "application/pdf"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class CVRenderError(Exception):
+    pass
+
+
+def warm_up():
+    """Pay the one-off costs of the first CV in this process ahead of time.
+
+    Imports xhtml2pdf/reportlab and loads their default fonts, compiles the
+    CV template and builds the DOCX skeleton. xhtml2pdf cannot reuse parsed
+    CSS between documents, so each render still parses the template's styles.
+    Run by :func:`init_worker` in every CV render process.
+    """
+    from xhtml2pdf import pisa
+
+    get_template(CV_TEMPLATE)
+    docx_skeleton()
+    pisa.CreatePDF("<html><body><p>warm-up</p></body></html>", dest=BytesIO())
+
+
+def init_worker():
+    """Initializer for spawned CV render processes: set Django up, then :func:`warm_up`.
+
+    This module does not import the models, so a new process can unpickle
+    this function before Django is set up.
+    """
+    django.setup()
+    warm_up()
+
+
+def link_callback(uri, rel):
+    """Resolve MEDIA/STATIC URLs in the CV to local files for xhtml2pdf.
+
+    Media images are swapped for their print-sized derivative (built on
+    first use) so the renderer never decodes full-resolution uploads.
+    """
+    # Template URLs are quoted; stored names may contain spaces or non-ASCII characters.
+    uri = unquote(uri)
+    if uri.startswith(settings.MEDIA_URL):
+        name = uri[len(settings.MEDIA_URL):]
+        derivative = ensure_derivative(default_storage, name, "print")
+        return default_storage.path(derivative or name)
+    if uri.startswith(settings.STATIC_URL):
+        name = uri[len(settings.STATIC_URL):]
+        return finders.find(name) or os.path.join(settings.STATIC_ROOT, name)
+    return uri
+
+
+def render_cv_pdf(candidate):
+    """Render ``cv_template.html`` for a candidate and return the PDF bytes."""
+    # xhtml2pdf pulls in reportlab, pyHanko and html5lib; only CV workers should pay for them.
+    from xhtml2pdf import pisa
+
+    context = {
+        "c": candidate,
+        "candidate": candidate,
+        "today_date": date.today(),
+        "applicant_number": candidate.id,
+    }
+    html = get_template(CV_TEMPLATE).render(context)
+
+    output = BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=output, link_callback=link_callback)
+    if pisa_status.err:
+        raise CVRenderError("Error generating PDF.")
+    return output.getvalue()
+
+
+# Rows of the main DOCX table: (label, placeholder).
+DOCX_TABLE_ROWS = (
+    ("Job Applied For", "job_applied"),
+    ("Full Name", "full_name"),
+    ("Gender", "gender"),
+    ("Nationality", "job_location"),
+    ("Phone", "phone_number"),
+    ("Passport Number", "passport_number"),
+    ("Date of Birth", "date_of_birth"),
+    ("Age", "age"),
+)
+DOCX_DOCUMENTS = (
+    ("full_photo", "Full Photo"),
+    ("passport_copy", "Passport Copy"),
+    ("medical_copy", "Medical Copy"),
+    ("interpol", "Interpol Copy"),
+)
+
+
+PLACEHOLDER_RE = re.compile(r"\[\[(\w+)\]\]")
+
+
+def _placeholder(key):
+    return f"[[{key}]]"
+
+
+@lru_cache(maxsize=1)
+def docx_skeleton():
+    """The static part of the Word CV, built once per process and kept as bytes."""
+    from docx import Document
+
+    document = Document()
+    document.add_heading("CURRICULUM VITAE", 0)
+    document.add_paragraph("Company: CARBIB")
+    document.add_paragraph(f"Date: {_placeholder('today_date')}")
+    document.add_paragraph(f"Applicant No: {_placeholder('applicant_number')}")
+
+    # Main info table
+    table = document.add_table(rows=len(DOCX_TABLE_ROWS), cols=2)
+    table.style = "Table Grid"
+    for row, (label, key) in enumerate(DOCX_TABLE_ROWS):
+        table.cell(row, 0).text = label
+        table.cell(row, 1).text = _placeholder(key)
+
+    # Personal details
+    document.add_heading("Personal Details", level=1)
+    document.add_paragraph(f"Marital Status: {_placeholder('marital_status')}")
+    document.add_paragraph(f"Education Level: {_placeholder('education_level')}")
+
+    # Work experience
+    document.add_heading("Work Experience", level=1)
+    document.add_paragraph(_placeholder("working_experience"))
+
+    output = BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def _docx_values(candidate):
+    return {
+        "today_date": str(date.today()),
+        "applicant_number": str(candidate.id),
+        "job_applied": candidate.job_applied.title if candidate.job_applied else "N/A",
+        "full_name": candidate.full_name,
+        "gender": candidate.gender,
+        "job_location": str(candidate.job_location or "N/A"),
+        "phone_number": candidate.phone_number,
+        "passport_number": candidate.passport_number or "N/A",
+        "date_of_birth": str(candidate.date_of_birth),
+        "age": str(candidate.age or "N/A"),
+        "marital_status": candidate.marital_status or "N/A",
+        "education_level": candidate.education_level or "N/A",
+        "working_experience": candidate.working_experience or "N/A",
+    }
+
+
+def _fill_paragraph(paragraph, values):
+    if "[[" not in paragraph.text:
+        return
+    text = PLACEHOLDER_RE.sub(lambda match: values.get(match.group(1), match.group(0)), paragraph.text)
+    for run in paragraph.runs[1:]:
+        run.text = ""
+    paragraph.runs[0].text = text
+
+
+def _add_image(document, fieldfile, width):
+    """Embed the print-sized derivative of an image rather than the raw upload."""
+    storage = fieldfile.storage
+    name = ensure_derivative(storage, fieldfile.name, "print") or fieldfile.name
+    with storage.open(name, "rb") as image:
+        document.add_picture(image, width=width)
+
+
+def build_cv_docx(candidate):
+    """Fill the cached DOCX skeleton for a candidate and return the .docx bytes."""
+    from docx import Document
+    from docx.shared import Inches
+
+    document = Document(BytesIO(docx_skeleton()))
+    values = _docx_values(candidate)
+    for paragraph in document.paragraphs:
+        _fill_paragraph(paragraph, values)
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    _fill_paragraph(paragraph, values)
+
+    if candidate.profile_picture:
+        document.add_heading("Profile Picture", level=1)
+        _add_image(document, candidate.profile_picture, Inches(1.5))
+
+    for field, title in DOCX_DOCUMENTS:
+        fieldfile = getattr(candidate, field)
+        if fieldfile:
+            document.add_page_break()
+            document.add_heading(title, level=1)
+            _add_image(document, fieldfile, Inches(2.5))
+
+    output = BytesIO()
+    document.save(output)
+    return output.getvalue()
@@ -0,0 +1,163 @@
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.utils.text import get_valid_filename
+
+from . import cv_cache
+from .cv import build_cv_docx, init_worker, render_cv_pdf
+from .models import Candidates
+
+BUILDERS = {"pdf": render_cv_pdf, "docx": build_cv_docx}
+
+
+# Candidates loaded per query when a CV pack renders in this process.
+LOAD_CHUNK = 100
+
+
+def _candidates():
+    return Candidates.objects.select_related("job_applied", "job_location", "referral_info")
+
+
+def _render(candidate, kind):
+    """Render one CV (through the disk cache) and return ``(filename, bytes)``."""
+    path, _ = cv_cache.get_or_render(candidate, kind, BUILDERS[kind])
+    filename = get_valid_filename(f"CV_{candidate.pk}_{candidate.full_name}.{cv_cache.EXTENSIONS[kind]}")
+    return filename, path.read_bytes()
+
+
+def render_one(candidate_id, kind):
+    """:func:`_render` in a pool worker.
+
+    Runs inside a pool worker, so it loads the candidate itself rather than
+    receiving a model instance from the parent.
+    """
+    return _render(_candidates().get(pk=candidate_id), kind)
+
+
+def _spawn_pool(max_workers):
+    # Spawned, not forked: the server process is already running threads (and
+    # holds database connections) that a forked child would inherit.
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=init_worker)
+
+
+# ------------------------------ SINGLE RENDERS ----------------------------------
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def render_pool():
+    """The process pool single CV downloads render in, started on first use.
+
+    Workers are spawned rather than forked, since the server process is
+    already running threads; ``init_worker`` sets Django up before the task
+    functions (and the models they import) are unpickled.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = _spawn_pool(settings.CV_RENDER_PROCESSES)
+    return _render_pool
+
+
+def build_one(candidate_id, kind):
+    return BUILDERS[kind](_candidates().get(pk=candidate_id))
+
+
+def renderer(kind):
+    """The ``render(candidate) -> bytes`` callable for ``cv_cache.get_or_render``.
+
+    With ``CV_RENDER_PROCESSES`` set, the CPU-bound build runs in
+    ``render_pool()`` so it does not hold the server process's GIL.
+    """
+    if settings.CV_RENDER_PROCESSES <= 0:
+        return BUILDERS[kind]
+
+    def render(candidate):
+        return render_pool().submit(build_one, candidate.pk, kind).result()
+
+    return render
+
+
+class _ZipStream:
+    """Write-only sink for ZipFile whose bytes are drained after each entry."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _results(jobs, workers):
+    """Yield ``(candidate_id, kind, result, error)`` as renders finish."""
+    if workers <= 1:
+        for start in range(0, len(jobs), LOAD_CHUNK):
+            chunk = jobs[start:start + LOAD_CHUNK]
+            candidates = _candidates().in_bulk({candidate_id for candidate_id, _ in chunk})
+            for candidate_id, kind in chunk:
+                try:
+                    if candidate_id not in candidates:
+                        raise Candidates.DoesNotExist(f"Candidate {candidate_id} no longer exists.")
+                    result = _render(candidates[candidate_id], kind)
+                except Exception as exc:
+                    yield candidate_id, kind, None, exc
+                else:
+                    yield candidate_id, kind, result, None
+        return
+
+    jobs = iter(jobs)
+    with _spawn_pool(workers) as pool:
+        pending = {}
+
+        def submit_next():
+            job = next(jobs, None)
+            if job is not None:
+                pending[pool.submit(render_one, *job)] = job
+
+        # Keep at most two renders queued per worker.
+        for _ in range(workers * 2):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate_id, kind = pending.pop(future)
+                try:
+                    yield candidate_id, kind, future.result(), None
+                except Exception as exc:
+                    yield candidate_id, kind, None, exc
+                submit_next()
+
+
+def stream_cv_zip(candidate_ids, kinds=("pdf",), workers=None):
+    """Yield a ZIP archive of CVs chunk by chunk, one entry per finished render.
+
+    Failed renders are listed in ``errors.txt`` at the end of the archive.
+    """
+    workers = settings.CV_BATCH_WORKERS if workers is None else workers
+    jobs = [(candidate_id, kind) for candidate_id in candidate_ids for kind in kinds]
+    sink = _ZipStream()
+    errors = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for candidate_id, kind, result, error in _results(jobs, workers):
+            if error is not None:
+                errors.append(f"{candidate_id}\t{kind}\t{error}")
+                continue
+            filename, content = result
+            archive.writestr(f"{kind}/{filename}", content)
+            yield sink.drain()
+        if errors:
+            archive.writestr("errors.txt", "candidate_id\tformat\terror\n" + "\n".join(errors) + "\n")
+    yield sink.drain()
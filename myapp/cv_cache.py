@@ -0,0 +1,101 @@
+import hashlib
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+
+from .thumbnails import DOCUMENT_FIELDS
+from .versions import file_signature
+
+# Bump when cv_template.html or the DOCX builder changes shape.
+CV_CACHE_VERSION = 3
+
+EXTENSIONS = {"pdf": "pdf", "docx": "docx"}
+
+
+def cache_dir():
+    path = Path(settings.CV_CACHE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def candidate_fingerprint(candidate, kind):
+    """Digest of everything that ends up in a generated CV.
+
+    Covers every concrete field, the related job/country/agent names, the
+    size and mtime of each document file, and today's date (printed on the
+    CV), so any change produces a new cache key.
+    """
+    digest = hashlib.sha256(f"{CV_CACHE_VERSION}:{kind}:{date.today()}".encode())
+    for field in candidate._meta.concrete_fields:
+        digest.update(f"|{field.attname}={field.value_from_object(candidate)}".encode())
+    for related in ("job_applied", "job_location", "referral_info"):
+        digest.update(f"|{related}={getattr(candidate, related, None)}".encode())
+    for field in DOCUMENT_FIELDS:
+        digest.update(f"|{field}@{file_signature(getattr(candidate, field))}".encode())
+    return digest.hexdigest()
+
+
+def cache_path(candidate_id, kind, fingerprint):
+    return cache_dir() / f"{candidate_id}-{kind}-{fingerprint[:32]}.{EXTENSIONS[kind]}"
+
+
+def get_or_render(candidate, kind, render):
+    """Return ``(path, fingerprint)`` for the cached document, rendering on a miss.
+
+    Hits refresh the file's access time, which is what LRU eviction orders by;
+    the modification time is left alone and serves as ``Last-Modified``.
+    """
+    fingerprint = candidate_fingerprint(candidate, kind)
+    path = cache_path(candidate.pk, kind, fingerprint)
+    if path.exists():
+        os.utime(path, (time.time(), path.stat().st_mtime))
+        return path, fingerprint
+
+    content = render(candidate)
+    invalidate_candidate(candidate.pk, kind)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(content)
+    os.replace(tmp, path)
+    evict(keep=path)
+    return path, fingerprint
+
+
+def invalidate_candidate(candidate_id, kind="*"):
+    """Delete the cached documents of one candidate."""
+    for path in cache_dir().glob(f"{candidate_id}-{kind}-*"):
+        path.unlink(missing_ok=True)
+
+
+def invalidate_candidates(candidate_ids):
+    """Delete the cached documents of many candidates in one directory scan."""
+    prefixes = {str(candidate_id) for candidate_id in candidate_ids}
+    for path in cache_dir().iterdir():
+        if path.name.split("-", 1)[0] in prefixes:
+            path.unlink(missing_ok=True)
+
+
+def evict(keep=None, max_bytes=None):
+    """Remove least recently used files until the cache fits ``CV_CACHE_MAX_BYTES``."""
+    max_bytes = settings.CV_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    for path in cache_dir().iterdir():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+        total += stat.st_size
+
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
@@ -0,0 +1,294 @@
+import re
+import unicodedata
+import zlib
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import CandidateBlockKey, Candidates, DuplicateMatch
+
+FIELDS = ("pk", "full_name", "date_of_birth", "phone_number", "nin_number", "passport_number")
+
+NAME_BINS = 128          # hashed character trigram counts per name
+NIN_PREFIX_LENGTH = 8    # "CM" + birth year + the start of the registration code
+PHONE_DIGITS = 9         # national number without the 0 / +256 prefix
+SCORE_CHUNK = 100_000    # pairs scored per numpy batch
+WRITE_BATCH = 2000
+
+# Score contributions; the total is capped at 1.0.
+WEIGHTS = {
+    "name": 0.5,
+    "dob": 0.2,
+    "phone": 0.15,
+    "nin": 0.3,
+    "nin_prefix": 0.05,
+    "passport": 0.3,
+}
+
+NON_LETTERS = re.compile(r"[^a-z]+")
+NON_ALNUM = re.compile(r"[^0-9A-Z]+")
+NON_DIGITS = re.compile(r"\D+")
+SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in (("1", "bfpv"), ("2", "cgjkqsxz"), ("3", "dt"), ("4", "l"), ("5", "mn"), ("6", "r"))
+    for letter in letters
+}
+
+
+# ------------------------------ NORMALISATION ---------------------------------
+def normalize_name(name):
+    """Lower-case ASCII name tokens in sorted order, so "OKELLO John" == "john okello"."""
+    text = name or ""
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    text = text.casefold()
+    return " ".join(sorted(NON_LETTERS.sub(" ", text).split()))
+
+
+def normalize_phone(phone):
+    """Last nine digits, so 0772 123456, +256772123456 and 256-772-123-456 agree."""
+    digits = NON_DIGITS.sub("", phone or "")
+    return digits[-PHONE_DIGITS:] if len(digits) >= PHONE_DIGITS else ""
+
+
+def normalize_document(number):
+    """Upper-case letters and digits only (NIN and passport numbers)."""
+    return NON_ALNUM.sub("", (number or "").upper())
+
+
+@lru_cache(maxsize=65536)
+def soundex(token):
+    code, last = token[0].upper(), SOUNDEX_CODES.get(token[0], "")
+    for letter in token[1:]:
+        digit = SOUNDEX_CODES.get(letter, "")
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":
+            last = digit
+    return code.ljust(4, "0")
+
+
+def block_keys(name, dob, phone, nin, passport):
+    """Blocking keys for one normalised candidate: only candidates sharing a key are compared."""
+    keys = set()
+    if dob:
+        keys.update(f"n:{soundex(token)}:{dob.isoformat()}" for token in name.split() if len(token) > 1)
+    if len(nin) >= NIN_PREFIX_LENGTH:
+        keys.add(f"nin:{nin[:NIN_PREFIX_LENGTH]}")
+    if phone:
+        keys.add(f"tel:{phone}")
+    if passport:
+        keys.add(f"pp:{passport[:30]}")
+    return keys
+
+
+# ------------------------------ FEATURES ---------------------------------------
+def _hash(value):
+    return hash(value) if value else 0
+
+
+def _trigram_bins(padded):
+    # crc32 rather than hash(): scores must not change between processes.
+    encoded = padded.encode()
+    return [zlib.crc32(encoded[start:start + 3]) % NAME_BINS for start in range(len(encoded) - 2)]
+
+
+class Features:
+    """Column arrays describing a set of candidates, indexed by position.
+
+    Names become hashed trigram count vectors, everything else a 64-bit
+    hash (0 when missing), so pair scoring is pure numpy.
+    """
+
+    def __init__(self, rows):
+        pks, dobs, phones, nins, prefixes, passports = [], [], [], [], [], []
+        trigram_rows, trigram_bins = [], []
+        self.keys = []  # (position, key)
+        for position, (pk, full_name, dob, phone, nin, passport) in enumerate(rows):
+            name = normalize_name(full_name)
+            phone, nin, passport = normalize_phone(phone), normalize_document(nin), normalize_document(passport)
+            pks.append(pk)
+            dobs.append(dob.toordinal() if dob else 0)
+            phones.append(int(phone) if phone else 0)
+            nins.append(_hash(nin))
+            prefixes.append(_hash(nin[:NIN_PREFIX_LENGTH]) if len(nin) >= NIN_PREFIX_LENGTH else 0)
+            passports.append(_hash(passport))
+            padded = f" {name} "
+            bins = _trigram_bins(padded)
+            trigram_rows.extend([position] * len(bins))
+            trigram_bins.extend(bins)
+            self.keys.extend((position, key) for key in block_keys(name, dob, phone, nin, passport))
+
+        self.pks = np.array(pks, dtype=np.int64)
+        self.dobs = np.array(dobs, dtype=np.int64)
+        self.phones = np.array(phones, dtype=np.int64)
+        self.nins = np.array(nins, dtype=np.int64)
+        self.nin_prefixes = np.array(prefixes, dtype=np.int64)
+        self.passports = np.array(passports, dtype=np.int64)
+        self.names = np.zeros((len(pks), NAME_BINS), dtype=np.uint8)
+        np.add.at(self.names, (np.array(trigram_rows, dtype=np.int64), np.array(trigram_bins, dtype=np.int64)), 1)
+
+    def __len__(self):
+        return len(self.pks)
+
+    def pairs(self, skip_keys=(), max_block_size=None):
+        """Unique ``(a, b)`` position arrays (a < b) of candidates sharing a block."""
+        max_block_size = max_block_size or settings.DEDUPE_MAX_BLOCK_SIZE
+        skip = set(skip_keys)
+        keys = [(position, key) for position, key in self.keys if key not in skip]
+        if not keys:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        positions = np.fromiter((position for position, _ in keys), dtype=np.int64, count=len(keys))
+        hashes = np.fromiter((hash(key) for _, key in keys), dtype=np.int64, count=len(keys))
+        order = np.argsort(hashes, kind="stable")
+        positions, hashes = positions[order], hashes[order]
+        starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+        sizes = np.diff(np.r_[starts, len(hashes)])
+
+        # Blocks of equal size are expanded together: one fancy-index per size.
+        left, right = [], []
+        for size in np.unique(sizes[(sizes > 1) & (sizes <= max_block_size)]):
+            members = positions[starts[sizes == size][:, None] + np.arange(size)]
+            i, j = np.triu_indices(size, 1)
+            left.append(members[:, i].ravel())
+            right.append(members[:, j].ravel())
+        if not left:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        a, b = np.concatenate(left), np.concatenate(right)
+        a, b = np.minimum(a, b), np.maximum(a, b)
+        pair_ids = np.unique(a * len(self) + b)
+        return pair_ids // len(self), pair_ids % len(self)
+
+    def score(self, a, b):
+        """Similarity in [0, 1] for each pair plus the per-feature match arrays."""
+        va, vb = self.names[a], self.names[b]
+        overlap = np.minimum(va, vb).sum(axis=1, dtype=np.int32)
+        total = va.sum(axis=1, dtype=np.int32) + vb.sum(axis=1, dtype=np.int32)
+        name = np.divide(2 * overlap, total, out=np.zeros(len(a)), where=total > 0)
+
+        def same(column):
+            return (column[a] == column[b]) & (column[a] != 0)
+
+        matches = {
+            "dob": same(self.dobs),
+            "phone": same(self.phones),
+            "nin": same(self.nins),
+            "passport": same(self.passports),
+        }
+        matches["nin_prefix"] = same(self.nin_prefixes) & ~matches["nin"]
+        score = WEIGHTS["name"] * name
+        for feature, matched in matches.items():
+            score += WEIGHTS[feature] * matched
+        return np.minimum(score, 1.0), name, matches
+
+
+def _matches(features, a, b, threshold):
+    """Score pairs in chunks and return ``DuplicateMatch`` objects above ``threshold``."""
+    found = []
+    for start in range(0, len(a), SCORE_CHUNK):
+        chunk_a, chunk_b = a[start:start + SCORE_CHUNK], b[start:start + SCORE_CHUNK]
+        score, name, matches = features.score(chunk_a, chunk_b)
+        for index in np.flatnonzero(score >= threshold):
+            reasons = [f"name {name[index]:.2f}"]
+            reasons.extend(feature for feature, matched in matches.items() if matched[index])
+            found.append(DuplicateMatch(
+                candidate_a_id=int(features.pks[chunk_a[index]]),
+                candidate_b_id=int(features.pks[chunk_b[index]]),
+                score=round(float(score[index]), 4),
+                reasons=", ".join(reasons),
+            ))
+    return found
+
+
+def _save_matches(found, stale):
+    """Upsert ``found`` (keeping any review decision) and drop pending pairs in ``stale``.
+
+    ``stale`` must only hold pairs a scan queued; pairs from migrations stay until reviewed.
+    """
+    found_pairs = {(match.candidate_a_id, match.candidate_b_id) for match in found}
+    stale_ids = [pk for pk, a, b in stale if (a, b) not in found_pairs]
+    with transaction.atomic():
+        for start in range(0, len(stale_ids), WRITE_BATCH):
+            DuplicateMatch.objects.filter(pk__in=stale_ids[start:start + WRITE_BATCH]).delete()
+        DuplicateMatch.objects.bulk_create(
+            found, batch_size=WRITE_BATCH, update_conflicts=True,
+            unique_fields=["candidate_a", "candidate_b"], update_fields=["score", "reasons"],
+        )
+    return len(found)
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# ------------------------------ ENTRY POINTS -----------------------------------
+def find_all_duplicates(threshold=None):
+    """Full scan: rebuild every blocking key and rescore every blocked pair.
+
+    Returns ``(candidates, pairs compared, matches)``.
+    """
+    threshold = settings.DEDUPE_THRESHOLD if threshold is None else threshold
+    features = Features(
+        Candidates.objects.order_by("pk").values_list(*FIELDS).iterator(chunk_size=5000)
+    )
+    with transaction.atomic():
+        CandidateBlockKey.objects.all().delete()
+        CandidateBlockKey.objects.bulk_create(
+            (CandidateBlockKey(candidate_id=int(features.pks[position]), key=key) for position, key in features.keys),
+            batch_size=WRITE_BATCH,
+        )
+    a, b = features.pairs()
+    found = _matches(features, a, b, threshold)
+    stale = DuplicateMatch.objects.filter(status=DuplicateMatch.PENDING, source=DuplicateMatch.ENGINE).values_list(
+        "pk", "candidate_a_id", "candidate_b_id",
+    )
+    return len(features), len(a), _save_matches(found, list(stale.iterator()))
+
+
+def check_candidates(candidate_ids, threshold=None):
+    """Incremental check of new or edited candidates against their blocks only."""
+    threshold = settings.DEDUPE_THRESHOLD if threshold is None else threshold
+    targets = set(candidate_ids)
+    if not targets:
+        return 0
+    own = Features(Candidates.objects.filter(pk__in=targets).values_list(*FIELDS))
+    keys = {key for _, key in own.keys}
+    with transaction.atomic():
+        for chunk in _chunks(targets):
+            CandidateBlockKey.objects.filter(candidate_id__in=chunk).delete()
+        CandidateBlockKey.objects.bulk_create(
+            [CandidateBlockKey(candidate_id=int(own.pks[position]), key=key) for position, key in own.keys],
+            batch_size=WRITE_BATCH,
+        )
+
+    oversized = set()
+    for chunk in _chunks(keys):
+        oversized.update(
+            CandidateBlockKey.objects.filter(key__in=chunk).values("key").annotate(size=Count("pk"))
+            .filter(size__gt=settings.DEDUPE_MAX_BLOCK_SIZE).values_list("key", flat=True)
+        )
+    # Members of oversized blocks are never compared through them, so do not load them.
+    partners = set(targets)
+    for chunk in _chunks(keys - oversized):
+        partners.update(CandidateBlockKey.objects.filter(key__in=chunk).values_list("candidate_id", flat=True))
+
+    features = Features(Candidates.objects.filter(pk__in=partners).order_by("pk").values_list(*FIELDS))
+    a, b = features.pairs(skip_keys=oversized)
+    involved = np.isin(features.pks, list(targets))
+    keep = involved[a] | involved[b]
+    found = _matches(features, a[keep], b[keep], threshold)
+
+    stale = []
+    for chunk in _chunks(targets):
+        pending = DuplicateMatch.objects.filter(status=DuplicateMatch.PENDING, source=DuplicateMatch.ENGINE)
+        stale.extend(pending.filter(candidate_a_id__in=chunk).values_list("pk", "candidate_a_id", "candidate_b_id"))
+        stale.extend(pending.filter(candidate_b_id__in=chunk).values_list("pk", "candidate_a_id", "candidate_b_id"))
+    return _save_matches(found, set(stale))
+
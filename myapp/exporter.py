@@ -0,0 +1,79 @@
+import csv
+import tempfile
+
+from django.conf import settings
+
+from .filters import filter_candidates
+from .models import Candidates
+
+# Export column key -> (queryset lookup, sheet header).
+EXPORT_COLUMNS = {
+    "full_name": ("full_name", "Full Name"),
+    "gender": ("gender", "Gender"),
+    "phone_number": ("phone_number", "Phone Number"),
+    "email": ("email", "Email"),
+    "date_of_birth": ("date_of_birth", "Date of Birth"),
+    "nin_number": ("nin_number", "NIN Number"),
+    "passport_number": ("passport_number", "Passport Number"),
+    "candidate_status": ("candidate_status", "Status"),
+    "job_applied": ("job_applied__title", "Job Applied"),
+    "job_location": ("job_location__name", "Job Location"),
+    "referral_info": ("referral_info__full_name", "Referred By"),
+}
+DEFAULT_EXPORT_COLUMNS = (
+    "full_name", "gender", "phone_number", "passport_number", "job_applied", "referral_info",
+)
+
+
+def export_columns(params):
+    """Selected column keys from ``?columns=a,b`` (or repeated ``columns``)."""
+    requested = []
+    for value in params.getlist("columns"):
+        requested.extend(part.strip() for part in value.split(","))
+    columns = [column for column in requested if column in EXPORT_COLUMNS]
+    return columns or list(DEFAULT_EXPORT_COLUMNS)
+
+
+def export_rows(params, columns):
+    """Yield the header row, then one tuple per matching candidate.
+
+    Rows come from ``values_list().iterator()`` so only one chunk of the
+    result set is held in memory at a time.
+    """
+    yield [EXPORT_COLUMNS[column][1] for column in columns]
+    queryset = filter_candidates(Candidates.objects.order_by("pk"), params)
+    yield from queryset.values_list(
+        *(EXPORT_COLUMNS[column][0] for column in columns)
+    ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows):
+    """Write rows to a temporary .xlsx file using openpyxl's write-only mode.
+
+    Write-only worksheets flush each row to disk, so memory stays flat no
+    matter how many rows are exported. Returns the open temporary file,
+    rewound to the start.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Candidates")
+    for row in rows:
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,36 @@
+from .models import Candidates
+
+
+# Query-string parameter -> Candidates lookup used by the client list and exports.
+CANDIDATE_FILTERS = {
+    "status": "candidate_status",
+    "job": "job_applied_id",
+    "country": "job_location_id",
+    "agent": "referral_info_id",
+}
+
+STATUS_VALUES = {value for value, _ in Candidates.CANDIDATE_STATUS_CHOICES}
+
+
+def candidate_filter_values(params):
+    """Return the valid filter values from a QueryDict, ignoring junk input."""
+    values = {}
+    for param in CANDIDATE_FILTERS:
+        raw = (params.get(param) or "").strip()
+        if not raw:
+            continue
+        if param == "status":
+            if raw in STATUS_VALUES:
+                values[param] = raw
+        elif raw.isdigit():
+            values[param] = int(raw)
+    return values
+
+
+def filter_candidates(queryset, params):
+    """Apply the status/job/country/agent filters from ``params`` to ``queryset``."""
+    lookups = {
+        CANDIDATE_FILTERS[param]: value
+        for param, value in candidate_filter_values(params).items()
+    }
+    return queryset.filter(**lookups) if lookups else queryset
@@ -1,7 +1,11 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import AuthenticationForm
-from .models import Candidates, Countries, Jobs, Agents
+from django.core.files.uploadedfile import UploadedFile
+from .ingest import store_document
+from .lookups import LookupChoiceField
+from .models import Candidates
+from .thumbnails import DOCUMENT_FIELDS, generate_for_candidate
 
 
 class RegistrationForm(forms.ModelForm):
@@ -114,21 +118,21 @@ class CandidateApplicationForm(forms.ModelForm):
     )
 
     # Job-related
-    job_applied = forms.ModelChoiceField(
-        queryset=Jobs.objects.filter(status='open').order_by('-date_posted'),
+    job_applied = LookupChoiceField(
+        'open_jobs',
         label='Job Applied For',
         required=True,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
 
-    job_location = forms.ModelChoiceField(
-        queryset=Countries.objects.all(),
+    job_location = LookupChoiceField(
+        'countries',
         label='Job Location',
         widget=forms.Select(attrs={'class': 'form-control'})
     )
 
-    referral_info = forms.ModelChoiceField(
-        queryset=Agents.objects.all(),
+    referral_info = LookupChoiceField(
+        'agents',
         required=False,
         label='Agent / Referral',
         widget=forms.Select(attrs={'class': 'form-control'})
@@ -152,3 +156,17 @@ class CandidateApplicationForm(forms.ModelForm):
         for field_name, field in self.fields.items():
             field.widget.attrs['class'] = 'form-control'
             field.help_text = ''
+
+    def save(self, commit=True):
+        candidate = super().save(commit=False)
+        uploaded = [
+            field for field in DOCUMENT_FIELDS
+            if field in self.changed_data and isinstance(self.cleaned_data.get(field), UploadedFile)
+        ]
+        for field in uploaded:
+            store_document(getattr(candidate, field), self.cleaned_data[field])
+        if commit:
+            candidate.save()
+            self._save_m2m()
+            generate_for_candidate(candidate, uploaded)
+        return candidate
@@ -0,0 +1,175 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .ingest import store_upload
+from .models import Candidates
+from .signals import DEDUPE_FIELDS, candidates_bulk_changed
+from .summary import snapshot
+from .thumbnails import generate_for_candidate
+
+# Columns rendered by the view_clients grid; everything else stays deferred.
+GRID_FIELDS = (
+    "id", "full_name", "gender", "phone_number", "date_of_birth", "passport_number",
+    "candidate_status", "profile_picture", "full_photo", "passport_copy",
+    "medical_copy", "interpol",
+    "job_applied__id", "job_applied__title",
+    "job_location__id", "job_location__name",
+    "referral_info__id", "referral_info__full_name",
+)
+
+# Grid input prefix -> model attribute for the editable cells.
+TEXT_FIELDS = {
+    "full_name": "full_name",
+    "gender": "gender",
+    "phone_number": "phone_number",
+    "passport_number": "passport_number",
+}
+FOREIGN_KEY_FIELDS = {
+    "job_applied": "job_applied_id",
+    "job_location": "job_location_id",
+    "agent": "referral_info_id",
+}
+# How the grid names a foreign key whose row has been deleted.
+FOREIGN_KEY_LABELS = {"job_applied_id": "job", "job_location_id": "country", "referral_info_id": "agent"}
+FILE_FIELDS = ("profile_picture", "full_photo", "passport_copy", "medical_copy", "interpol")
+
+EDITABLE_FIELDS = (
+    "id", *TEXT_FIELDS.values(), "date_of_birth", *FOREIGN_KEY_FIELDS.values(), *FILE_FIELDS,
+)
+
+
+class GridError(Exception):
+    """A grid change that cannot be saved; the message is shown to the user."""
+
+
+def posted_candidate_ids(post):
+    """Ids of the rows that were rendered in the submitted grid page."""
+    return {int(value) for value in post.getlist("candidate_ids") if value.isdigit()}
+
+
+def _row_changes(candidate, post, stored):
+    """Set the submitted values on ``candidate`` and return the changed field names."""
+    changed = set()
+    pk = candidate.pk
+
+    for prefix, attr in TEXT_FIELDS.items():
+        value = post.get(f"{prefix}_{pk}")
+        if value is None:
+            continue
+        if value == "" and Candidates._meta.get_field(attr).null:
+            value = None
+        if value != getattr(candidate, attr):
+            setattr(candidate, attr, value)
+            changed.add(attr)
+
+    dob = parse_date(post.get(f"date_of_birth_{pk}") or "")
+    if dob and dob != candidate.date_of_birth:
+        candidate.date_of_birth = dob
+        changed.add("date_of_birth")
+
+    for prefix, attr in FOREIGN_KEY_FIELDS.items():
+        value = post.get(f"{prefix}_{pk}") or ""
+        if value.isdigit() and int(value) != getattr(candidate, attr):
+            setattr(candidate, attr, int(value))
+            changed.add(attr.removesuffix("_id"))
+
+    for field in FILE_FIELDS:
+        name = stored.get((pk, field))
+        if name:
+            setattr(candidate, field, name)
+            changed.add(field)
+
+    return changed
+
+
+def _check_conflicts(groups):
+    """Raise ``GridError`` for a passport another candidate holds or a job/country/agent that is gone."""
+    def changed(field):
+        return [candidate for fields, candidates in groups.items() if field in fields for candidate in candidates]
+
+    passports = {c.pk: c.passport_number for c in changed("passport_number") if c.passport_number}
+    clashes = {number for number, count in Counter(passports.values()).items() if count > 1}
+    claimed_by = {number: pk for pk, number in passports.items()}
+    # Stored values count even for posted rows: unique checks run row by row, so numbers cannot be swapped.
+    clashes.update(
+        number for pk, number in Candidates.objects.filter(passport_number__in=passports.values())
+        .values_list("pk", "passport_number") if claimed_by[number] != pk
+    )
+    if clashes:
+        raise GridError(f"Another candidate already has passport number {', '.join(sorted(clashes))}.")
+
+    for attr, label in FOREIGN_KEY_LABELS.items():
+        field = Candidates._meta.get_field(attr.removesuffix("_id"))
+        wanted = {getattr(candidate, attr) for candidate in changed(field.name)}
+        found = field.related_model.objects.filter(pk__in=wanted).values_list("pk", flat=True) if wanted else []
+        if wanted - set(found):
+            raise GridError(f"The selected {label} no longer exists.")
+
+
+def _store_uploads(ids, files):
+    """Store the posted files ahead of the transaction, so it is not held open while images are re-encoded.
+
+    bulk_update() skips FileField.pre_save(), so the rows are pointed at the
+    stored names instead. Returns ``{(pk, field): name}``. If the save then
+    fails the files stay behind: another request may already reference the
+    same content, and ``cleanup_media`` removes them once they are orphans.
+    """
+    stored = {}
+    for pk in ids:
+        for field in FILE_FIELDS:
+            upload = files.get(f"{field}_{pk}")
+            if upload:
+                stored[pk, field] = store_upload(Candidates._meta.get_field(field).storage, upload)
+    return stored
+
+
+def save_grid_changes(post, files):
+    """Write only the changed cells of the posted grid rows.
+
+    The rows are read with ``select_for_update()`` and diffed inside the
+    transaction, so a concurrent edit is never overwritten with stale
+    values. A passport another candidate holds, or a job, country or agent
+    that no longer exists, raises ``GridError`` before anything is written.
+    Rows are grouped by the exact set of fields that changed and each group
+    is written with one ``bulk_update``. Returns the list of candidates
+    that were updated.
+    """
+    ids = posted_candidate_ids(post)
+    if not ids:
+        return []
+
+    stored = _store_uploads(ids, files)
+    groups = defaultdict(list)
+    with transaction.atomic():
+        now = timezone.now()
+        rows = Candidates.objects.filter(pk__in=ids).only(*EDITABLE_FIELDS).select_for_update()
+        for candidate in rows:
+            changed = _row_changes(candidate, post, stored)
+            if changed:
+                # bulk_update() does not apply auto_now either.
+                candidate.updated_at = now
+                changed.add("updated_at")
+                groups[frozenset(changed)].append(candidate)
+
+        _check_conflicts(groups)
+        changed_ids = [candidate.pk for candidates in groups.values() for candidate in candidates]
+        before = snapshot(changed_ids)
+        try:
+            for fields, candidates in groups.items():
+                Candidates.objects.bulk_update(candidates, sorted(fields))
+        except IntegrityError as e:
+            # Only a write committed since the check above can get here.
+            raise GridError("Another user saved a conflicting change. Reload and try again.") from e
+        if groups:
+            dedupe_ids = [candidate.pk for fields, candidates in groups.items() if fields & set(DEDUPE_FIELDS)
+                          for candidate in candidates]
+            candidates_bulk_changed(changed_ids, before=before, dedupe_ids=dedupe_ids)
+
+    for fields, candidates in groups.items():
+        uploaded = [field for field in FILE_FIELDS if field in fields]
+        for candidate in candidates if uploaded else ():
+            generate_for_candidate(candidate, uploaded)
+    return [candidate for candidates in groups.values() for candidate in candidates]
@@ -0,0 +1,173 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Candidates, Jobs, Agents
+from .signals import candidates_bulk_changed, lookups_changed
+
+REQUIRED_COLUMNS = {
+    "full_name": "Full Name",
+    "passport_number": "Passport Number",
+    "date_of_birth": "Date of Birth",
+    "job_applied_title": "Job Applied Title",
+    "referral_full_name": "Referral Full Name",
+}
+
+CREATED = "created"
+DUPLICATE = "duplicate"
+MISSING = "missing field"
+
+
+class ImportResult:
+    """Per-row outcome of an Excel import."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = []
+        self.new_jobs = []
+        self.new_agents = []
+
+    def add(self, row_number, full_name, status, detail=""):
+        self.rows.append({
+            "row": row_number, "full_name": full_name, "status": status, "detail": detail,
+        })
+
+    @property
+    def counts(self):
+        return Counter(row["status"] for row in self.rows)
+
+    @property
+    def created_count(self):
+        return self.counts[CREATED]
+
+    @property
+    def skipped_count(self):
+        return len(self.rows) - self.created_count
+
+
+def _clean(value, isna):
+    if value is None or (not isinstance(value, str) and isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, (str, int, float)):
+        value = str(value).strip()
+        return value or None
+    return value
+
+
+def read_sheet(excel_file):
+    """Load an uploaded sheet into a list of cleaned row dicts."""
+    # pandas (and numpy) cost web workers ~0.3s and tens of MB; load them only for imports.
+    import pandas as pd
+
+    df = pd.read_excel(excel_file)
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+    if "date_of_birth" in df.columns:
+        df["date_of_birth"] = pd.to_datetime(df["date_of_birth"], errors="coerce").dt.date
+    return [
+        {column: _clean(value, pd.isna) for column, value in record.items()}
+        for record in df.to_dict("records")
+    ]
+
+
+def _lookup_map(queryset, field):
+    """Map casefolded ``field`` -> pk, keeping the lowest pk like ``.first()``."""
+    lookup = {}
+    for value, pk in queryset.order_by("pk").values_list(field, "pk").iterator():
+        lookup.setdefault(value.casefold(), pk)
+    return lookup
+
+
+def import_candidates(rows, dry_run=False, batch_size=None):
+    """Validate and bulk-insert candidate rows read by :func:`read_sheet`.
+
+    Existing passports, job titles and agent names are loaded once into
+    casefolded lookup maps, missing jobs and agents are created in bulk and
+    candidates are inserted with chunked ``bulk_create`` in one transaction.
+    With ``dry_run`` nothing is written; the report shows what would happen.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    result = ImportResult(dry_run=dry_run)
+
+    passports = {
+        passport.casefold()
+        for passport in Candidates.objects.exclude(passport_number__isnull=True)
+        .values_list("passport_number", flat=True).iterator()
+    }
+    jobs = _lookup_map(Jobs.objects.all(), "title")
+    agents = _lookup_map(Agents.objects.all(), "full_name")
+
+    accepted = []
+    new_jobs, new_agents = {}, {}
+    for index, row in enumerate(rows):
+        row_number = index + 2  # header is row 1 in the sheet
+        full_name = row.get("full_name")
+        missing = [label for column, label in REQUIRED_COLUMNS.items() if not row.get(column)]
+        if missing:
+            result.add(row_number, full_name, MISSING, ", ".join(missing))
+            continue
+
+        passport_key = row["passport_number"].casefold()
+        if passport_key in passports:
+            result.add(row_number, full_name, DUPLICATE, row["passport_number"])
+            continue
+        passports.add(passport_key)
+
+        job_key = row["job_applied_title"].casefold()
+        if job_key not in jobs:
+            new_jobs.setdefault(job_key, row["job_applied_title"])
+        agent_key = row["referral_full_name"].casefold()
+        if agent_key not in agents:
+            new_agents.setdefault(agent_key, row["referral_full_name"])
+
+        accepted.append((row, job_key, agent_key))
+        result.add(row_number, full_name, CREATED)
+
+    result.new_jobs = list(new_jobs.values())
+    result.new_agents = list(new_agents.values())
+    if dry_run or not accepted:
+        return result
+
+    with transaction.atomic():
+        closing_date = date.today() + timedelta(days=30)
+        created_jobs = Jobs.objects.bulk_create([
+            Jobs(
+                title=title,
+                description="Imported job - no description provided.",
+                location="Not specified",
+                salary=0,
+                closing_date=closing_date,
+                responsibilities="Imported job - responsibilities not specified.",
+                status="open",
+            )
+            for title in new_jobs.values()
+        ])
+        jobs.update({job.title.casefold(): job.pk for job in created_jobs})
+
+        created_agents = Agents.objects.bulk_create([
+            Agents(full_name=full_name) for full_name in new_agents.values()
+        ])
+        agents.update({agent.full_name.casefold(): agent.pk for agent in created_agents})
+        if created_jobs or created_agents:
+            lookups_changed()
+
+        created = Candidates.objects.bulk_create(
+            [
+                Candidates(
+                    full_name=row["full_name"],
+                    gender=row.get("gender") or "",
+                    phone_number=row.get("phone_number") or "",
+                    passport_number=row["passport_number"],
+                    date_of_birth=row["date_of_birth"],
+                    job_applied_id=jobs[job_key],
+                    referral_info_id=agents[agent_key],
+                )
+                for row, job_key, agent_key in accepted
+            ],
+            batch_size=batch_size,
+        )
+        candidates_bulk_changed([candidate.pk for candidate in created], created=True)
+    return result
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Agents, Candidates
+from .thumbnails import DOCUMENT_FIELDS, SIZES
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_RE = re.compile(r"^(?P<root>.+)\.(?:%s)\.jpg$" % "|".join(SIZES))
+
+
+# ------------------------------ RECOMPRESSION ---------------------------------
+def _encode(image, quality):
+    buffer = BytesIO()
+    # No exif= argument: EXIF (GPS, device, orientation) is dropped.
+    image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def normalize_image(source):
+    """Re-encode an uploaded image as a clean JPEG within the size budget.
+
+    The image is rotated upright from its EXIF orientation, flattened onto
+    white if it has transparency, bounded to ``INGEST_MAX_DIMENSION`` and
+    encoded at ``INGEST_QUALITY``, stepping the quality down to
+    ``INGEST_MIN_QUALITY`` and then the dimensions down until the result
+    fits in ``INGEST_MAX_BYTES``.
+    """
+    image = ImageOps.exif_transpose(Image.open(source))
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    limit = settings.INGEST_MAX_DIMENSION
+    image.thumbnail((limit, limit), Image.LANCZOS)
+
+    budget = settings.INGEST_MAX_BYTES
+    for quality in range(settings.INGEST_QUALITY, settings.INGEST_MIN_QUALITY - 1, -5):
+        data = _encode(image, quality)
+        if len(data) <= budget:
+            return data
+    while len(data) > budget and min(image.size) > 600:
+        image = image.resize((int(image.width * 0.8), int(image.height * 0.8)), Image.LANCZOS)
+        data = _encode(image, settings.INGEST_MIN_QUALITY)
+    return data
+
+
+# ------------------------------ CONTENT-ADDRESSED STORE -----------------------
+def content_name(data, extension):
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{settings.INGEST_DOCUMENT_DIR}/{digest[:2]}/{digest}{extension}"
+
+
+def store_upload(storage, upload):
+    """Normalise ``upload`` and save it in ``storage`` under its content-hash name.
+
+    Identical files map to the same name, so a re-uploaded scan is stored
+    once no matter how many candidates use it. Files Pillow cannot read
+    are stored byte-for-byte under their hash. Returns the storage name.
+    """
+    upload.seek(0)
+    try:
+        data, extension = normalize_image(upload), ".jpg"
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning("Storing %s without recompression: %s", upload.name, exc)
+        upload.seek(0)
+        data, extension = upload.read(), os.path.splitext(upload.name)[1].lower()
+
+    name = content_name(data, extension)
+    if not storage.exists(name):
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:  # another request stored the same content meanwhile
+            storage.delete(saved)
+    return name
+
+
+def store_document(fieldfile, upload):
+    """Store ``upload`` with ``store_upload`` and point ``fieldfile`` at it."""
+    name = store_upload(fieldfile.storage, upload)
+    # Assigning the name (not a File) leaves nothing for FileField.pre_save to upload.
+    setattr(fieldfile.instance, fieldfile.field.attname, name)
+    return name
+
+
+# ------------------------------ ORPHAN CLEANUP --------------------------------
+def reference_counts():
+    """Storage name -> number of rows referencing it, across every upload field."""
+    counts = {}
+    for model, fields in ((Candidates, DOCUMENT_FIELDS + ("cv",)), (Agents, ("photo",))):
+        for row in model.objects.values_list(*fields).iterator(chunk_size=5000):
+            for name in row:
+                if name:
+                    counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def upload_dirs():
+    dirs = {settings.INGEST_DOCUMENT_DIR}
+    for model in (Candidates, Agents):
+        for field in model._meta.concrete_fields:
+            upload_to = getattr(field, "upload_to", None)
+            if upload_to and isinstance(upload_to, str):
+                dirs.add(upload_to.strip("/"))
+    return sorted(dirs)
+
+
+def _walk(storage, directory):
+    try:
+        subdirs, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f"{directory}/{name}"
+    for subdir in subdirs:
+        yield from _walk(storage, f"{directory}/{subdir}")
+
+
+def find_orphans(storage, grace_seconds=3600):
+    """Yield ``(name, size)`` of upload files no row references.
+
+    A derivative counts as referenced while its original is. Files newer
+    than ``grace_seconds`` are skipped, since their row may not be saved yet.
+    """
+    counts = reference_counts()
+    roots = {os.path.splitext(name)[0] for name in counts}
+    cutoff = time.time() - grace_seconds
+    for directory in upload_dirs():
+        for name in _walk(storage, directory):
+            if name in counts:
+                continue
+            derivative = DERIVATIVE_RE.match(name)
+            if derivative and derivative.group("root") in roots:
+                continue
+            path = storage.path(name)
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff:
+                continue
+            yield name, stat.st_size
@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.forms.models import ModelChoiceField, ModelChoiceIterator
+
+from .models import Agents, Countries, Jobs
+
+LOOKUPS_VERSION_KEY = "myapp:lookups:version"
+
+
+class Lookup:
+    """A reference table rendered as ``(pk, label)`` options."""
+
+    def __init__(self, queryset, *fields, label=str):
+        self.queryset = queryset
+        self.fields = fields
+        self.label = label
+
+    def load(self):
+        return tuple((row.pk, self.label(row)) for row in self.queryset.only("pk", *self.fields))
+
+
+LOOKUPS = {
+    "jobs": Lookup(Jobs.objects.order_by("pk"), "title", label=lambda job: job.title),
+    "open_jobs": Lookup(Jobs.objects.filter(status="open").order_by("-date_posted"), "title", "location"),
+    "countries": Lookup(Countries.objects.order_by("pk"), "name"),
+    "agents": Lookup(Agents.objects.order_by("pk"), "full_name"),
+}
+
+# Per-process copy of the latest version seen, so a hit costs one cache.get().
+_loaded = {}
+
+
+def version():
+    return cache.get_or_set(LOOKUPS_VERSION_KEY, time.time_ns, None)
+
+
+def options(name):
+    """The ``(pk, label)`` options of lookup ``name``, cached until invalidated.
+
+    Entries are keyed by the current version, so :func:`invalidate` (run
+    whenever a job, country or agent is saved or deleted) retires every list
+    at once. The version lives in the cache, which must therefore be shared
+    by every process (see ``CACHES``); a per-process cache such as
+    LocMemCache leaves the other workers on stale lists.
+    """
+    current = version()
+    loaded = _loaded.get(name)
+    if loaded is not None and loaded[0] == current:
+        return loaded[1]
+    key = f"myapp:lookups:{name}:{current}"
+    values = cache.get(key)
+    if values is None:
+        values = LOOKUPS[name].load()
+        cache.set(key, values, settings.LOOKUP_CACHE_TIMEOUT)
+    _loaded[name] = (current, values)
+    return values
+
+
+def invalidate():
+    cache.set(LOOKUPS_VERSION_KEY, time.time_ns(), None)
+
+
+class LookupChoiceIterator(ModelChoiceIterator):
+    """Yields the cached options instead of iterating the field's queryset."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from options(self.field.lookup)
+
+    def __len__(self):
+        return len(options(self.field.lookup)) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(options(self.field.lookup))
+
+
+class LookupChoiceField(ModelChoiceField):
+    """ModelChoiceField rendered from a cached lookup; submitted values are still checked against the table."""
+
+    iterator = LookupChoiceIterator
+
+    def __init__(self, lookup, **kwargs):
+        self.lookup = lookup
+        super().__init__(queryset=LOOKUPS[lookup].queryset, **kwargs)
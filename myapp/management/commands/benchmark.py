@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from myapp.benchmarks import SCENARIOS, compare, run_suite, startup_profile
+from myapp.seeding import parse_scale
+
+
+class Command(BaseCommand):
+    help = "Time the hot views against freshly seeded test databases and write the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1k,10k",
+                            help="Comma-separated dataset sizes, e.g. 1k,10k,100k (default: 1k,10k).")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario (default: 5).")
+        parser.add_argument("--scenarios", help="Comma-separated scenario names (default: all).")
+        parser.add_argument("--images", action="store_true", help="Seed candidates with document images.")
+        parser.add_argument("--output", help="Results file (default: cache/benchmarks/<timestamp>-<commit>.json).")
+        parser.add_argument("--compare", help="Earlier results file to print median changes against.")
+        parser.add_argument("--startup", action="store_true",
+                            help="Only measure worker start-up (import time and RSS); no database needed.")
+
+    def write_startup(self, startup, previous=None):
+        line = f"Worker start-up: {startup['boot_ms']:.0f} ms, {startup['rss_mb']:.1f} MB RSS"
+        if previous:
+            line += f" (was {previous['boot_ms']:.0f} ms, {previous['rss_mb']:.1f} MB)"
+        self.stdout.write(line)
+        if startup["heavy_modules"]:
+            self.stdout.write(self.style.WARNING(f"  loaded at boot: {', '.join(startup['heavy_modules'])}"))
+        for entry in startup["top_imports"]:
+            self.stdout.write(f"  {entry['ms']:>8.1f} ms  {entry['module']}")
+
+    def handle(self, *args, **options):
+        previous = None
+        if options["compare"]:
+            previous = json.loads(Path(options["compare"]).read_text())
+        if options["startup"]:
+            self.write_startup(startup_profile(), previous and previous.get("startup"))
+            return
+
+        try:
+            sizes = [parse_scale(value) for value in options["sizes"].split(",") if value.strip()]
+        except ValueError:
+            raise CommandError(f"Invalid sizes: {options['sizes']!r}")
+        names = None
+        if options["scenarios"]:
+            names = {name.strip() for name in options["scenarios"].split(",")}
+            unknown = names - {scenario.name for scenario in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        def progress(result):
+            self.stdout.write(
+                f"{result['size']:>8}  {result['scenario']:<24} {result['median_ms']:>10.1f} ms"
+                f"  {result['queries']:>4} queries  {result['bytes']:>10} bytes  [{result['status']}]"
+            )
+
+        # Never touch the configured database: seed and measure a throwaway test database.
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_suite(sizes, repeat=options["repeat"], names=names, images=options["images"],
+                               progress=progress)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.write_startup(report["startup"], previous and previous.get("startup"))
+        output = options["output"]
+        if not output:
+            stamp = report["created"][:19].replace(":", "").replace("-", "")
+            output = Path(settings.BASE_DIR) / "cache" / "benchmarks" / f"{stamp}-{(report['commit'] or 'nogit')[:10]}.json"
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if previous:
+            for scenario, size, old, new, change, queries in compare(report, previous):
+                self.stdout.write(
+                    f"{size:>8}  {scenario:<24} {old:>10.1f} -> {new:>10.1f} ms ({change:+.1f}%)"
+                    f"  queries {queries:+d}"
+                )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from myapp.cv_batch import stream_cv_zip
+from myapp.filters import filter_candidates
+from myapp.models import Candidates
+
+
+class Command(BaseCommand):
+    help = "Render the CVs of a filtered candidate set into a ZIP archive using a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the ZIP file to write.")
+        parser.add_argument("--status")
+        parser.add_argument("--job", help="Job id.")
+        parser.add_argument("--country", help="Country id.")
+        parser.add_argument("--agent", help="Agent id.")
+        parser.add_argument("--ids", help="Comma-separated candidate ids.")
+        parser.add_argument("--format", choices=("pdf", "docx", "both"), default="pdf")
+        parser.add_argument("--workers", type=int, help="Process pool size (default CV_BATCH_WORKERS).")
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for name in ("status", "job", "country", "agent"):
+            if options[name]:
+                params[name] = options[name]
+        candidates = filter_candidates(Candidates.objects.order_by("pk"), params)
+        if options["ids"]:
+            candidates = candidates.filter(pk__in=[int(pk) for pk in options["ids"].split(",")])
+
+        candidate_ids = list(candidates.values_list("pk", flat=True))
+        if not candidate_ids:
+            raise CommandError("No candidates match the given filters.")
+
+        kinds = ("pdf", "docx") if options["format"] == "both" else (options["format"],)
+        with open(options["output"], "wb") as output:
+            for chunk in stream_cv_zip(candidate_ids, kinds, workers=options["workers"]):
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(candidate_ids)} candidate CV(s) to {options['output']}."
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from myapp.models import Candidates
+from myapp.thumbnails import DOCUMENT_FIELDS, generate_for_candidate
+
+
+class Command(BaseCommand):
+    help = "Backfill thumbnail and medium derivatives for candidate document images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild derivatives that already exist.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        has_image = Q()
+        for field in DOCUMENT_FIELDS:
+            has_image |= ~Q(**{field: ""}) & Q(**{f"{field}__isnull": False})
+
+        candidates = (
+            Candidates.objects.filter(has_image)
+            .only("id", *DOCUMENT_FIELDS)
+            .order_by("pk")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+        written = 0
+        for count, candidate in enumerate(candidates, start=1):
+            written += generate_for_candidate(candidate, force=options["force"])
+            if count % options["chunk_size"] == 0:
+                self.stdout.write(f"{count} candidates scanned, {written} derivatives written")
+        self.stdout.write(self.style.SUCCESS(f"Done: {written} derivatives written."))
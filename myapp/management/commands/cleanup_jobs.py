@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from myapp import background
+
+
+class Command(BaseCommand):
+    help = "Delete finished background jobs older than JOB_RETENTION_DAYS and their files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Override JOB_RETENTION_DAYS.")
+
+    def handle(self, *args, **options):
+        count = background.cleanup(days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} job(s)."))
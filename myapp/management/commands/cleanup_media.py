@@ -0,0 +1,25 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from myapp.ingest import find_orphans
+
+
+class Command(BaseCommand):
+    help = "Delete upload files (and their derivatives) that no candidate or agent references."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List orphans without deleting them.")
+        parser.add_argument("--grace-minutes", type=int, default=60,
+                            help="Leave files younger than this alone (uploads still being saved).")
+
+    def handle(self, *args, **options):
+        count = freed = 0
+        for name, size in find_orphans(default_storage, grace_seconds=options["grace_minutes"] * 60):
+            if options["dry_run"]:
+                self.stdout.write(name)
+            else:
+                default_storage.delete(name)
+            count += 1
+            freed += size
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {count} orphan file(s), {freed / 1024 / 1024:.1f} MB."))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from myapp.ingest import store_document
+from myapp.models import Candidates
+from myapp.thumbnails import DOCUMENT_FIELDS, generate_for_candidate
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompress document images uploaded before the ingest pipeline and move them to "
+        "content-hash names. Run cleanup_media afterwards to delete the old files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        prefix = f"{settings.INGEST_DOCUMENT_DIR}/"
+        legacy = Q()
+        for field in DOCUMENT_FIELDS:
+            legacy |= Q(**{f"{field}__gt": ""}) & ~Q(**{f"{field}__startswith": prefix})
+
+        candidates = Candidates.objects.filter(legacy).only("id", *DOCUMENT_FIELDS).order_by("pk")
+        batch, moved = [], 0
+        for candidate in candidates.iterator(chunk_size=options["chunk_size"]):
+            changed = []
+            for field in DOCUMENT_FIELDS:
+                fieldfile = getattr(candidate, field)
+                if not fieldfile or fieldfile.name.startswith(prefix):
+                    continue
+                try:
+                    with fieldfile.open("rb") as source:
+                        store_document(fieldfile, source)
+                except FileNotFoundError:
+                    self.stderr.write(f"Missing file for candidate {candidate.pk}: {fieldfile.name}")
+                    continue
+                changed.append(field)
+            if changed:
+                candidate.updated_at = timezone.now()
+                generate_for_candidate(candidate, changed)
+                batch.append(candidate)
+                moved += len(changed)
+            if len(batch) >= options["chunk_size"]:
+                self._flush(batch)
+        self._flush(batch)
+        self.stdout.write(self.style.SUCCESS(f"Compacted {moved} document(s)."))
+
+    def _flush(self, batch):
+        if batch:
+            Candidates.objects.bulk_update(batch, ["updated_at", *DOCUMENT_FIELDS])
+            batch.clear()
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.dedupe import check_candidates, find_all_duplicates
+
+
+class Command(BaseCommand):
+    help = "Score possible duplicate candidates and queue them for review."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, help="Minimum score to queue (default: DEDUPE_THRESHOLD).")
+        parser.add_argument("--ids", help="Comma-separated candidate ids to check instead of a full scan.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options["ids"]:
+            ids = [int(value) for value in options["ids"].split(",") if value.strip().isdigit()]
+            found = check_candidates(ids, threshold=options["threshold"])
+            summary = f"{len(ids)} candidate(s) checked"
+        else:
+            candidates, compared, found = find_all_duplicates(threshold=options["threshold"])
+            summary = f"{candidates} candidate(s), {compared} pair(s) compared"
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary}: {found} possible duplicate(s) queued in {elapsed:.1f}s."
+        ))
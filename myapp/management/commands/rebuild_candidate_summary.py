@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp import summary
+
+
+class Command(BaseCommand):
+    help = "Recompute the candidate analytics summary tables from the Candidates table."
+
+    def handle(self, *args, **options):
+        groups = summary.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {groups} summary group(s)."))
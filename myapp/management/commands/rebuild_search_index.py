@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from myapp import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the candidate full-text search index from the Candidates table."
+
+    def handle(self, *args, **options):
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} candidate(s)."))
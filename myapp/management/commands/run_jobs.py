@@ -0,0 +1,46 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from myapp import background
+
+
+class Command(BaseCommand):
+    help = ("Run queued background jobs (imports, exports, CV packs, duplicate checks). "
+            "Start one process per worker.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run until the queue is empty, then exit.")
+        parser.add_argument("--poll", type=float, help="Seconds to sleep when idle (default JOB_POLL_INTERVAL).")
+        parser.add_argument("--name", help="Worker name recorded on claimed jobs.")
+        parser.add_argument("--kind", action="append", dest="kinds", metavar="KIND",
+                            help="Only run jobs of this kind (repeatable), e.g. --kind dedupe.")
+
+    def handle(self, *args, **options):
+        poll = options["poll"] or settings.JOB_POLL_INTERVAL
+        worker = options["name"] or background.worker_name()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(f"Worker {worker} started.")
+        while not self.stopping:
+            close_old_connections()
+            background.requeue_stale()
+            job = background.claim_next(worker, kinds=options["kinds"])
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(poll)
+                continue
+            self.stdout.write(f"Running {job}")
+            job = background.run_job(job)
+            self.stdout.write(f"Finished {job}")
+        self.stdout.write(f"Worker {worker} stopped.")
+
+    def stop(self, signum, frame):
+        # Finish the current job, then exit the loop.
+        self.stopping = True
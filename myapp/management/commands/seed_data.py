@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.seeding import flush, parse_scale, seed
+
+
+class Command(BaseCommand):
+    help = "Add synthetic candidates, jobs, agents and countries for development and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("candidates", nargs="?",
+                            help="How many candidates to add, e.g. 1000, 10k or 100k "
+                                 "(default: 1k, or none with --flush).")
+        parser.add_argument("--images", action="store_true",
+                            help="Attach generated document images (a few shared files per field).")
+        parser.add_argument("--seed", type=int, help="Random seed, for repeatable data.")
+        parser.add_argument("--flush", action="store_true",
+                            help="Delete previously seeded rows first (real data is never touched).")
+
+    def handle(self, *args, **options):
+        if options["candidates"] is None:
+            options["candidates"] = "0" if options["flush"] else "1k"
+        try:
+            count = parse_scale(options["candidates"])
+        except ValueError:
+            raise CommandError(f"Invalid candidate count: {options['candidates']!r}")
+        if options["flush"]:
+            candidates, jobs, agents = flush()
+            self.stdout.write(f"Deleted {candidates} seeded candidate(s), {jobs} job(s), {agents} agent(s).")
+        if not count:
+            return
+
+        started = time.monotonic()
+
+        def progress(done, total):
+            self.stdout.write(f"  {done}/{total} candidates", ending="\r")
+
+        created = seed(count, images=options["images"], random_seed=options["seed"], progress=progress)
+        elapsed = time.monotonic() - started
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(f"Seeded {created} candidate(s) in {elapsed:.1f}s."))
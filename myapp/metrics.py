@@ -0,0 +1,202 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .tokens import has_bearer_token
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+
+# Metric name -> (help text, buckets).
+HISTOGRAMS = {
+    "myapp_request_duration_seconds": ("Time to produce the response (streamed bodies excluded).", DURATION_BUCKETS),
+    "myapp_request_db_queries": ("SQL queries executed per request.", COUNT_BUCKETS),
+    "myapp_request_db_seconds": ("Time spent in SQL per request.", DURATION_BUCKETS),
+    "myapp_request_template_seconds": ("Time spent rendering templates per request.", DURATION_BUCKETS),
+    "myapp_response_size_bytes": ("Response body size, when known up front.", SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus exposes it."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """In-process metrics, keyed by URL name. Each server process has its own."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (metric, view) -> Histogram
+        self.responses = {}  # (view, status) -> count
+
+    def record(self, view, status, observations):
+        with self.lock:
+            self.responses[view, status] = self.responses.get((view, status), 0) + 1
+            for metric, value in observations.items():
+                histogram = self.histograms.get((metric, view))
+                if histogram is None:
+                    histogram = self.histograms[metric, view] = Histogram(HISTOGRAMS[metric][1])
+                histogram.observe(value)
+
+    def exposition(self):
+        """The metrics in the Prometheus text format (version 0.0.4)."""
+        lines = [
+            "# HELP myapp_responses_total Responses by URL name and status code.",
+            "# TYPE myapp_responses_total counter",
+        ]
+        with self.lock:
+            for (view, status), count in sorted(self.responses.items()):
+                lines.append(f'myapp_responses_total{{view="{_label(view)}",status="{status}"}} {count}')
+            for metric, (help_text, _) in HISTOGRAMS.items():
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for (name, view), histogram in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    labels = f'view="{_label(view)}"'
+                    for bound, total in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {total}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+# ------------------------------ PER-REQUEST STATS -------------------------------
+class RequestStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.slowest = []  # min-heap of (duration, sequence, sql), at most METRICS_SLOW_SQL_LIMIT
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        entry = (duration, self.queries, sql)
+        if len(self.slowest) < settings.METRICS_SLOW_SQL_LIMIT:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+# Set by MetricsMiddleware; copied into the threads sync_to_async runs views in.
+current_request = ContextVar("myapp_request_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current_request.get()
+        if stats is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render for the metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def finish_request(request, response, stats):
+    """Record ``stats`` under the request's URL name and log it if slow."""
+    duration = time.perf_counter() - stats.start
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match else "<unmatched>"
+    observations = {
+        "myapp_request_duration_seconds": duration,
+        "myapp_request_db_queries": stats.queries,
+        "myapp_request_db_seconds": stats.db_time,
+        "myapp_request_template_seconds": stats.template_time,
+    }
+    if not response.streaming:
+        observations["myapp_response_size_bytes"] = len(response.content)
+    elif response.has_header("Content-Length"):
+        observations["myapp_response_size_bytes"] = int(response["Content-Length"])
+    registry.record(view, response.status_code, observations)
+
+    if duration >= settings.METRICS_SLOW_REQUEST_SECONDS:
+        slowest = "".join(
+            f"\n  {seconds * 1000:.1f}ms  {sql}" for seconds, _, sql in sorted(stats.slowest, reverse=True)
+        )
+        logger.warning(
+            "Slow request %s %s (%s): %.3fs, %d queries in %.3fs, templates %.3fs. Slowest SQL:%s",
+            request.method, request.path, view, duration, stats.queries, stats.db_time,
+            stats.template_time, slowest or " none",
+        )
+
+
+# ------------------------------ /metrics ----------------------------------------
+def metrics_view(request):
+    """Prometheus scrape target: staff sessions, or a bearer token from ``METRICS_TOKENS``."""
+    if not (request.user.is_staff or has_bearer_token(request, settings.METRICS_TOKENS)):
+        response = HttpResponse("Staff only.\n", status=403, content_type="text/plain")
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+    response = HttpResponse(registry.exposition(), content_type="text/plain; version=0.0.4; charset=utf-8")
+    response["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,147 @@
+import cProfile
+import random
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import profiling
+from .metrics import RequestStats, current_request, finish_request
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that can sit in an async middleware chain.
+
+    Stock WhiteNoise is sync-only, so under ASGI Django would run every
+    request below it (async views included) in a worker thread. Here static
+    hits are served from a thread and everything else is awaited directly.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Time each request and count its SQL, for ``myapp.metrics``.
+
+    Queries and template renders are attributed to the request through a
+    context variable, so this works the same for sync and async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        finish_request(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        finish_request(request, response, stats)
+        return response
+
+
+class ProfilingMiddleware:
+    """Run selected requests under cProfile and keep the result (see ``myapp.profiling``).
+
+    Staff trigger it with ``?_profile=1`` or an ``X-Profile: 1`` header;
+    ``PROFILE_SAMPLE_RATE`` additionally profiles that fraction of all
+    requests. The capture id is returned in the ``X-Profile-Id`` header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def flagged(request):
+        return request.GET.get("_profile") == "1" or request.headers.get("X-Profile") == "1"
+
+    @staticmethod
+    def sampled():
+        return random.random() < settings.PROFILE_SAMPLE_RATE
+
+    def profile(self, get_response, request, user):
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - start
+        response["X-Profile-Id"] = profiling.save_capture(profiler, request, response, duration, user)
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        flagged, sampled = self.flagged(request), self.sampled()
+        # The user is only loaded once profiling is actually on the table.
+        if not (sampled or (flagged and request.user.is_staff)):
+            return self.get_response(request)
+        return self.profile(self.get_response, request, request.user)
+
+    async def __acall__(self, request):
+        flagged, sampled = self.flagged(request), self.sampled()
+        if not (flagged or sampled):
+            return await self.get_response(request)
+        user = await request.auser()
+        if not (sampled or user.is_staff):
+            return await self.get_response(request)
+        # cProfile only sees its own thread. Driving the handler from a worker thread
+        # makes the view's thread-sensitive sync_to_async calls run back on that
+        # thread, so the blocking work (ORM, CV builds, imports) is in the profile.
+        return await sync_to_async(self.profile, thread_sensitive=False)(
+            async_to_sync(self.get_response), request, user,
+        )
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from myapp import search
+
+
+def create_search_index(apps, schema_editor):
+    search.create_index(schema_editor)
+    search.populate_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    search.drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_backgroundjob'),
+    ]
+
+    operations = [
+        # SQLite gets an FTS5 virtual table, Postgres a tsvector table with a
+        # GIN index; other backends fall back to LIKE scans in myapp.search.
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
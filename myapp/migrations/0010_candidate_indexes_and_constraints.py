@@ -0,0 +1,93 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# Candidate field -> value that frees the number under the unique constraints.
+CLEARED = {'passport_number': None, 'nin_number': ''}
+
+
+def set_aside_duplicates(apps, schema_editor):
+    """Move every duplicate passport/NIN number to SetAsideNumber, except on the oldest holder.
+
+    The numbers themselves are left untouched on the oldest candidate and
+    stored verbatim for the others, so nothing is altered or lost.
+    Migration 0014 queues every such pair for duplicate review.
+    """
+    Candidates = apps.get_model('myapp', 'Candidates')
+    SetAsideNumber = apps.get_model('myapp', 'SetAsideNumber')
+    for field, cleared in CLEARED.items():
+        duplicates = (
+            Candidates.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            .values(field).annotate(count=Count('pk')).filter(count__gt=1)
+            .values_list(field, flat=True)
+        )
+        for value in list(duplicates):
+            kept, *others = Candidates.objects.filter(**{field: value}).order_by('pk').values_list('pk', flat=True)
+            SetAsideNumber.objects.bulk_create([
+                SetAsideNumber(candidate_id=pk, field=field, value=value, kept_by_id=kept) for pk in others
+            ])
+            Candidates.objects.filter(pk__in=others).update(**{field: cleared})
+
+
+def restore_set_aside(apps, schema_editor):
+    """Put every number still set aside back on its candidate (the constraints are gone by now)."""
+    Candidates = apps.get_model('myapp', 'Candidates')
+    SetAsideNumber = apps.get_model('myapp', 'SetAsideNumber')
+    for number in SetAsideNumber.objects.all():
+        Candidates.objects.filter(pk=number.candidate_id).update(**{number.field: number.value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_candidate_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SetAsideNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('passport_number', 'Passport number'), ('nin_number', 'NIN number')], max_length=20)),
+                ('value', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='set_aside_numbers', to='myapp.candidates')),
+                ('kept_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='myapp.candidates')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('candidate', 'field'), name='setasidenumber_unique_field')],
+            },
+        ),
+        migrations.RunPython(set_aside_duplicates, restore_set_aside),
+        migrations.AddIndex(
+            model_name='candidates',
+            index=models.Index(fields=['passport_number'], name='candidate_passport_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidates',
+            index=models.Index(fields=['nin_number'], name='candidate_nin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidates',
+            index=models.Index(fields=['candidate_status'], name='candidate_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidates',
+            index=models.Index(fields=['gender'], name='candidate_gender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidates',
+            index=models.Index(fields=['marital_status'], name='candidate_marital_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='candidates',
+            constraint=models.UniqueConstraint(condition=models.Q(('passport_number__isnull', False), models.Q(('passport_number', ''), _negated=True)), fields=('passport_number',), name='candidate_unique_passport', violation_error_message='A candidate with this passport number already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='candidates',
+            constraint=models.UniqueConstraint(condition=models.Q(('nin_number', ''), _negated=True), fields=('nin_number',), name='candidate_unique_nin', violation_error_message='A candidate with this NIN number already exists.'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_candidate_indexes_and_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='kind',
+            field=models.CharField(choices=[('import_excel', 'Excel import'), ('export_excel', 'Candidate export'), ('cv_pack', 'CV pack'), ('dedupe', 'Duplicate check')], max_length=30),
+        ),
+        migrations.CreateModel(
+            name='CandidateBlockKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=40)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='block_keys', to='myapp.candidates')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DuplicateMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('reasons', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('duplicate', 'Same person'), ('distinct', 'Different people')], default='pending', max_length=20)),
+                ('source', models.CharField(choices=[('engine', 'Duplicate scan'), ('migration', 'Migration 0010')], default='engine', max_length=20)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('candidate_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='myapp.candidates')),
+                ('candidate_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='myapp.candidates')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score', 'pk'],
+                'indexes': [models.Index(fields=['status', '-score'], name='duplicatematch_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('candidate_a', 'candidate_b'), name='duplicatematch_unique_pair')],
+            },
+        ),
+    ]
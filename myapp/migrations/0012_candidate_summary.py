@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:39
+
+from django.db import migrations, models
+
+
+def build_summary(apps, schema_editor):
+    from myapp.summary import summary_rows
+
+    Candidates = apps.get_model('myapp', 'Candidates')
+    CandidateSummary = apps.get_model('myapp', 'CandidateSummary')
+    CandidateSummary.objects.bulk_create(
+        CandidateSummary(dimension=dimension, value=value, candidate_status=status, count=count)
+        for dimension, value, status, count in summary_rows(Candidates.objects.all())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_duplicate_matches'),
+    ]
+
+    operations = [
+        # Added without auto_now_add first: the schema editor would fill every
+        # existing row with the migration time, which is not their registration date.
+        migrations.AddField(
+            model_name='candidates',
+            name='created_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='candidates',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='CandidateSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('all', 'All candidates'), ('job', 'Job applied'), ('country', 'Destination country'), ('agent', 'Agent'), ('month', 'Registration month')], max_length=10)),
+                ('value', models.CharField(blank=True, max_length=20)),
+                ('candidate_status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'value', 'candidate_status'), name='candidatesummary_unique_group')],
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_candidate_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidates',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='candidates',
+            index=models.Index(fields=['updated_at'], name='candidate_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+LABELS = {'passport_number': 'passport number', 'nin_number': 'NIN number'}
+
+
+def queue_set_aside_duplicates(apps, schema_editor):
+    """Put every candidate whose number 0010 set aside into the duplicate review queue."""
+    SetAsideNumber = apps.get_model('myapp', 'SetAsideNumber')
+    DuplicateMatch = apps.get_model('myapp', 'DuplicateMatch')
+    matches = {}
+    for number in SetAsideNumber.objects.exclude(kept_by=None).order_by('pk'):
+        pair = (min(number.candidate_id, number.kept_by_id), max(number.candidate_id, number.kept_by_id))
+        matches.setdefault(pair, []).append(f'same {LABELS[number.field]} {number.value} (set aside by migration 0010)')
+    DuplicateMatch.objects.bulk_create(
+        [DuplicateMatch(candidate_a_id=a, candidate_b_id=b, score=1.0, reasons='; '.join(reasons)[:255],
+                        source='migration')
+         for (a, b), reasons in matches.items()],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_candidate_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_set_aside_duplicates, migrations.RunPython.noop),
+    ]
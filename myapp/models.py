@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.utils import timezone
 from datetime import date
 
 
@@ -124,6 +127,34 @@ class Candidates(models.Model):
     medical_copy = models.ImageField(upload_to='medical_copies/', blank=True, null=True)
     interpol = models.ImageField(upload_to='interpol/', blank=True, null=True)
 
+    # Registration; NULL for candidates registered before migration 0012
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)  # set explicitly by bulk_update callers
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['passport_number'], name='candidate_passport_idx'),
+            models.Index(fields=['nin_number'], name='candidate_nin_idx'),
+            models.Index(fields=['candidate_status'], name='candidate_status_idx'),
+            models.Index(fields=['gender'], name='candidate_gender_idx'),
+            models.Index(fields=['marital_status'], name='candidate_marital_status_idx'),
+            models.Index(fields=['updated_at'], name='candidate_updated_at_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['passport_number'],
+                condition=models.Q(passport_number__isnull=False) & ~models.Q(passport_number=''),
+                name='candidate_unique_passport',
+                violation_error_message='A candidate with this passport number already exists.',
+            ),
+            models.UniqueConstraint(
+                fields=['nin_number'],
+                condition=~models.Q(nin_number=''),
+                name='candidate_unique_nin',
+                violation_error_message='A candidate with this NIN number already exists.',
+            ),
+        ]
+
     # Automatic Age Calculation
     @property
     def age(self):
@@ -141,3 +172,192 @@ class Candidates(models.Model):
     def __str__(self):
         job_title = self.job_applied.title if self.job_applied else "No Job"
         return f"{self.full_name} - {job_title}"
+
+
+def job_files_storage():
+    """Private storage for job inputs and results (never served from MEDIA_URL)."""
+    return FileSystemStorage(location=settings.JOB_FILES_ROOT)
+
+
+class BackgroundJob(models.Model):
+    """A unit of deferred work (import, export, CV pack) run by ``manage.py run_jobs``."""
+
+    KIND_CHOICES = [
+        ('import_excel', 'Excel import'),
+        ('export_excel', 'Candidate export'),
+        ('cv_pack', 'CV pack'),
+        ('dedupe', 'Duplicate check'),
+    ]
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    params = models.JSONField(default=dict, blank=True)
+    input_file = models.FileField(upload_to='input/', storage=job_files_storage, blank=True, null=True)
+    result_file = models.FileField(upload_to='results/', storage=job_files_storage, blank=True, null=True)
+    result = models.JSONField(default=dict, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='backgroundjob_claim_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
+class CandidateBlockKey(models.Model):
+    """A blocking key of a candidate; only candidates sharing a key are compared for duplicates."""
+
+    candidate = models.ForeignKey(Candidates, on_delete=models.CASCADE, related_name='block_keys')
+    key = models.CharField(max_length=40, db_index=True)
+
+    def __str__(self):
+        return f"{self.candidate_id}: {self.key}"
+
+
+class SetAsideNumber(models.Model):
+    """A passport or NIN number taken off a candidate because an older candidate holds it.
+
+    Migration 0010 moves such numbers here so the unique constraints can be
+    added, and 0014 queues each pair for duplicate review. Resolving the
+    match puts the number back (``DuplicateMatch.restore_set_aside_numbers``).
+    """
+
+    FIELD_CHOICES = [
+        ('passport_number', 'Passport number'),
+        ('nin_number', 'NIN number'),
+    ]
+
+    candidate = models.ForeignKey(Candidates, on_delete=models.CASCADE, related_name='set_aside_numbers')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    value = models.CharField(max_length=20)
+    # The older candidate that kept the number.
+    kept_by = models.ForeignKey(Candidates, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'field'], name='setasidenumber_unique_field'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_field_display()} {self.value} of candidate {self.candidate_id}"
+
+
+class DuplicateMatch(models.Model):
+    """A pair of candidates that look like the same person, waiting for review."""
+
+    PENDING = 'pending'
+    DUPLICATE = 'duplicate'
+    DISTINCT = 'distinct'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending review'),
+        (DUPLICATE, 'Same person'),
+        (DISTINCT, 'Different people'),
+    ]
+    ENGINE = 'engine'
+    MIGRATION = 'migration'
+    SOURCE_CHOICES = [
+        (ENGINE, 'Duplicate scan'),
+        (MIGRATION, 'Migration 0010'),
+    ]
+
+    # Always stored with candidate_a_id < candidate_b_id.
+    candidate_a = models.ForeignKey(Candidates, on_delete=models.CASCADE, related_name='+')
+    candidate_b = models.ForeignKey(Candidates, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    reasons = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    # Scans only replace the pending pairs they queued themselves.
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=ENGINE)
+    reviewed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    reviewed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-score', 'pk']
+        constraints = [
+            models.UniqueConstraint(fields=['candidate_a', 'candidate_b'], name='duplicatematch_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['status', '-score'], name='duplicatematch_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_a_id} ~ {self.candidate_b_id} ({self.score:.2f})"
+
+    def restore_set_aside_numbers(self):
+        """Give this pair back the numbers migration 0010 set aside, where that is now possible.
+
+        A number goes back when its candidate has no number in that field and
+        no other candidate holds it. Returns the ``SetAsideNumber`` rows that
+        are still set aside.
+        """
+        still_set_aside = []
+        pair = (self.candidate_a_id, self.candidate_b_id)
+        for number in SetAsideNumber.objects.filter(candidate_id__in=pair).select_related('candidate'):
+            candidate = number.candidate
+            taken = Candidates.objects.filter(**{number.field: number.value}).exclude(pk=candidate.pk).exists()
+            if getattr(candidate, number.field) or taken:
+                still_set_aside.append(number)
+                continue
+            setattr(candidate, number.field, number.value)
+            candidate.save(update_fields=[number.field, 'updated_at'])
+            number.delete()
+        return still_set_aside
+
+
+class CandidateSummary(models.Model):
+    """Candidate counts per (dimension value, status), kept current by ``myapp.summary``."""
+
+    DIMENSION_CHOICES = [
+        ('all', 'All candidates'),
+        ('job', 'Job applied'),
+        ('country', 'Destination country'),
+        ('agent', 'Agent'),
+        ('month', 'Registration month'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    value = models.CharField(max_length=20, blank=True)  # related pk or YYYY-MM; '' when unset
+    candidate_status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'value', 'candidate_status'], name='candidatesummary_unique_group',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.value or '-'} {self.candidate_status}: {self.count}"
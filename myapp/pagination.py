@@ -0,0 +1,81 @@
+from django.conf import settings
+
+
+def parse_page_size(value, default=None, maximum=None):
+    """Clamp a ``page_size`` query value to ``1..maximum``."""
+    default = default or settings.CANDIDATES_PAGE_SIZE
+    maximum = maximum or settings.CANDIDATES_MAX_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def parse_cursor(value):
+    """Return a positive primary key cursor, or None."""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+class KeysetPage:
+    """One page of a queryset paginated on its primary key.
+
+    Each page is a single indexed ``WHERE pk > cursor ORDER BY pk LIMIT n+1``
+    query, so its cost does not depend on how deep into the table it is.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _row_pk(row):
+    # ``values()`` rows are dicts that always carry "id".
+    return row["id"] if isinstance(row, dict) else row.pk
+
+
+def keyset_paginate(queryset, page_size, after=None, before=None):
+    """Return the page after (or before) the given primary key cursor.
+
+    Works on model and ``values()`` querysets alike.
+    """
+    if before is not None:
+        rows = list(queryset.filter(pk__lt=before).order_by("-pk")[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=_row_pk(rows[-1]) if rows else None,
+            previous_cursor=_row_pk(rows[0]) if rows and has_more else None,
+        )
+
+    queryset = queryset.order_by("pk")
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return KeysetPage(
+        rows,
+        next_cursor=_row_pk(rows[-1]) if rows and has_more else None,
+        previous_cursor=_row_pk(rows[0]) if rows and after is not None else None,
+    )
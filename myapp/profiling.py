@@ -0,0 +1,166 @@
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+
+# Capture files: <id>.json (metadata), <id>.prof (pstats dump), <id>.txt (collapsed stacks).
+CAPTURE_ID_RE = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{8}$")
+CAPTURE_FILES = {"prof": "application/octet-stream", "txt": "text/plain; charset=utf-8"}
+MAX_STACK_DEPTH = 200
+MIN_SHARE_DIVISOR = 10_000
+
+
+def profile_dir():
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# ------------------------------ COLLAPSED STACKS --------------------------------
+def _frame_name(func):
+    filename, line, name = func
+    if filename == "~":  # built-in
+        return name.strip("<>")
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats):
+    """``stack;frames value`` lines (microseconds) for flamegraph.pl / speedscope.
+
+    cProfile only records caller -> callee edges, so each function's self
+    time is split across the paths into it in proportion to the time each
+    caller spent in it. Recursion is cut where a function reappears on the
+    path, and paths worth less than 1/``MIN_SHARE_DIVISOR`` of the total
+    are dropped to keep the walk bounded. Recursive edges overstate the
+    time through them, so a function is never given more than its self time.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    totals = {func: entry[3] for func, entry in stats.stats.items()}
+    # A root was entered from a frame that started before the profiler did; that
+    # call has no caller edge. Middleware recursion (inner -> __call__ -> inner)
+    # gives the outermost function profiled callers as well, so compare counts.
+    roots = [
+        func for func, (_, calls, _, _, callers) in stats.stats.items()
+        if calls > sum(edge[1] for edge in callers.values())
+    ]
+    min_time = sum(totals[func] for func in roots) / MIN_SHARE_DIVISOR
+    lines = {}  # stack -> (function, seconds)
+    attributed = {}
+    on_path = set()
+
+    def walk(func, path, share, depth):
+        stack = f"{path};{_frame_name(func)}" if path else _frame_name(func)
+        own = stats.stats[func][2] * share
+        if own:
+            lines[stack] = (func, lines.get(stack, (func, 0))[1] + own)
+            attributed[func] = attributed.get(func, 0) + own
+        if depth >= MAX_STACK_DEPTH:
+            return
+        on_path.add(func)
+        for callee, edge_time in callees.get(func, ()):
+            if callee in on_path or not totals[callee]:
+                continue
+            callee_share = share * edge_time / totals[callee]
+            if totals[callee] * callee_share >= min_time:
+                walk(callee, stack, callee_share, depth + 1)
+        on_path.discard(func)
+
+    for func in roots:
+        walk(func, "", 1.0, 1)
+    output = []
+    for stack, (func, seconds) in sorted(lines.items()):
+        value = int(seconds * min(1.0, stats.stats[func][2] / attributed[func]) * 1_000_000)
+        if value:
+            output.append(f"{stack} {value}\n")
+    return "".join(output)
+
+
+# ------------------------------ RING BUFFER -------------------------------------
+def save_capture(profiler, request, response, duration, user):
+    """Write one capture and drop the oldest beyond ``PROFILE_MAX_CAPTURES``; returns its id."""
+    capture_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    directory = profile_dir()
+    profiler.dump_stats(directory / f"{capture_id}.prof")
+    stats = pstats.Stats(profiler)
+    (directory / f"{capture_id}.txt").write_text(collapsed_stacks(stats))
+    match = getattr(request, "resolver_match", None)
+    meta = {
+        "id": capture_id,
+        "view": match.view_name if match else "<unmatched>",
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "duration": round(duration, 4),
+        "calls": stats.total_calls,
+        "user": user.get_username() if user is not None and user.is_authenticated else "",
+        "created": time.time(),
+    }
+    (directory / f"{capture_id}.json").write_text(json.dumps(meta))
+    prune()
+    return capture_id
+
+
+def _capture_metas():
+    """Metadata files, newest first; ids only order captures to the second."""
+    metas = []
+    for path in profile_dir().glob("*.json"):
+        try:
+            metas.append((path.stat().st_mtime_ns, path.name, path))
+        except FileNotFoundError:  # rotated out by another process
+            continue
+    return [path for *_, path in sorted(metas, reverse=True)]
+
+
+def prune(keep=None):
+    keep = settings.PROFILE_MAX_CAPTURES if keep is None else keep
+    for meta in _capture_metas()[keep:]:
+        for extension in ("json", *CAPTURE_FILES):
+            meta.with_suffix(f".{extension}").unlink(missing_ok=True)
+
+
+def list_captures():
+    captures = []
+    for path in _capture_metas():
+        try:
+            captures.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return captures
+
+
+# ------------------------------ ADMIN PAGES -------------------------------------
+def captures_view(request):
+    """Recent captures, newest first, for the admin (wrapped in ``admin.site.admin_view``)."""
+    captures = list_captures()
+    for capture in captures:
+        capture["created_at"] = datetime.fromtimestamp(capture["created"], tz=timezone.utc)
+    context = {
+        **admin.site.each_context(request),
+        "title": "Profiler captures",
+        "captures": captures,
+        "sample_rate": settings.PROFILE_SAMPLE_RATE,
+        "max_captures": settings.PROFILE_MAX_CAPTURES,
+    }
+    return TemplateResponse(request, "admin/profile_captures.html", context)
+
+
+def capture_file(request, capture_id, kind):
+    if not CAPTURE_ID_RE.match(capture_id) or kind not in CAPTURE_FILES:
+        raise Http404("Unknown capture.")
+    path = profile_dir() / f"{capture_id}.{kind}"
+    if not path.exists():
+        raise Http404("Capture has been rotated out.")
+    return FileResponse(path.open("rb"), as_attachment=kind == "prof", filename=path.name,
+                        content_type=CAPTURE_FILES[kind])
@@ -0,0 +1,179 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Candidates
+
+# Candidates columns covered by the full-text index.
+SEARCH_FIELDS = (
+    "full_name", "father_name", "mother_name", "next_of_kin_name",
+    "nin_number", "father_nin", "mother_nin", "passport_number",
+    "phone_number", "father_tel", "mother_tel", "next_of_kin_contact",
+    "place_of_origin_district", "present_address_district",
+    "father_district", "mother_district",
+)
+
+SQLITE_TABLE = "myapp_candidate_fts"
+POSTGRES_TABLE = "myapp_candidate_search"
+INDEX_CHUNK_SIZE = 500
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# ------------------------------ SCHEMA ------------------------------------
+def _postgres_document():
+    return " || ' ' || ".join(f"coalesce({field}, '')" for field in SEARCH_FIELDS)
+
+
+def create_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        columns = ", ".join(SEARCH_FIELDS)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+            f"{columns}, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+            "candidate_id bigint PRIMARY KEY REFERENCES myapp_candidates(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_gin "
+            f"ON {POSTGRES_TABLE} USING GIN (document)"
+        )
+
+
+def populate_index(schema_editor):
+    """Index every existing candidate (used when the index is first created)."""
+    vendor = schema_editor.connection.vendor
+    columns = ", ".join(SEARCH_FIELDS)
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, {columns}) SELECT id, {columns} FROM myapp_candidates"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"INSERT INTO {POSTGRES_TABLE} (candidate_id, document) "
+            f"SELECT id, to_tsvector('simple', {_postgres_document()}) FROM myapp_candidates"
+        )
+
+
+def drop_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+def is_supported():
+    return connection.vendor in ("sqlite", "postgresql")
+
+
+# ------------------------------ INDEXING ----------------------------------
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), INDEX_CHUNK_SIZE):
+        yield ids[start:start + INDEX_CHUNK_SIZE]
+
+
+def index_candidates(candidate_ids):
+    """(Re)index the given candidates with one INSERT ... SELECT per chunk."""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(candidate_ids):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            if connection.vendor == "sqlite":
+                cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})", chunk)
+                cursor.execute(
+                    f"INSERT INTO {SQLITE_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                    f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM myapp_candidates "
+                    f"WHERE id IN ({placeholders})",
+                    chunk,
+                )
+            else:
+                cursor.execute(
+                    f"INSERT INTO {POSTGRES_TABLE} (candidate_id, document) "
+                    f"SELECT id, to_tsvector('simple', {_postgres_document()}) FROM myapp_candidates "
+                    f"WHERE id IN ({placeholders}) "
+                    "ON CONFLICT (candidate_id) DO UPDATE SET document = EXCLUDED.document",
+                    chunk,
+                )
+
+
+def remove_candidates(candidate_ids):
+    if not is_supported():
+        return
+    table, key = (SQLITE_TABLE, "rowid") if connection.vendor == "sqlite" else (POSTGRES_TABLE, "candidate_id")
+    with connection.cursor() as cursor:
+        for chunk in _chunks(candidate_ids):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({placeholders})", chunk)
+
+
+def rebuild_index():
+    """Rebuild the whole index from Candidates; returns the number of rows indexed."""
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SQLITE_TABLE if connection.vendor == 'sqlite' else POSTGRES_TABLE}")
+    ids = list(Candidates.objects.order_by("pk").values_list("pk", flat=True))
+    index_candidates(ids)
+    return len(ids)
+
+
+# ------------------------------ QUERYING ----------------------------------
+def search_tokens(query):
+    return TOKEN_RE.findall(query or "")[:10]
+
+
+def search_candidate_ids(query, limit, offset=0):
+    """Return candidate ids matching every term of ``query`` (prefix match), best first."""
+    tokens = search_tokens(query)
+    if not tokens:
+        return []
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{token}"*' for token in tokens)
+        sql = (
+            f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s "
+            f"ORDER BY bm25({SQLITE_TABLE}) LIMIT %s OFFSET %s"
+        )
+        params = [match, limit, offset]
+    elif connection.vendor == "postgresql":
+        sql = (
+            f"SELECT candidate_id FROM {POSTGRES_TABLE}, to_tsquery('simple', %s) AS query "
+            "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, candidate_id "
+            "LIMIT %s OFFSET %s"
+        )
+        params = [" & ".join(f"{token}:*" for token in tokens), limit, offset]
+    else:
+        # No full-text index on this backend: fall back to LIKE scans.
+        condition = Q()
+        for token in tokens:
+            term = Q()
+            for field in SEARCH_FIELDS:
+                term |= Q(**{f"{field}__icontains": token})
+            condition &= term
+        return list(
+            Candidates.objects.filter(condition).order_by("pk")
+            .values_list("pk", flat=True)[offset:offset + limit]
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_candidates(query, page_size, page=1, queryset=None):
+    """Ranked page of candidates for ``query``; returns ``(candidates, has_next)``."""
+    ids = search_candidate_ids(query, page_size + 1, (page - 1) * page_size)
+    has_next = len(ids) > page_size
+    ids = ids[:page_size]
+    queryset = queryset if queryset is not None else Candidates.objects.all()
+    by_id = queryset.in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id], has_next
@@ -0,0 +1,250 @@
+import random
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from PIL import Image, ImageDraw
+
+from . import cv_cache, search, summary
+from .ingest import content_name, normalize_image
+from .models import Agents, CandidateBlockKey, Candidates, Countries, DuplicateMatch, Jobs, SetAsideNumber
+from .signals import lookups_changed
+from .thumbnails import DOCUMENT_FIELDS
+
+# Synthetic rows are recognisable (and removable) by this email domain / job description.
+SEED_DOMAIN = "seed.invalid"
+SEED_JOB_DESCRIPTION = "Synthetic job created by seed_data."
+
+COUNTRIES = ("Saudi Arabia", "United Arab Emirates", "Qatar", "Oman", "Kuwait", "Bahrain", "Jordan", "Iraq")
+JOB_TITLES = (
+    "Housemaid", "Driver", "Security Guard", "Cleaner", "Waiter", "Cook", "Nurse Aide", "Nanny",
+    "Construction Worker", "Electrician", "Plumber", "Salesperson", "Cashier", "Warehouse Assistant",
+)
+FIRST_NAMES = (
+    "Aisha", "Brian", "Catherine", "Daniel", "Esther", "Fred", "Grace", "Hassan", "Irene", "Joseph",
+    "Kevin", "Lydia", "Moses", "Nakato", "Okello", "Patience", "Ruth", "Samuel", "Teddy", "Winnie",
+    "Babirye", "Kato", "Mukasa", "Nabirye", "Opio", "Akello", "Tumusiime", "Nansubuga", "Ssemanda",
+)
+SURNAMES = (
+    "Namutebi", "Okello", "Mugisha", "Nakato", "Ssali", "Atim", "Kizza", "Nalubega", "Byaruhanga",
+    "Achieng", "Wasswa", "Nambi", "Tumwine", "Lubega", "Kyomuhendo", "Ochieng", "Nassali", "Mutebi",
+)
+DISTRICTS = ("Kampala", "Wakiso", "Mukono", "Jinja", "Mbale", "Gulu", "Lira", "Mbarara", "Masaka", "Arua")
+TRIBES = ("Muganda", "Musoga", "Munyankole", "Acholi", "Langi", "Mugisu", "Itesot", "Lugbara")
+RELIGIONS = ("Catholic", "Anglican", "Muslim", "Pentecostal", "Seventh-day Adventist")
+MARITAL_STATUSES = ("Single", "Married", "Divorced", "Widowed")
+EDUCATION_LEVELS = ("PLE", "UCE", "UACE", "Certificate", "Diploma", "Bachelors")
+# Weighted so the status breakdowns look like a live pipeline.
+STATUSES = ("Pending",) * 6 + ("Approved",) * 3 + ("Travelled",)
+
+# Distinct images generated per document field when --images is used.
+IMAGE_VARIANTS = 8
+IMAGE_SIZES = {
+    "profile_picture": (600, 600),
+    "full_photo": (900, 1600),
+    "passport_copy": (1240, 1754),
+    "medical_copy": (1240, 1754),
+    "interpol": (1240, 1754),
+}
+
+
+def parse_scale(value):
+    """``"10k"`` -> 10000; plain integers pass through."""
+    value = str(value).strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        value, multiplier = value[:-1], 1000
+    elif value.endswith("m"):
+        value, multiplier = value[:-1], 1_000_000
+    return int(float(value) * multiplier)
+
+
+def _name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+
+
+def _phone(rng):
+    return f"07{rng.choice('0145678')}{rng.randrange(10 ** 7):07d}"
+
+
+def _job_title(index):
+    title = JOB_TITLES[index % len(JOB_TITLES)]
+    batch = index // len(JOB_TITLES)
+    return f"{title} {batch + 1}" if batch else title
+
+
+def seed_reference_data(candidates, rng):
+    """Countries, jobs (one per ~100 candidates) and agents (one per ~200)."""
+    for name in COUNTRIES:
+        Countries.objects.get_or_create(name=name)
+    countries = list(Countries.objects.values_list("pk", flat=True))
+
+    jobs_wanted = max(len(JOB_TITLES), candidates // 100)
+    existing_jobs = Jobs.objects.filter(description=SEED_JOB_DESCRIPTION).count()
+    today = date.today()
+    Jobs.objects.bulk_create([
+        Jobs(
+            title=_job_title(i),
+            description=SEED_JOB_DESCRIPTION,
+            location=rng.choice(COUNTRIES),
+            salary=rng.randrange(200, 1500, 50),
+            closing_date=today + timedelta(days=rng.randrange(10, 120)),
+            status="open" if rng.random() < 0.8 else "closed",
+        )
+        for i in range(existing_jobs, jobs_wanted)
+    ])
+
+    agents_wanted = max(5, candidates // 200)
+    existing_agents = Agents.objects.filter(email__endswith=f"@{SEED_DOMAIN}").count()
+    Agents.objects.bulk_create([
+        Agents(
+            full_name=f"{_name(rng)} Agency {i + 1}",
+            gender=rng.choice(("Male", "Female")),
+            phone_number=_phone(rng),
+            email=f"agent{i + 1}@{SEED_DOMAIN}",
+            address=f"Plot {rng.randrange(1, 300)}, {rng.choice(DISTRICTS)}",
+        )
+        for i in range(existing_agents, agents_wanted)
+    ])
+    lookups_changed()
+    jobs = list(Jobs.objects.filter(description=SEED_JOB_DESCRIPTION).values_list("pk", flat=True))
+    agents = list(Agents.objects.filter(email__endswith=f"@{SEED_DOMAIN}").values_list("pk", flat=True))
+    return jobs, countries, agents
+
+
+def generate_document_images(rng, variants=IMAGE_VARIANTS, storage=default_storage):
+    """Store a few scan-like JPEGs per document field; returns field -> storage names.
+
+    Images go through the same recompression and content-addressed naming
+    as real uploads, so re-seeding reuses the files already stored.
+    """
+    names = {}
+    for field in DOCUMENT_FIELDS:
+        width, height = IMAGE_SIZES[field]
+        names[field] = []
+        for variant in range(variants):
+            image = Image.new("RGB", (width, height), tuple(rng.randrange(150, 256) for _ in range(3)))
+            draw = ImageDraw.Draw(image)
+            for _ in range(40):
+                x, y = rng.randrange(width), rng.randrange(height)
+                draw.rectangle((x, y, x + rng.randrange(20, width // 2), y + rng.randrange(4, 30)),
+                               fill=tuple(rng.randrange(0, 120) for _ in range(3)))
+            draw.text((20, 20), f"{field.replace('_', ' ').upper()} #{variant + 1}", fill=(0, 0, 0))
+            buffer = BytesIO()
+            image.save(buffer, "JPEG", quality=90)
+            data = normalize_image(buffer)
+            name = content_name(data, ".jpg")
+            if not storage.exists(name):
+                storage.save(name, ContentFile(data))
+            names[field].append(name)
+    return names
+
+
+def build_candidate(number, rng, jobs, countries, agents, images=None):
+    gender = rng.choice(("Male", "Female"))
+    district = rng.choice(DISTRICTS)
+    candidate = Candidates(
+        candidate_status=rng.choice(STATUSES),
+        full_name=_name(rng),
+        gender=gender,
+        date_of_birth=date(1975, 1, 1) + timedelta(days=rng.randrange(365 * 28)),
+        phone_number=_phone(rng),
+        email=f"candidate{number}@{SEED_DOMAIN}",
+        religion=rng.choice(RELIGIONS),
+        marital_status=rng.choice(MARITAL_STATUSES),
+        no_of_children=rng.choice((0, 0, 1, 2, 3, 4)),
+        tribe=rng.choice(TRIBES),
+        clan=rng.choice(("Ngeye", "Mamba", "Nkima", "Ffumbe", "Lugave")),
+        nin_number=f"C{'M' if gender == 'Male' else 'F'}{number:012d}",
+        passport_number=f"S{number:08d}" if rng.random() < 0.85 else None,
+        working_experience=rng.choice(("", "2 years as a housekeeper", "Driver for 5 years", "Hotel cleaner")),
+        place_of_origin_district=rng.choice(DISTRICTS),
+        present_address_village=f"Village {rng.randrange(1, 50)}",
+        present_address_district=district,
+        next_of_kin_name=_name(rng),
+        next_of_kin_relationship=rng.choice(("Mother", "Father", "Sister", "Brother", "Spouse")),
+        next_of_kin_contact=_phone(rng),
+        next_of_kin_address=district,
+        education_level=rng.choice(EDUCATION_LEVELS),
+        job_applied_id=rng.choice(jobs),
+        job_location_id=rng.choice(countries),
+        referral_info_id=rng.choice(agents),
+    )
+    if images:
+        for field, names in images.items():
+            if rng.random() < 0.9:
+                setattr(candidate, field, rng.choice(names))
+    return candidate
+
+
+def seed(candidates, images=False, random_seed=None, batch_size=5000, progress=None):
+    """Add ``candidates`` synthetic candidates (plus jobs, agents, countries).
+
+    Numbering continues after any synthetic rows already present, so the
+    command can top a database up from 1k to 10k. Search index, summary
+    tables are rebuilt once at the end. Returns the number of
+    candidates created.
+    """
+    rng = random.Random(random_seed)
+    first = Candidates.objects.filter(email__endswith=f"@{SEED_DOMAIN}").count() + 1
+    total = first - 1 + candidates
+    jobs, countries, agents = seed_reference_data(total, rng)
+    image_names = generate_document_images(rng) if images else None
+
+    for start in range(first, first + candidates, batch_size):
+        stop = min(start + batch_size, first + candidates)
+        with transaction.atomic():
+            Candidates.objects.bulk_create(
+                [build_candidate(number, rng, jobs, countries, agents, image_names) for number in range(start, stop)],
+                batch_size=1000,
+            )
+        if progress:
+            progress(stop - first, candidates)
+
+    # Bulk inserts send no signals; refresh the derived data in one pass each.
+    summary.rebuild()
+    search.rebuild_index()
+    return candidates
+
+
+def _delete_rows(queryset):
+    """One ``DELETE ... WHERE pk IN (<queryset>)``, with no signals or cascade; returns the row count."""
+    model = queryset.model
+    select, params = queryset.values("pk").query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({select})", params,
+        )
+        return cursor.rowcount
+
+
+def flush():
+    """Delete every synthetic row; returns ``(candidates, jobs, agents)`` deleted.
+
+    Candidates go in one ``DELETE`` rather than through per-row signals;
+    the summary, search index and CV cache are brought up to date once,
+    afterwards.
+    """
+    seeded = Candidates.objects.filter(email__endswith=f"@{SEED_DOMAIN}")
+    with transaction.atomic():
+        candidate_ids = list(seeded.values_list("pk", flat=True))
+        # A plain DELETE skips the ORM cascade, so the dependent rows go first.
+        CandidateBlockKey.objects.filter(candidate__in=seeded).delete()
+        DuplicateMatch.objects.filter(Q(candidate_a__in=seeded) | Q(candidate_b__in=seeded)).delete()
+        SetAsideNumber.objects.filter(candidate__in=seeded).delete()
+        SetAsideNumber.objects.filter(kept_by__in=seeded).update(kept_by=None)
+        candidates = _delete_rows(seeded)
+        # Rebuilt before the jobs and agents go, so their delete signals find no counts to move.
+        summary.rebuild()
+        deleted = (
+            candidates,
+            Jobs.objects.filter(description=SEED_JOB_DESCRIPTION).delete()[0],
+            Agents.objects.filter(email__endswith=f"@{SEED_DOMAIN}").delete()[0],
+        )
+    search.rebuild_index()
+    cv_cache.invalidate_candidates(candidate_ids)
+    return deleted
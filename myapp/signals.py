@@ -0,0 +1,166 @@
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cv_cache, lookups, search, summary
+from .models import Agents, BackgroundJob, Candidates, Countries, Jobs
+
+logger = logging.getLogger(__name__)
+
+# What the duplicate check reads; only changes to these queue a check.
+DEDUPE_FIELDS = ("full_name", "date_of_birth", "phone_number", "nin_number", "passport_number")
+
+
+@receiver(pre_save, sender=Candidates)
+def candidate_saving(sender, instance, update_fields=None, **kwargs):
+    # Groups the stored row is counted in, so post_save can move the summary.
+    instance._summary_before = Counter() if instance._state.adding else summary.snapshot([instance.pk])
+    fields = DEDUPE_FIELDS if update_fields is None else [field for field in DEDUPE_FIELDS if field in update_fields]
+    if not instance._state.adding and fields:
+        instance._dedupe_before = Candidates.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Candidates)
+def candidate_saved(sender, instance, created, update_fields=None, **kwargs):
+    # With update_fields, unsaved in-memory values must not be counted.
+    after = summary.snapshot([instance.pk]) if update_fields else summary.instance_counts(instance)
+    summary.apply(getattr(instance, "_summary_before", Counter()), after)
+    before = instance.__dict__.pop("_dedupe_before", {})
+    changed = created or before is None or any(getattr(instance, field) != value for field, value in before.items())
+    _candidates_changed([instance.pk], created, dedupe_ids=[instance.pk] if changed else [])
+
+
+@receiver(pre_delete, sender=Candidates)
+def candidate_deleting(sender, instance, **kwargs):
+    # The in-memory instance may be stale; subtract what is actually stored.
+    instance._summary_before = summary.snapshot([instance.pk])
+
+
+@receiver(post_delete, sender=Candidates)
+def candidate_deleted(sender, instance, **kwargs):
+    summary.apply(getattr(instance, "_summary_before", Counter()), Counter())
+    search.remove_candidates([instance.pk])
+    _invalidate_on_commit([instance.pk])
+
+
+@receiver(pre_delete, sender=Jobs)
+def job_deleting(sender, instance, **kwargs):
+    _touch_candidates(job_applied=instance.pk)
+
+
+@receiver(pre_delete, sender=Countries)
+def country_deleting(sender, instance, **kwargs):
+    _touch_candidates(job_location=instance.pk)
+
+
+@receiver(pre_delete, sender=Agents)
+def agent_deleting(sender, instance, **kwargs):
+    _touch_candidates(referral_info=instance.pk)
+
+
+def _touch_candidates(**lookup):
+    # SET_NULL is a plain UPDATE that skips auto_now, so API syncs
+    # (updated_since) would never see the cleared foreign key.
+    Candidates.objects.filter(**lookup).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Jobs)
+def job_deleted(sender, instance, **kwargs):
+    summary.value_removed("job", instance.pk)
+
+
+@receiver(post_delete, sender=Countries)
+def country_deleted(sender, instance, **kwargs):
+    summary.value_removed("country", instance.pk)
+
+
+@receiver(post_delete, sender=Agents)
+def agent_deleted(sender, instance, **kwargs):
+    summary.value_removed("agent", instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Jobs)
+@receiver([post_save, post_delete], sender=Countries)
+@receiver([post_save, post_delete], sender=Agents)
+def lookup_row_changed(sender, **kwargs):
+    lookups_changed()
+
+
+def lookups_changed():
+    """Call after bulk writes to jobs, countries or agents; drops the cached option lists on commit."""
+    transaction.on_commit(lookups.invalidate)
+
+
+def candidates_bulk_changed(candidate_ids=(), created=False, before=None, dedupe_ids=None):
+    """Call after bulk_create/bulk_update, which do not send model signals.
+
+    The search index and analytics summary are updated inside the caller's
+    transaction; cached CVs are dropped and the duplicate check runs once it
+    commits. After a bulk update pass ``before=summary.snapshot(ids)``,
+    taken before the write, so the summary moves by the difference, and
+    ``dedupe_ids``, the candidates whose ``DEDUPE_FIELDS`` changed (all of
+    ``candidate_ids`` when omitted). Newly created candidates have no cached CVs.
+    """
+    candidate_ids = list(candidate_ids)
+    if created or before is not None:
+        summary.apply(before or Counter(), summary.snapshot(candidate_ids))
+    _candidates_changed(candidate_ids, created, candidate_ids if dedupe_ids is None else dedupe_ids)
+
+
+def _candidates_changed(candidate_ids, created, dedupe_ids):
+    search.index_candidates(candidate_ids)
+    _queue_duplicate_check(dedupe_ids)
+    _invalidate_on_commit([] if created else candidate_ids)
+
+
+def _queue_duplicate_check(candidate_ids):
+    """Check ``candidate_ids`` for duplicates once the write commits.
+
+    With ``BACKGROUND_JOBS`` the ids join the dedupe job that is still
+    waiting, if there is one, so a burst of saves leaves one job for
+    run_jobs. Without it the check runs in this process after the commit.
+    """
+    candidate_ids = set(candidate_ids)
+    if not candidate_ids:
+        return
+    if not settings.BACKGROUND_JOBS:
+        transaction.on_commit(lambda: _check_duplicates(sorted(candidate_ids)))
+        return
+    with transaction.atomic():
+        waiting = (
+            BackgroundJob.objects.select_for_update()
+            .filter(kind="dedupe", status=BackgroundJob.QUEUED, attempts=0, params__has_key="candidate_ids")
+            .order_by("pk").first()
+        )
+        if waiting:
+            params = {"candidate_ids": sorted(candidate_ids.union(waiting.params["candidate_ids"]))}
+            # A worker may have claimed it since; then queue a job of our own.
+            if BackgroundJob.objects.filter(pk=waiting.pk, status=BackgroundJob.QUEUED).update(params=params):
+                return
+        BackgroundJob.objects.create(kind="dedupe", params={"candidate_ids": sorted(candidate_ids)})
+
+
+def _check_duplicates(candidate_ids):
+    from .dedupe import check_candidates  # numpy loads on the first check, not at start-up
+
+    try:
+        check_candidates(candidate_ids)
+    except Exception:
+        # The write has committed; a failed check must not turn the response into an error.
+        logger.exception("Duplicate check failed for candidates %s", candidate_ids)
+
+
+def _invalidate_on_commit(candidate_ids):
+    if not candidate_ids:
+        return
+
+    def invalidate():
+        for candidate_id in candidate_ids:
+            cv_cache.invalidate_candidate(candidate_id)
+
+    transaction.on_commit(invalidate)
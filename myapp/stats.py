@@ -0,0 +1,16 @@
+from .models import Candidates, CandidateSummary
+
+
+def candidate_status_counts():
+    """Total and per-status candidate counts, from the ``CandidateSummary`` "all" rows.
+
+    ``myapp.summary`` moves those rows in the same transaction as every
+    candidate write, so each process reads exact counts without a cache to
+    invalidate.
+    """
+    counts = {status.lower(): 0 for status, _ in Candidates.CANDIDATE_STATUS_CHOICES}
+    rows = CandidateSummary.objects.filter(dimension="all", value="").values_list("candidate_status", "count")
+    for status, count in rows:
+        counts[status.lower()] = counts.get(status.lower(), 0) + count
+    counts["total"] = sum(counts.values())
+    return counts
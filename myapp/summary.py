@@ -0,0 +1,126 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Candidates, CandidateSummary
+
+# Summary dimension -> Candidates column ("all" only splits by status).
+DIMENSIONS = {
+    "all": None,
+    "job": "job_applied_id",
+    "country": "job_location_id",
+    "agent": "referral_info_id",
+    "month": "created_at",
+}
+# Month of candidates registered before created_at was recorded.
+UNKNOWN_MONTH = "unknown"
+SNAPSHOT_FIELDS = ("job_applied_id", "job_location_id", "referral_info_id", "candidate_status", "created_at")
+
+
+def _month(value):
+    return timezone.localtime(value).strftime("%Y-%m") if value else UNKNOWN_MONTH
+
+
+def group_keys(job_id, country_id, agent_id, status, created_at):
+    """The ``(dimension, value, status)`` groups one candidate is counted in."""
+    return [
+        ("all", "", status),
+        ("job", str(job_id or ""), status),
+        ("country", str(country_id or ""), status),
+        ("agent", str(agent_id or ""), status),
+        ("month", _month(created_at), status),
+    ]
+
+
+def instance_counts(candidate):
+    return Counter(group_keys(*(getattr(candidate, field) for field in SNAPSHOT_FIELDS)))
+
+
+def snapshot(candidate_ids):
+    """Group counts contributed by ``candidate_ids`` as currently stored."""
+    counts = Counter()
+    candidate_ids = list(candidate_ids)
+    for start in range(0, len(candidate_ids), 500):
+        rows = Candidates.objects.filter(pk__in=candidate_ids[start:start + 500]).values_list(*SNAPSHOT_FIELDS)
+        for row in rows:
+            counts.update(group_keys(*row))
+    return counts
+
+
+def apply(before, after):
+    """Move the summary from the ``before`` snapshot to ``after``.
+
+    Only groups whose count changed are touched: one ``UPDATE count = count
+    + delta`` each, or an insert the first time a group appears.
+    """
+    deltas = {key: after[key] - before[key] for key in before.keys() | after.keys()}
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        for (dimension, value, status), delta in deltas.items():
+            group = CandidateSummary.objects.filter(dimension=dimension, value=value, candidate_status=status)
+            if group.update(count=F("count") + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    CandidateSummary.objects.create(
+                        dimension=dimension, value=value, candidate_status=status, count=delta,
+                    )
+            except IntegrityError:
+                # Created concurrently since the update above.
+                group.update(count=F("count") + delta)
+
+
+def value_removed(dimension, value):
+    """A job/country/agent was deleted: its candidates now count under "unset"."""
+    rows = CandidateSummary.objects.filter(dimension=dimension, value=str(value), count__gt=0)
+    moved = Counter({(dimension, str(value), row.candidate_status): row.count for row in rows})
+    apply(moved, Counter({(dimension, "", status): count for (_, _, status), count in moved.items()}))
+
+
+def summary_rows(queryset):
+    """Yield ``(dimension, value, status, count)`` aggregated from ``queryset``."""
+    for dimension, field in DIMENSIONS.items():
+        if dimension == "all":
+            groups = queryset.values("candidate_status")
+        elif dimension == "month":
+            groups = queryset.annotate(group=TruncMonth(field)).values("group", "candidate_status")
+        else:
+            groups = queryset.values(field, "candidate_status")
+        for row in groups.annotate(total=Count("pk")).order_by():
+            if dimension == "all":
+                value = ""
+            elif dimension == "month":
+                value = _month(row["group"])
+            else:
+                value = str(row[field] or "")
+            yield dimension, value, row["candidate_status"], row["total"]
+
+
+def rebuild():
+    """Recompute every summary row from Candidates; returns the number of groups."""
+    rows = [
+        CandidateSummary(dimension=dimension, value=value, candidate_status=status, count=count)
+        for dimension, value, status, count in summary_rows(Candidates.objects.all())
+    ]
+    with transaction.atomic():
+        CandidateSummary.objects.all().delete()
+        CandidateSummary.objects.bulk_create(rows)
+    return len(rows)
+
+
+def report(dimension):
+    """``[(value, {status: count}, total), ...]`` for ``dimension``, largest first."""
+    groups = {}
+    for value, status, count in CandidateSummary.objects.filter(
+        dimension=dimension, count__gt=0,
+    ).values_list("value", "candidate_status", "count"):
+        groups.setdefault(value, {})[status] = count
+    rows = [(value, statuses, sum(statuses.values())) for value, statuses in groups.items()]
+    if dimension == "month":
+        return sorted(rows, key=lambda row: (row[0] != UNKNOWN_MONTH, row[0]), reverse=True)
+    return sorted(rows, key=lambda row: (-row[2], row[0]))
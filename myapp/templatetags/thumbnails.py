@@ -0,0 +1,20 @@
+from django import template
+from django.urls import reverse
+
+from ..thumbnails import SIZES
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(fieldfile, size="thumb"):
+    """``{{ candidate.full_photo|thumbnail:"medium" }}`` -> URL of the resized image.
+
+    Images are served by ``candidate_document``, which builds a missing
+    derivative on first use and answers revalidations with 304.
+    """
+    if size not in SIZES:
+        raise template.TemplateSyntaxError(f"Unknown thumbnail size {size!r}")
+    if not fieldfile:
+        return ""
+    return reverse("candidate_document", args=(fieldfile.instance.pk, fieldfile.field.name, size))
@@ -1,3 +1,1181 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image
+
+from . import cv_cache, dedupe, lookups, profiling, search, summary, urls
+from .api import RESOURCES
+from .background import claim_next, run_job
+from .benchmarks import HEAVY_MODULES, body_size, import_sheet, startup_profile
+from .cv import build_cv_docx, docx_skeleton, link_callback
+from .dedupe import block_keys, check_candidates, find_all_duplicates, normalize_name, normalize_phone
+from .exporter import DEFAULT_EXPORT_COLUMNS, EXPORT_COLUMNS
+from .filters import filter_candidates
+from .grid import GridError, save_grid_changes
+from .importer import CREATED, DUPLICATE, MISSING, import_candidates
+from .ingest import find_orphans
+from .metrics import Registry
+from .models import (Agents, BackgroundJob, Candidates, CandidateSummary, Countries, DuplicateMatch, Jobs,
+                     SetAsideNumber)
+from .pagination import keyset_paginate, parse_cursor, parse_page_size
+from .seeding import SEED_DOMAIN, flush, parse_scale, seed
+from .signals import lookups_changed
+from .stats import candidate_status_counts
+from .thumbnails import SIZES, derivative_name, generate_for_candidate
+
+
+class KeysetPaginationTests(TestCase):
+    """The grid pages on the primary key: ``after`` walks forward, ``before`` back, filters carry over."""
+
+    def setUp(self):
+        seed(7, random_seed=23)
+        self.pks = list(Candidates.objects.order_by("pk").values_list("pk", flat=True))
+
+    def page(self, **cursor):
+        page = keyset_paginate(Candidates.objects.all(), 3, **cursor)
+        return [candidate.pk for candidate in page], page.previous_cursor, page.next_cursor
+
+    def test_after_and_before_cursors(self):
+        pks = self.pks
+        self.assertEqual(self.page(), (pks[:3], None, pks[2]))
+        self.assertEqual(self.page(after=pks[2]), (pks[3:6], pks[3], pks[5]))
+        self.assertEqual(self.page(after=pks[5]), (pks[6:], pks[6], None))
+        self.assertEqual(self.page(after=pks[6]), ([], None, None))
+        self.assertEqual(self.page(before=pks[6]), (pks[3:6], pks[3], pks[5]))
+        self.assertEqual(self.page(before=pks[3]), (pks[:3], None, pks[2]))
+
+    def test_values_rows_and_cursor_parsing(self):
+        page = keyset_paginate(Candidates.objects.values("id", "full_name"), 2, after=self.pks[0])
+        self.assertEqual([row["id"] for row in page], self.pks[1:3])
+        self.assertEqual(page.next_cursor, self.pks[2])
+        self.assertEqual([parse_cursor(value) for value in ("5", "0", "-3", "x", None)], [5, None, None, None, None])
+        self.assertEqual([parse_page_size(value, 25, 100) for value in ("10", "0", "1000", "x")], [10, 1, 100, 25])
+
+    def test_grid_pages_keep_their_filters(self):
+        approved = self.pks[1::2]
+        Candidates.objects.filter(pk__in=approved).update(candidate_status="Approved")
+        Candidates.objects.exclude(pk__in=approved).update(candidate_status="Pending")
+        self.client.force_login(get_user_model().objects.create_superuser("pager", "p@example.com", "x"))
+
+        seen, query, pages = [], "status=Approved&page_size=2", []
+        while query:
+            response = self.client.get(f"{reverse('view_clients')}?{query}")
+            pages.append([candidate.pk for candidate in response.context["page"]])
+            seen.extend(pages[-1])
+            query = response.context["next_query"]
+            if query:
+                self.assertIn("status=Approved", query)
+        self.assertEqual(seen, approved)
+        self.assertEqual(pages, [approved[:2], approved[2:]])
+
+        back = QueryDict(response.context["previous_query"])
+        self.assertEqual(back["status"], "Approved")
+        response = self.client.get(reverse("view_clients"), back)
+        self.assertEqual([candidate.pk for candidate in response.context["page"]], approved[:2])
+        self.assertEqual(response.context["previous_query"], "")
+
+
+class CandidateQueryPlanTests(TestCase):
+    """Hot Candidates lookups must be served by an index, never a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Countries.objects.create(name="Qatar")
+
+    def hot_queries(self):
+        grid = Candidates.objects.order_by("pk")
+        return {
+            "import passport check": Candidates.objects.filter(passport_number="A1234567"),
+            "nin lookup": Candidates.objects.filter(nin_number="CM900000000000"),
+            "status filter": filter_candidates(grid, QueryDict("status=Approved"))[:50],
+            "country filter": filter_candidates(grid, QueryDict(f"country={self.country.pk}"))[:50],
+            "admin gender filter": grid.filter(gender="Female")[:50],
+            "admin marital status filter": grid.filter(marital_status="Single")[:50],
+            "admin job location filter": grid.filter(job_location=self.country)[:50],
+        }
+
+    def explain(self, sql, params=()):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                return "\n".join(row[-1] for row in cursor.fetchall())
+            # Tiny test tables always favour a sequential scan; only fail if no index can serve it.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def assertNoFullScan(self, name, plan):
+        if connection.vendor == "sqlite":
+            full_scan = re.search(r"\bSCAN myapp_candidates\b(?! USING)", plan)
+        else:
+            full_scan = re.search(r"Seq Scan on myapp_candidates\b", plan)
+        self.assertIsNone(full_scan, f"{name} does a full scan:\n{plan}")
+
+    def setUp(self):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.skipTest(f"No query plan check for {connection.vendor}")
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(name):
+                sql, params = queryset.query.sql_with_params()
+                self.assertNoFullScan(name, self.explain(sql, params))
+
+    def test_dashboard_counts_use_covering_index(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            candidate_status_counts()
+        self.assertEqual(len(queries), 1)
+        self.assertIn("myapp_candidatesummary", queries[0]["sql"])
+        self.assertNoFullScan("dashboard counts", self.explain(queries[0]["sql"]))
+
+
+class SeedDataTests(TestCase):
+    """``seed_data`` builds consistent synthetic rows and can top a database up."""
+
+    def test_parse_scale(self):
+        self.assertEqual(parse_scale("1k"), 1000)
+        self.assertEqual(parse_scale("2.5K"), 2500)
+        self.assertEqual(parse_scale("100"), 100)
+
+    def test_seed_tops_up_and_flushes(self):
+        seed(30, random_seed=1)
+        seed(20, random_seed=2)
+        seeded = Candidates.objects.filter(email__endswith=f"@{SEED_DOMAIN}")
+        self.assertEqual(seeded.count(), 50)
+        self.assertEqual(seeded.values("nin_number").distinct().count(), 50)
+        self.assertFalse(seeded.filter(job_applied=None).exists())
+        cache.clear()
+        self.assertEqual(candidate_status_counts()["total"], 50)
+
+        self.assertEqual(flush()[0], 50)
+        self.assertFalse(Candidates.objects.exists())
+        self.assertFalse(Jobs.objects.exists())
+        self.assertFalse(Agents.objects.exists())
+
+    def test_flush_does_not_delete_candidates_row_by_row(self):
+        queries = []
+        for size in (10, 40):
+            seed(size, random_seed=1)
+            DuplicateMatch.objects.create(candidate_a=Candidates.objects.first(), candidate_b=Candidates.objects.last(),
+                                          score=0.9)
+            SetAsideNumber.objects.create(candidate=Candidates.objects.first(), field="nin_number", value="CM00FLUSH",
+                                          kept_by=Candidates.objects.last())
+            with CaptureQueriesContext(connection) as captured:
+                flush()
+            queries.append(len(captured))
+            self.assertFalse(Candidates.objects.exists())
+            self.assertFalse(DuplicateMatch.objects.exists())
+            self.assertFalse(SetAsideNumber.objects.exists())
+            self.assertFalse(CandidateSummary.objects.filter(count__gt=0).exists())
+        self.assertEqual(queries[0], queries[1])
+
+
+class UpdateCandidatesViewTests(TestCase):
+    """A rejected grid save says which rule it broke and writes nothing."""
+
+    def setUp(self):
+        seed(3, random_seed=19)
+        self.a, self.b, self.c = Candidates.objects.order_by("pk")
+        Candidates.objects.filter(pk=self.b.pk).update(passport_number="C1111111")
+        self.client.force_login(get_user_model().objects.create_superuser("editor", "e@example.com", "x"))
+
+    def save(self, rows):
+        data = {"candidate_ids": [candidate.pk for candidate in rows]}
+        for candidate, cells in rows.items():
+            data.update({f"{key}_{candidate.pk}": value for key, value in cells.items()})
+        response = self.client.post(reverse("update_candidates"), data, follow=True)
+        return [str(message) for message in response.context["messages"]]
+
+    def test_passport_held_by_another_candidate(self):
+        self.assertEqual(self.save({self.a: {"passport_number": "C1111111", "full_name": "Not Saved"}}),
+                         ["Changes not saved. Another candidate already has passport number C1111111."])
+        self.assertFalse(Candidates.objects.filter(full_name="Not Saved").exists())
+
+    def test_passport_posted_twice(self):
+        self.assertEqual(self.save({self.a: {"passport_number": "D2222222"}, self.c: {"passport_number": "D2222222"}}),
+                         ["Changes not saved. Another candidate already has passport number D2222222."])
+
+    def test_passport_still_stored_on_another_posted_row(self):
+        self.assertEqual(self.save({self.a: {"passport_number": "C1111111"}, self.b: {"passport_number": "E3333333"}}),
+                         ["Changes not saved. Another candidate already has passport number C1111111."])
+
+    def test_deleted_job(self):
+        self.assertEqual(self.save({self.a: {"job_applied": "999999"}}),
+                         ["Changes not saved. The selected job no longer exists."])
+
+
+class ConditionalGetTests(TestCase):
+    """Candidate pages, documents and CVs answer revalidations with 304 until the candidate or a file changes."""
+
+    def setUp(self):
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory()),
+            CV_CACHE_DIR=self.enterContext(tempfile.TemporaryDirectory()),
+        ))
+        seed(1, images=True, random_seed=17)
+        self.candidate = Candidates.objects.get()
+        self.client.force_login(get_user_model().objects.create_superuser("reader", "r@example.com", "x"))
+
+    def assertRevalidates(self, url):
+        """GET ``url``, check it is private, and return its ETag once a revalidation got a 304."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Last-Modified", response)
+        etag = response["ETag"]
+        response.close()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        return etag
+
+    def test_candidate_page_changes_with_the_row(self):
+        url = reverse("view_candidate", args=[self.candidate.pk])
+        etag = self.assertRevalidates(url)
+        self.candidate.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_document_changes_with_the_file(self):
+        url = reverse("candidate_document", args=[self.candidate.pk, "profile_picture"])
+        etag = self.assertRevalidates(url)
+        path = self.candidate.profile_picture.path
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_cv_is_not_rendered_again_for_a_revalidation(self):
+        url = reverse("download_cv_pdf", args=[self.candidate.pk])
+        etag = self.assertRevalidates(url)
+        for cached in Path(settings.CV_CACHE_DIR).rglob("*"):
+            if cached.is_file():
+                cached.unlink()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertFalse([path for path in Path(settings.CV_CACHE_DIR).rglob("*") if path.is_file()])
+
+
+class ImportTests(TestCase):
+    """The set-based importer reports every row, matches lookups case-insensitively and dry runs write nothing."""
+
+    def setUp(self):
+        seed(2, random_seed=13)
+        self.existing = Candidates.objects.exclude(passport_number=None).first()
+        self.job = Jobs.objects.first()
+        self.rows = [
+            self.row("New One", "IMP000001", self.job.title.upper(), "New Agency"),
+            self.row("Old Passport", self.existing.passport_number.lower(), "Welder", "New Agency"),
+            self.row("New Two", "IMP000002", "welder", "new agency"),
+            self.row("Repeated Passport", "imp000002", "Welder", "New Agency"),
+            {"full_name": "No Passport", "date_of_birth": date(1990, 1, 1), "job_applied_title": "Welder"},
+        ]
+
+    @staticmethod
+    def row(full_name, passport, job, agent):
+        return {"full_name": full_name, "passport_number": passport, "date_of_birth": date(1994, 5, 17),
+                "job_applied_title": job, "referral_full_name": agent}
+
+    def assertReport(self, result):
+        self.assertEqual([(row["row"], row["full_name"], row["status"]) for row in result.rows], [
+            (2, "New One", CREATED),
+            (3, "Old Passport", DUPLICATE),
+            (4, "New Two", CREATED),
+            (5, "Repeated Passport", DUPLICATE),
+            (6, "No Passport", MISSING),
+        ])
+        self.assertEqual(result.rows[-1]["detail"], "Passport Number, Referral Full Name")
+        self.assertEqual((result.created_count, result.skipped_count), (2, 3))
+        self.assertEqual(result.new_jobs, ["welder"])
+        self.assertEqual(result.new_agents, ["New Agency"])
+
+    def test_dry_run_reports_without_writing(self):
+        counts = (Candidates.objects.count(), Jobs.objects.count(), Agents.objects.count())
+        result = import_candidates(self.rows, dry_run=True)
+        self.assertTrue(result.dry_run)
+        self.assertReport(result)
+        self.assertEqual((Candidates.objects.count(), Jobs.objects.count(), Agents.objects.count()), counts)
+
+    def test_import_creates_rows_and_missing_lookups(self):
+        result = import_candidates(self.rows, batch_size=1)
+        self.assertReport(result)
+        imported = Candidates.objects.filter(passport_number__startswith="IMP").order_by("passport_number")
+        self.assertEqual([candidate.full_name for candidate in imported], ["New One", "New Two"])
+        self.assertEqual(imported[0].job_applied, self.job)
+        self.assertEqual(imported[1].job_applied.title, "welder")
+        self.assertEqual(Agents.objects.filter(full_name__iexact="new agency").count(), 1)
+        self.assertEqual(imported[0].referral_info, imported[1].referral_info)
+
+    def test_uploaded_sheet_renders_the_report(self):
+        self.client.force_login(get_user_model().objects.create_superuser("importer", "i@example.com", "x"))
+        upload = SimpleUploadedFile("candidates.xlsx", import_sheet(3, prefix="SHEET"))
+        with override_settings(BACKGROUND_JOBS=False):
+            response = self.client.post(reverse("import_excel"), {"excel_file": upload, "dry_run": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["result"].created_count, 3)
+        self.assertContains(response, "Import Candidate 2")
+        self.assertFalse(Candidates.objects.filter(passport_number__startswith="SHEET").exists())
+
+
+@override_settings(BACKGROUND_JOBS=False)
+class ExportTests(TestCase):
+    """CSV and XLSX exports stream only the filtered candidates, with the ``?columns=`` the user picked."""
+
+    def setUp(self):
+        seed(6, random_seed=17)
+        self.client.force_login(get_user_model().objects.create_superuser("exporter", "ex@example.com", "x"))
+        self.job = Candidates.objects.exclude(job_applied=None).first().job_applied
+        self.expected = list(
+            Candidates.objects.filter(job_applied=self.job).order_by("pk").values_list("full_name", "passport_number")
+        )
+
+    def export(self, **params):
+        response = self.client.get(reverse("export_excel"), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv_honours_filters_and_columns(self):
+        body = self.export(format="csv", job=self.job.pk, columns="full_name,bogus,passport_number")
+        rows = list(csv.reader(body.decode().splitlines()))
+        self.assertEqual(rows[0], ["Full Name", "Passport Number"])
+        self.assertEqual([tuple(row) for row in rows[1:]],
+                         [(name, passport or "") for name, passport in self.expected])
+
+    def test_csv_without_columns_uses_the_defaults(self):
+        header = next(csv.reader(self.export(format="csv").decode().splitlines()))
+        self.assertEqual(header, [EXPORT_COLUMNS[column][1] for column in DEFAULT_EXPORT_COLUMNS])
+
+    def test_xlsx_honours_filters_and_columns(self):
+        from openpyxl import load_workbook
+
+        body = self.export(job=self.job.pk, columns=["full_name", "passport_number"])
+        sheet = load_workbook(BytesIO(body), read_only=True)["Candidates"]
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ("Full Name", "Passport Number"))
+        self.assertEqual(rows[1:], self.expected)
+
+
+class ThumbnailTests(TestCase):
+    """Every document image gets thumb, medium and print JPEGs; ``build_thumbnails`` only fills the gaps."""
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        seed(2, random_seed=19)
+        self.storage = Candidates._meta.get_field("profile_picture").storage
+        scan = BytesIO()
+        Image.new("RGB", (1200, 900), "navy").save(scan, "PNG")
+        for candidate in Candidates.objects.all():
+            name = self.storage.save(f"profile_pics/thumb-test-{candidate.pk}.png", ContentFile(scan.getvalue()))
+            Candidates.objects.filter(pk=candidate.pk).update(profile_picture=name)
+        self.names = list(Candidates.objects.order_by("pk").values_list("profile_picture", flat=True))
+
+    def build(self, *args):
+        out = StringIO()
+        call_command("build_thumbnails", *args, stdout=out)
+        return out.getvalue()
+
+    def test_derivatives_fit_their_sizes(self):
+        candidate = Candidates.objects.order_by("pk").first()
+        self.assertEqual(generate_for_candidate(candidate), len(SIZES))
+        for size, box in SIZES.items():
+            with self.storage.open(derivative_name(candidate.profile_picture.name, size)) as file:
+                image = Image.open(file)
+                self.assertEqual(image.format, "JPEG")
+                self.assertEqual(max(image.size), max(box))  # 1200x900 scaled down to fit the box
+        self.assertEqual(generate_for_candidate(candidate), 0)
+
+    def test_build_thumbnails_skips_existing_derivatives_unless_forced(self):
+        thumb = derivative_name(self.names[0], "thumb")
+        self.assertIn(f"Done: {2 * len(SIZES)} derivatives written.", self.build())
+        self.assertTrue(all(self.storage.exists(derivative_name(name, size)) for name in self.names for size in SIZES))
+        self.assertIn("Done: 0 derivatives written.", self.build())
+
+        self.storage.delete(thumb)
+        self.assertIn("Done: 1 derivatives written.", self.build())
+        self.assertIn(f"Done: {2 * len(SIZES)} derivatives written.", self.build("--force"))
+
+
+class CVCacheTests(TestCase):
+    """Rendered CVs are reused until the candidate changes; eviction drops the least recently read first."""
+
+    def setUp(self):
+        self.enterContext(override_settings(CV_CACHE_DIR=self.enterContext(tempfile.TemporaryDirectory()),
+                                            CV_CACHE_MAX_BYTES=250))
+        seed(3, random_seed=23)
+        self.candidates = list(Candidates.objects.order_by("pk"))
+        self.renders = []
+
+    def render(self, candidate):
+        self.renders.append(candidate.pk)
+        return b"x" * 100
+
+    def cached(self, candidate):
+        return cv_cache.get_or_render(candidate, "pdf", self.render)[0]
+
+    def test_hits_do_not_render_again(self):
+        first = self.cached(self.candidates[0])
+        self.assertEqual(self.cached(self.candidates[0]), first)
+        self.assertEqual(self.renders, [self.candidates[0].pk])
+
+    def test_eviction_removes_the_least_recently_read_entries(self):
+        a, b, c = self.candidates
+        path_a, path_b = self.cached(a), self.cached(b)
+        now = time.time()
+        os.utime(path_a, (now - 100, now - 100))
+        os.utime(path_b, (now - 50, now - 50))
+        self.cached(a)  # a hit makes a the most recently read
+        self.assertAlmostEqual(path_a.stat().st_mtime, now - 100, places=3, msg="A hit keeps Last-Modified")
+
+        path_c = self.cached(c)  # 300 bytes over a 250-byte budget
+        self.assertTrue(path_a.exists())
+        self.assertFalse(path_b.exists())
+        self.assertTrue(path_c.exists())
+
+    def test_the_entry_just_written_is_never_evicted(self):
+        with override_settings(CV_CACHE_MAX_BYTES=50):
+            path = self.cached(self.candidates[0])
+        self.assertTrue(path.exists())
+
+
+class DocxCVTests(TestCase):
+    """The Word CV fills every placeholder of the cached skeleton and embeds print-sized images."""
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        seed(1, random_seed=31)
+        self.candidate = Candidates.objects.select_related("job_applied", "job_location").get()
+        self.storage = Candidates._meta.get_field("profile_picture").storage
+        scan = BytesIO()
+        Image.new("RGB", (2400, 1800), "teal").save(scan, "PNG")
+        for field in ("profile_picture", "passport_copy"):
+            name = self.storage.save(f"docx-test/{field}.png", ContentFile(scan.getvalue()))
+            getattr(self.candidate, field).name = name
+
+    def test_placeholders_are_filled_and_print_derivatives_embedded(self):
+        from docx import Document
+
+        document = Document(BytesIO(build_cv_docx(self.candidate)))
+        texts = [paragraph.text for paragraph in document.paragraphs]
+        texts += [cell.text for table in document.tables for row in table.rows for cell in row.cells]
+        self.assertFalse([text for text in texts if "[[" in text], "Unfilled placeholders")
+        self.assertIn(f"Applicant No: {self.candidate.pk}", texts)
+        self.assertIn(self.candidate.full_name, texts)
+        self.assertIn(self.candidate.job_applied.title if self.candidate.job_applied else "N/A", texts)
+        self.assertIn("Passport Copy", texts)
+
+        images = [shape._inline.graphic.graphicData.pic.blipFill.blip.embed for shape in document.inline_shapes]
+        self.assertEqual(len(images), 2)
+        for relationship in images:
+            with Image.open(BytesIO(document.part.related_parts[relationship].blob)) as image:
+                self.assertEqual((image.format, max(image.size)), ("JPEG", max(SIZES["print"])))
+        self.assertTrue(self.storage.exists(derivative_name(self.candidate.profile_picture.name, "print")))
+
+    def test_the_skeleton_is_built_once(self):
+        build_cv_docx(self.candidate)
+        hits = docx_skeleton.cache_info().hits
+        build_cv_docx(self.candidate)
+        self.assertEqual(docx_skeleton.cache_info().hits, hits + 1)
+
+
+class SearchTests(TestCase):
+    """The full-text index ranks candidates, matches word prefixes and follows every candidate write."""
+
+    def setUp(self):
+        seed(4, random_seed=37)
+        self.a, self.b, self.c, self.d = Candidates.objects.order_by("pk")
+        Candidates.objects.filter(pk=self.a.pk).update(full_name="Zawadi Qorvinta", father_name="Qorvinta Senior",
+                                                       mother_name="Amina Qorvinta")
+        Candidates.objects.filter(pk=self.b.pk).update(full_name="Qorvintaline Apio")
+        search.rebuild_index()
+
+    def ids(self, query):
+        return search.search_candidate_ids(query, limit=10)
+
+    def test_ranking_prefixes_and_all_terms(self):
+        self.assertEqual(self.ids("qorvinta"), [self.a.pk, self.b.pk])
+        self.assertEqual(self.ids("QORV"), [self.a.pk, self.b.pk])
+        self.assertEqual(self.ids("qorvinta zawadi"), [self.a.pk])
+        self.assertEqual(self.ids("qorvinta nobody"), [])
+        self.assertEqual(self.ids(" -*- "), [])
+
+    def test_index_follows_saves_deletes_and_bulk_changes(self):
+        self.c.full_name = "Wekesa Brontalu"
+        self.c.save()
+        self.assertEqual(self.ids("brontalu"), [self.c.pk])
+
+        self.b.delete()
+        self.assertEqual(self.ids("qorvinta"), [self.a.pk])
+
+        post = QueryDict(mutable=True)
+        post.update({"candidate_ids": str(self.d.pk), f"full_name_{self.d.pk}": "Okot Brontalu"})
+        save_grid_changes(post, {})
+        self.assertEqual(set(self.ids("brontalu")), {self.c.pk, self.d.pk})
+
+        import_candidates([{"full_name": "Imported Brontalu", "passport_number": "FTS000001",
+                            "date_of_birth": date(1991, 2, 3), "job_applied_title": "Welder",
+                            "referral_full_name": "Search Agency"}])
+        imported = Candidates.objects.get(passport_number="FTS000001")
+        self.assertIn(imported.pk, self.ids("brontalu"))
+
+        flush()
+        self.assertEqual(self.ids("brontalu"), [imported.pk])
+
+    def test_search_page_shows_ranked_results(self):
+        self.client.force_login(get_user_model().objects.create_superuser("searcher", "s@example.com", "x"))
+        response = self.client.get(reverse("search_clients"), {"q": "qorv", "page_size": 1})
+        self.assertEqual([candidate.pk for candidate in response.context["results"]], [self.a.pk])
+        self.assertTrue(response.context["has_next"])
+
+
+class LookupCacheTests(TestCase):
+    """Option lists are cached under a version key that a committed lookup write bumps."""
+
+    def setUp(self):
+        seed(2, random_seed=41)
+        cache.clear()
+        self.job = Jobs.objects.order_by("pk").first()
+
+    def titles(self):
+        return dict(lookups.options("jobs"))
+
+    def test_lists_are_cached_until_a_write_commits(self):
+        self.titles()
+        with self.assertNumQueries(0):
+            self.titles()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.job.title = "Renamed Job"
+            self.job.save()
+        self.assertNotEqual(self.titles()[self.job.pk], "Renamed Job", "Invalidated before the commit")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.titles()[self.job.pk], "Renamed Job")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        self.assertNotIn(self.job.pk, self.titles())
+
+    def test_a_version_bump_from_another_process_retires_the_local_copy(self):
+        self.titles()
+        Jobs.objects.filter(pk=self.job.pk).update(title="Changed Elsewhere")
+        self.assertNotEqual(self.titles()[self.job.pk], "Changed Elsewhere")
+        cache.set(lookups.LOOKUPS_VERSION_KEY, lookups.version() + 1, None)
+        self.assertEqual(self.titles()[self.job.pk], "Changed Elsewhere")
+
+    def test_bulk_writes_call_lookups_changed(self):
+        self.titles()
+        with self.captureOnCommitCallbacks(execute=True):
+            Jobs.objects.filter(pk=self.job.pk).update(title="Bulk Title")
+            lookups_changed()
+        self.assertEqual(self.titles()[self.job.pk], "Bulk Title")
+
+
+@override_settings(METRICS_TOKENS=["metrics-secret"])
+class MetricsTests(TestCase):
+    """``/metrics`` exposes per-view counters and histograms to staff and scrapers only."""
+
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user("staff", "st@example.com", "x", is_staff=True)
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer metrics-secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        self.assertEqual(response["Cache-Control"], "no-store")
+        return response.content.decode()
+
+    @staticmethod
+    def sample(text, line_start):
+        values = [line.rsplit(" ", 1)[1] for line in text.splitlines() if line.startswith(line_start)]
+        return float(values[0]) if values else 0
+
+    def test_access_is_limited_to_staff_and_tokens(self):
+        anonymous = self.client.get(reverse("metrics"))
+        self.assertEqual(anonymous.status_code, 403)
+        self.assertEqual(anonymous["WWW-Authenticate"], 'Bearer realm="metrics"')
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+        self.client.force_login(get_user_model().objects.create_user("clerk", "cl@example.com", "x"))
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_requests_are_counted_per_view_and_status(self):
+        responses = 'myapp_responses_total{view="login",status="200"}'
+        queries = 'myapp_request_db_queries_count{view="login"}'
+        before = self.scrape()
+        self.client.get(reverse("login"))
+        self.client.get(reverse("login"))
+        after = self.scrape()
+        self.assertEqual(self.sample(after, responses) - self.sample(before, responses), 2)
+        self.assertEqual(self.sample(after, queries) - self.sample(before, queries), 2)
+        self.assertIn('myapp_request_duration_seconds_bucket{view="login",le="+Inf"}', after)
+        self.assertIn("# TYPE myapp_request_db_queries histogram", after)
+
+    def test_histogram_buckets_are_cumulative_and_labels_escaped(self):
+        registry = Registry()
+        for queries in (0, 3, 3, 5000):
+            registry.record('odd"view', 200, {"myapp_request_db_queries": queries})
+        text = registry.exposition()
+        self.assertIn('myapp_responses_total{view="odd\\"view",status="200"} 4', text)
+        self.assertIn('myapp_request_db_queries_bucket{view="odd\\"view",le="0"} 1', text)
+        self.assertIn('myapp_request_db_queries_bucket{view="odd\\"view",le="5"} 3', text)
+        self.assertIn('myapp_request_db_queries_bucket{view="odd\\"view",le="1000"} 3', text)
+        self.assertIn('myapp_request_db_queries_bucket{view="odd\\"view",le="+Inf"} 4', text)
+        self.assertIn('myapp_request_db_queries_sum{view="odd\\"view"} 5006', text)
+
+    @override_settings(METRICS_SLOW_REQUEST_SECONDS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        self.client.force_login(self.staff)
+        with self.assertLogs("myapp.metrics", "WARNING") as logs:
+            self.client.get(reverse("dashboard_view"))
+        self.assertIn("Slow request GET /", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+
+@override_settings(PROFILE_SAMPLE_RATE=0.0, PROFILE_MAX_CAPTURES=3)
+class ProfilingTests(TestCase):
+    """Staff can profile a request on demand; captures rotate at ``PROFILE_MAX_CAPTURES``."""
+
+    def setUp(self):
+        self.enterContext(override_settings(PROFILE_DIR=self.enterContext(tempfile.TemporaryDirectory())))
+        User = get_user_model()
+        self.staff = User.objects.create_user("profiler", "pr@example.com", "x", is_staff=True)
+        self.clerk = User.objects.create_user("clerk", "cl@example.com", "x")
+
+    def profile(self, **headers):
+        return self.client.get(reverse("dashboard_view"), {"_profile": "1"}, **headers)
+
+    def test_only_staff_can_trigger_a_capture(self):
+        self.assertNotIn("X-Profile-Id", self.profile())
+        self.client.force_login(self.clerk)
+        self.assertNotIn("X-Profile-Id", self.profile())
+        self.assertEqual(profiling.list_captures(), [])
+
+        self.client.force_login(self.staff)
+        capture_id = self.profile()["X-Profile-Id"]
+        header_id = self.client.get(reverse("dashboard_view"), HTTP_X_PROFILE="1")["X-Profile-Id"]
+        self.assertEqual([capture["id"] for capture in profiling.list_captures()], [header_id, capture_id])
+        capture = profiling.list_captures()[1]
+        self.assertEqual((capture["view"], capture["user"], capture["status"]), ("dashboard_view", "profiler", 200))
+
+        stacks = self.client.get(reverse("profile_capture_file", args=[capture_id, "txt"]))
+        self.assertEqual(stacks.status_code, 200)
+        text = b"".join(stacks.streaming_content).decode()
+        self.assertRegex(text, r"(?m)^\S.* \d+$")
+        self.assertIn("dashboard_view (views.py:", text)
+        self.client.force_login(self.clerk)
+        self.assertEqual(self.client.get(reverse("profile_captures")).status_code, 302, "Admin login required")
+
+    def test_captures_rotate_oldest_first(self):
+        self.client.force_login(self.staff)
+        ids = [self.profile()["X-Profile-Id"] for _ in range(5)]
+        self.assertEqual([capture["id"] for capture in profiling.list_captures()], ids[:1:-1])
+        self.assertEqual(len(list(Path(settings.PROFILE_DIR).iterdir())), 3 * 3)
+        rotated = self.client.get(reverse("profile_capture_file", args=[ids[0], "prof"]))
+        self.assertEqual(rotated.status_code, 404)
+
+
+class SummaryTests(TestCase):
+    """The summary tables move with every candidate write and always agree with a full rebuild."""
+
+    def setUp(self):
+        seed(6, random_seed=11)
+        summary.rebuild()
+        self.candidate = Candidates.objects.exclude(job_applied=None).order_by("pk").first()
+
+    def counts(self):
+        return {
+            (dimension, value, status): count
+            for dimension, value, status, count in CandidateSummary.objects.filter(count__gt=0).values_list(
+                "dimension", "value", "candidate_status", "count",
+            )
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.counts()
+        summary.rebuild()
+        self.assertEqual(incremental, self.counts())
+
+    def test_create_and_status_change(self):
+        before = self.counts()
+        clone = Candidates.objects.get(pk=self.candidate.pk)
+        clone.pk, clone.passport_number, clone.nin_number = None, "S0000001", "CM99SUMMARY001"
+        clone.candidate_status = "Pending"
+        clone.save()
+        self.assertEqual(self.counts()[("all", "", "Pending")], before.get(("all", "", "Pending"), 0) + 1)
+
+        clone.candidate_status = "Approved"
+        clone.save()
+        after = self.counts()
+        self.assertEqual(after.get(("all", "", "Pending"), 0), before.get(("all", "", "Pending"), 0))
+        self.assertEqual(after[("all", "", "Approved")], before.get(("all", "", "Approved"), 0) + 1)
+        job = ("job", str(clone.job_applied_id), "Approved")
+        self.assertEqual(after[job], before.get(job, 0) + 1)
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        status = self.candidate.candidate_status
+        before = self.counts()[("all", "", status)]
+        self.candidate.delete()
+        self.assertEqual(self.counts().get(("all", "", status), 0), before - 1)
+        self.assertMatchesRebuild()
+
+    def test_deleting_a_job_moves_its_candidates_to_unset(self):
+        def job_total(counts, value):
+            return sum(count for key, count in counts.items() if key[:2] == ("job", value))
+
+        job_id = self.candidate.job_applied_id
+        moved = Candidates.objects.filter(job_applied_id=job_id).count()
+        unset = job_total(self.counts(), "")
+        self.candidate.job_applied.delete()
+        self.assertEqual(job_total(self.counts(), str(job_id)), 0)
+        self.assertEqual(job_total(self.counts(), ""), unset + moved)
+        self.assertMatchesRebuild()
+
+    def test_grid_bulk_update(self):
+        other = Jobs.objects.exclude(pk=self.candidate.job_applied_id).first()
+        post = QueryDict(mutable=True)
+        post.update({"candidate_ids": str(self.candidate.pk), f"job_applied_{self.candidate.pk}": str(other.pk)})
+        save_grid_changes(post, {})
+        status = self.candidate.candidate_status
+        self.assertEqual(self.counts()[("job", str(other.pk), status)],
+                         Candidates.objects.filter(job_applied=other, candidate_status=status).count())
+        self.assertMatchesRebuild()
+
+    def test_candidates_without_a_registration_date_count_as_unknown_month(self):
+        older = Candidates.objects.exclude(pk=self.candidate.pk).order_by("pk")[:2]
+        Candidates.objects.filter(pk__in=[candidate.pk for candidate in older]).update(created_at=None)
+        summary.rebuild()
+        rows = summary.report("month")
+        self.assertEqual(rows[-1][0], summary.UNKNOWN_MONTH)
+        self.assertEqual(rows[-1][2], 2)
+        self.assertEqual(sum(total for _, _, total in rows), Candidates.objects.count())
+
+        self.candidate.refresh_from_db()
+        self.candidate.candidate_status = "Approved"
+        self.candidate.save()
+        self.candidate.refresh_from_db()
+        self.assertIsNotNone(self.candidate.created_at, "Saving keeps the registration date")
+
+        self.client.force_login(get_user_model().objects.create_superuser("reports", "rp@example.com", "x"))
+        self.assertContains(self.client.get(reverse("reports_view")), "<td>Unknown</td>", html=True)
+        self.assertMatchesRebuild()
+
+
+class SetAsideNumberTests(TestCase):
+    """Numbers migration 0010 set aside go back to their candidate once the review frees them."""
+
+    def setUp(self):
+        seed(2, random_seed=29)
+        self.kept, self.other = Candidates.objects.order_by("pk")
+        Candidates.objects.filter(pk=self.kept.pk).update(passport_number="P1234567")
+        Candidates.objects.filter(pk=self.other.pk).update(passport_number=None)
+        SetAsideNumber.objects.create(candidate=self.other, field="passport_number", value="P1234567",
+                                      kept_by=self.kept)
+        self.match = DuplicateMatch.objects.create(candidate_a=self.kept, candidate_b=self.other, score=1.0)
+        self.client.force_login(get_user_model().objects.create_superuser("reviewer", "rv@example.com", "x"))
+
+    def resolve(self, decision):
+        response = self.client.post(reverse("resolve_duplicate", args=[self.match.pk]), {"decision": decision},
+                                    follow=True)
+        return [str(message) for message in response.context["messages"]]
+
+    def test_number_stays_set_aside_while_another_candidate_holds_it(self):
+        messages = self.resolve(DuplicateMatch.DISTINCT)
+        self.assertEqual(messages[0], "Review saved.")
+        self.assertIn("Passport number P1234567 is still set aside", messages[1])
+        self.other.refresh_from_db()
+        self.assertIsNone(self.other.passport_number)
+        self.assertTrue(SetAsideNumber.objects.exists())
+
+    def test_number_goes_back_once_it_is_free(self):
+        Candidates.objects.filter(pk=self.kept.pk).update(passport_number="P7654321")
+        self.assertEqual(self.resolve(DuplicateMatch.DISTINCT), ["Review saved."])
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.passport_number, "P1234567")
+        self.assertFalse(SetAsideNumber.objects.exists())
+        self.assertEqual(DuplicateMatch.objects.get().status, DuplicateMatch.DISTINCT)
+
+
+class DedupeTests(TestCase):
+    """Blocking keys decide which candidates are compared; the score decides which pairs are queued."""
+
+    def setUp(self):
+        seed(3, random_seed=3)
+        self.a, self.b, self.c = Candidates.objects.order_by("pk")
+        shared = {"date_of_birth": date(1990, 5, 1), "phone_number": "0772 123456", "passport_number": ""}
+        Candidates.objects.filter(pk=self.a.pk).update(**shared, full_name="John Okello", nin_number="CM90001AAAAAAA")
+        Candidates.objects.filter(pk=self.b.pk).update(**shared, full_name="OKELLO  john", nin_number="CM85002BBBBBBB")
+        Candidates.objects.filter(pk=self.c.pk).update(
+            full_name="Mary Namubiru", date_of_birth=date(1975, 1, 9), phone_number="+256 772 123 456",
+            nin_number="CF75003CCCCCCC", passport_number="",
+        )
+        DuplicateMatch.objects.all().delete()
+        BackgroundJob.objects.filter(kind="dedupe").delete()
+
+    def pairs(self):
+        return set(DuplicateMatch.objects.values_list("candidate_a_id", "candidate_b_id"))
+
+    def test_normalisation_and_block_keys(self):
+        self.assertEqual(normalize_name("OKELLO  John"), normalize_name("john okello"))
+        self.assertEqual(normalize_name("Nakato Bé"), "be nakato")
+        self.assertEqual({normalize_phone(phone) for phone in ("0772 123456", "+256772123456", "256-772-123-456")},
+                         {"772123456"})
+        self.assertEqual(normalize_phone("12345"), "")
+
+        dob = date(1990, 5, 1)
+        okello = block_keys("john okello", dob, "772123456", "CM90001AAAAAAA", "")
+        self.assertIn("n:O240:1990-05-01", okello)  # "Okelo" sounds the same
+        self.assertIn("n:O240:1990-05-01", block_keys("okelo", dob, "", "", ""))
+        self.assertFalse(okello & block_keys("john okello", date(1991, 5, 1), "", "", ""))
+        self.assertEqual(okello & block_keys("mary namubiru", None, "772123456", "CF75003CCCCCCC", ""),
+                         {"tel:772123456"})
+        self.assertIn("nin:CM90001A", okello)
+        self.assertIn("pp:A1234567", block_keys("", None, "", "", "A1234567"))
+
+    def test_pairs_above_the_threshold_are_queued(self):
+        # a/b: same name, birth date and phone (0.85). a/c: same phone only.
+        candidates, compared, found = find_all_duplicates()
+        self.assertEqual((candidates, compared, found), (3, 3, 1))
+        match = DuplicateMatch.objects.get()
+        self.assertEqual((match.candidate_a_id, match.candidate_b_id), (self.a.pk, self.b.pk))
+        self.assertEqual(match.score, 0.85)
+        self.assertEqual(match.reasons, "name 1.00, dob, phone")
+
+        self.assertEqual(find_all_duplicates(threshold=0.9)[2], 0)
+        self.assertEqual(self.pairs(), set())
+        self.assertEqual(check_candidates([self.b.pk], threshold=0.85), 1)
+        self.assertEqual(self.pairs(), {(self.a.pk, self.b.pk)})
+        self.assertEqual(check_candidates([self.c.pk], threshold=0.1), 2)
+        self.assertEqual(self.pairs(), {(self.a.pk, self.b.pk), (self.a.pk, self.c.pk), (self.b.pk, self.c.pk)})
+
+    def test_scans_keep_pairs_queued_by_the_migration(self):
+        # a/c share only a phone, so no scan would queue them itself.
+        queued = DuplicateMatch.objects.create(candidate_a=self.a, candidate_b=self.c, score=1.0,
+                                               reasons="same passport number (set aside by migration 0010)",
+                                               source=DuplicateMatch.MIGRATION)
+        find_all_duplicates()
+        self.assertEqual(self.pairs(), {(self.a.pk, self.b.pk), (self.a.pk, self.c.pk)})
+        check_candidates([self.a.pk, self.c.pk], threshold=0.9)
+        self.assertEqual(self.pairs(), {(self.a.pk, self.c.pk)})
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.source), (DuplicateMatch.PENDING, DuplicateMatch.MIGRATION))
+
+    @override_settings(DEDUPE_MAX_BLOCK_SIZE=2)
+    def test_members_of_oversized_blocks_are_not_loaded(self):
+        find_all_duplicates()
+        # All three share the phone block, which is now too big; a/b also share a name block.
+        with mock.patch.object(dedupe, "Features", wraps=dedupe.Features) as features:
+            self.assertEqual(check_candidates([self.c.pk]), 0)
+        loaded = [row[0] for row in features.call_args_list[-1].args[0]]
+        self.assertEqual(loaded, [self.c.pk])
+        self.assertEqual(check_candidates([self.b.pk]), 1)
+        self.assertEqual(self.pairs(), {(self.a.pk, self.b.pk)})
+
+    @override_settings(BACKGROUND_JOBS=True)
+    def test_identity_changes_join_one_queued_check(self):
+        find_all_duplicates()  # index the block keys
+        DuplicateMatch.objects.all().delete()
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.b.religion = "Anglican"
+        self.b.save()
+        self.assertFalse(BackgroundJob.objects.filter(kind="dedupe").exists(), "Only identity fields are checked")
+
+        self.b.full_name = "John B. Okello"
+        self.b.save()
+        self.a.save(update_fields=["phone_number"])  # unchanged
+        self.a.nin_number = "CM90001AAAAAAB"
+        self.a.save(update_fields=["nin_number"])
+        job = BackgroundJob.objects.get(kind="dedupe")
+        self.assertEqual(job.params, {"candidate_ids": [self.a.pk, self.b.pk]})
+        self.assertEqual(self.pairs(), set(), "The check ran inside the request")
+
+        self.assertIsNone(claim_next("test", kinds=["import_excel"]))
+        job = run_job(claim_next("test", kinds=["dedupe"]))
+        self.assertEqual(job.status, BackgroundJob.SUCCEEDED)
+        self.assertEqual(self.pairs(), {(self.a.pk, self.b.pk)})
+
+        self.c.full_name = "Mary Namubiru-Okot"
+        self.c.save()
+        self.assertEqual(BackgroundJob.objects.filter(kind="dedupe", status=BackgroundJob.QUEUED).count(), 1,
+                         "A claimed job takes no more ids")
+
+    @override_settings(BACKGROUND_JOBS=False)
+    def test_without_background_jobs_the_check_runs_after_commit(self):
+        find_all_duplicates()
+        DuplicateMatch.objects.all().delete()
+        self.b.refresh_from_db()
+        self.b.full_name = "John B. Okello"
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.b.save()
+        self.assertEqual(self.pairs(), set())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.pairs(), {(self.a.pk, self.b.pk)})
+        self.assertFalse(BackgroundJob.objects.filter(kind="dedupe").exists())
+
+
+@override_settings(API_TOKENS=["api-secret"], METRICS_TOKENS=["metrics-secret"])
+class ApiSyncTests(TestCase):
+    """Partners sync with ``updated_since=<server_time>``; ``server_time`` lags by ``API_SYNC_OVERLAP``."""
+
+    def setUp(self):
+        seed(5, random_seed=5)
+        self.auth = {"HTTP_AUTHORIZATION": "Bearer api-secret"}
+
+    def get(self, url, **params):
+        response = self.client.get(url, params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_every_page_reports_the_first_pages_server_time(self):
+        first = self.get(reverse("api_list", args=["candidates"]), page_size=2)
+        later = self.get(first["next"])
+        self.assertIn("as_of=", first["next"])
+        self.assertEqual(later["server_time"], first["server_time"])
+        self.assertEqual(self.get(later["next"])["server_time"], first["server_time"])
+
+    @override_settings(API_SYNC_OVERLAP=60)
+    def test_a_write_committed_after_the_read_is_in_the_next_sync(self):
+        before = timezone.now()
+        Candidates.objects.update(updated_at=before - timedelta(days=1))
+        since = self.get(reverse("api_list", args=["candidates"]))["server_time"]
+        self.assertLess(parse_datetime(since), before - timedelta(seconds=59))
+        # Stamped just before the read, committed just after it.
+        candidate = Candidates.objects.order_by("pk").last()
+        Candidates.objects.filter(pk=candidate.pk).update(updated_at=before - timedelta(seconds=5))
+        changed = self.get(reverse("api_list", args=["candidates"]), updated_since=since)["results"]
+        self.assertEqual([row["id"] for row in changed], [candidate.pk])
+
+    def test_deleting_a_lookup_row_marks_its_candidates_changed(self):
+        candidate = Candidates.objects.exclude(job_applied=None).first()
+        since = self.get(reverse("api_list", args=["candidates"]))["server_time"]
+        candidate.job_applied.delete()
+        changed = self.get(reverse("api_list", args=["candidates"]), updated_since=since)["results"]
+        self.assertIn(candidate.pk, [row["id"] for row in changed])
+        self.assertIsNone(next(row for row in changed if row["id"] == candidate.pk)["job_applied"])
+
+    def test_bearer_tokens_are_checked_per_endpoint(self):
+        self.assertEqual(self.client.get(reverse("api_list", args=["jobs"])).status_code, 401)
+        self.assertEqual(self.client.get(reverse("api_list", args=["jobs"]),
+                                         HTTP_AUTHORIZATION="Bearer metrics-secret").status_code, 401)
+        self.assertEqual(self.client.get(reverse("metrics"), **self.auth).status_code, 403)
+        self.assertEqual(self.client.get(reverse("metrics"),
+                                         HTTP_AUTHORIZATION="Bearer metrics-secret").status_code, 200)
+
+
+class GridSaveTests(TestCase):
+    """``save_grid_changes`` writes only changed cells and leaves no files behind when it fails."""
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        seed(2, random_seed=7)
+        self.a, self.b = Candidates.objects.order_by("pk")
+
+    def post(self, candidate, **cells):
+        post = QueryDict(mutable=True)
+        post.update({f"{key}_{candidate.pk}": value for key, value in cells.items()})
+        post["candidate_ids"] = str(candidate.pk)
+        return post
+
+    def test_only_changed_rows_are_written(self):
+        post = self.post(self.a, full_name="Edited Name", gender=self.a.gender)
+        updated = save_grid_changes(post, {})
+        self.assertEqual([candidate.pk for candidate in updated], [self.a.pk])
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.full_name, "Edited Name")
+        self.assertEqual(save_grid_changes(post, {}), [])
+
+    @override_settings(BACKGROUND_JOBS=True)
+    def test_only_identity_changes_queue_a_duplicate_check(self):
+        BackgroundJob.objects.filter(kind="dedupe").delete()
+        save_grid_changes(self.post(self.a, gender="Other"), {})
+        self.assertFalse(BackgroundJob.objects.filter(kind="dedupe").exists())
+        save_grid_changes(self.post(self.b, phone_number="0701 000111"), {})
+        self.assertEqual(BackgroundJob.objects.get(kind="dedupe").params, {"candidate_ids": [self.b.pk]})
+
+    def test_failed_save_leaves_its_files_to_cleanup_media(self):
+        # Another request may reference the same content-addressed file, so a rollback must not delete it.
+        Candidates.objects.filter(pk=self.b.pk).update(passport_number="B7654321")
+        scan = BytesIO()
+        Image.new("RGB", (40, 30), "white").save(scan, "PNG")
+        files = {f"medical_copy_{self.a.pk}": SimpleUploadedFile("scan.png", scan.getvalue())}
+        with self.assertRaises(GridError):
+            save_grid_changes(self.post(self.a, passport_number="B7654321"), files)
+        self.a.refresh_from_db()
+        self.assertFalse(self.a.medical_copy)
+        storage = Candidates._meta.get_field("medical_copy").storage
+        orphans = [name for name, _ in find_orphans(storage, grace_seconds=0)]
+        self.assertEqual(len(orphans), 1)
+        self.assertEqual(list(find_orphans(storage)), [], "Inside the grace period")
+
+        save_grid_changes(self.post(self.a), files)
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.medical_copy.name, orphans[0])
+        self.assertEqual(list(find_orphans(storage, grace_seconds=0)), [])
+
+
+QUERY_BUDGET_FILE = Path(__file__).with_name("query_budgets.json")
+SMALL, LARGE = 8, 24
+
+
+class QueryBudgetTests(TestCase):
+    """Every named URL in ``myapp.urls``, crawled against a small and a larger dataset.
+
+    A view whose query count grows with the data has an N+1, so the counts
+    must not change between the two sizes. They must also stay within
+    ``query_budgets.json``. After an intended change, rewrite the budgets with
+    ``UPDATE_QUERY_BUDGETS=1 python manage.py test myapp.tests.QueryBudgetTests``.
+    """
+
+    def setUp(self):
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory()),
+            CV_CACHE_DIR=self.enterContext(tempfile.TemporaryDirectory()),
+            JOB_FILES_ROOT=self.enterContext(tempfile.TemporaryDirectory()),
+            BACKGROUND_JOBS=False,
+            CV_BATCH_WORKERS=1,  # render the CV pack in this process, so its queries are counted
+            PROFILE_SAMPLE_RATE=0.0,
+            METRICS_SLOW_REQUEST_SECONDS=float("inf"),
+        ))
+        self.user = get_user_model().objects.create_superuser("budget", "budget@example.com", "x")
+        self.job = BackgroundJob.objects.create(kind="export_excel", status=BackgroundJob.SUCCEEDED,
+                                                created_by=self.user)
+        self.job.result_file.save("candidates.csv", ContentFile(b"full_name\n"))
+
+    def populate(self, size):
+        """Top the dataset up to ``size`` candidates, with a duplicate match per pair."""
+        seed(size - Candidates.objects.count(), images=True, random_seed=size)
+        ids = list(Candidates.objects.order_by("pk").values_list("pk", flat=True))
+        DuplicateMatch.objects.bulk_create(
+            # Queued as migration pairs, which the duplicate checks the write probes run leave alone.
+            [DuplicateMatch(candidate_a_id=a, candidate_b_id=b, score=0.9, source=DuplicateMatch.MIGRATION)
+             for a, b in zip(ids[::2], ids[1::2])],
+            ignore_conflicts=True,
+        )
+
+    def probes(self, size):
+        """``(budget key, url name, method, path, data)`` for one crawl; request bodies scale with ``size``."""
+        candidate = Candidates.objects.exclude(profile_picture="").order_by("pk").first()
+        ids = list(Candidates.objects.order_by("pk").values_list("pk", flat=True)[:size])
+        match = DuplicateMatch.objects.filter(status=DuplicateMatch.PENDING).order_by("-pk").first()
+        surname = candidate.full_name.split()[-1]
+        # Not a name: a duplicate check's writes depend on which pairs happen to match.
+        grid = {"candidate_ids": ids, **{f"gender_{pk}": f"G{size}" for pk in ids}}
+        upload = SimpleUploadedFile("candidates.xlsx", import_sheet(size, prefix=f"QB{size}-"))
+        probes = [
+            ("home", "home", "get", reverse("home"), None),
+            ("login", "login", "get", reverse("login"), None),
+            ("register", "register", "get", reverse("register"), None),
+            ("dashboard_view", "dashboard_view", "get", reverse("dashboard_view"), None),
+            ("reports_view", "reports_view", "get", reverse("reports_view"), None),
+            ("add_client", "add_client", "get", reverse("add_client"), None),
+            ("view_clients", "view_clients", "get", reverse("view_clients"), None),
+            ("view_clients:filtered", "view_clients", "get", reverse("view_clients"),
+             {"status": "Pending", "country": candidate.job_location_id}),
+            ("search_clients", "search_clients", "get", reverse("search_clients"), {"q": surname}),
+            ("view_candidate", "view_candidate", "get", reverse("view_candidate", args=[candidate.pk]), None),
+            ("candidate_document", "candidate_document", "get",
+             reverse("candidate_document", args=[candidate.pk, "profile_picture"]), None),
+            ("candidate_document:thumb", "candidate_document", "get",
+             reverse("candidate_document", args=[candidate.pk, "profile_picture", "thumb"]), None),
+            ("duplicate_review", "duplicate_review", "get", reverse("duplicate_review"), None),
+            ("export_excel", "export_excel", "get", reverse("export_excel"), None),
+            ("export_excel:csv", "export_excel", "get", reverse("export_excel"), {"format": "csv"}),
+            ("download_cv_pdf", "download_cv_pdf", "get", reverse("download_cv_pdf", args=[candidate.pk]), None),
+            ("download_cv_word", "download_cv_word", "get", reverse("download_cv_word", args=[candidate.pk]), None),
+            ("download_cv_batch", "download_cv_batch", "get", reverse("download_cv_batch"),
+             {"ids": ",".join(map(str, ids))}),
+            ("job_detail", "job_detail", "get", reverse("job_detail", args=[self.job.pk]), None),
+            ("job_status", "job_status", "get", reverse("job_status", args=[self.job.pk]), None),
+            ("job_download", "job_download", "get", reverse("job_download", args=[self.job.pk]), None),
+            ("metrics", "metrics", "get", reverse("metrics"), None),
+            ("update_candidates", "update_candidates", "post", reverse("update_candidates"), grid),
+            ("import_excel", "import_excel", "post", reverse("import_excel"), {"excel_file": upload}),
+            ("resolve_duplicate", "resolve_duplicate", "post", reverse("resolve_duplicate", args=[match.pk]),
+             {"decision": DuplicateMatch.DISTINCT}),
+            ("logout", "logout", "post", reverse("logout"), None),
+        ]
+        for name, resource in RESOURCES.items():
+            first = resource.model.objects.order_by("pk").first()
+            probes += [
+                (f"api_list:{name}", "api_list", "get", reverse("api_list", args=[name]), None),
+                (f"api_detail:{name}", "api_detail", "get", reverse("api_detail", args=[name, first.pk]), None),
+            ]
+        return probes
+
+    def crawl(self, size):
+        counts = {}
+        for key, url_name, method, path, data in self.probes(size):
+            # Cold caches and a fresh session every time, so counts are repeatable.
+            cache.clear()
+            self.client.force_login(self.user)
+            # on_commit work (search index, cache invalidation) is part of the request's cost.
+            with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+                response = getattr(self.client, method)(path, data)
+                body_size(response)
+            response.close()
+            self.assertLess(response.status_code, 400, f"{method.upper()} {path} returned {response.status_code}")
+            counts[key] = len(queries)
+        return counts
+
+    def test_query_counts_do_not_grow_and_stay_within_budget(self):
+        counts = {}
+        for size in (SMALL, LARGE):
+            self.populate(size)
+            counts[size] = self.crawl(size)
+
+        named = {pattern.name for pattern in urls.urlpatterns if isinstance(pattern, URLPattern) and pattern.name}
+        crawled = {url_name for _, url_name, *_ in self.probes(LARGE)}
+        self.assertEqual(named - crawled, set(), "Named URLs missing from QueryBudgetTests.probes()")
+
+        if os.environ.get("UPDATE_QUERY_BUDGETS"):
+            QUERY_BUDGET_FILE.write_text(json.dumps(dict(sorted(counts[LARGE].items())), indent=2) + "\n")
+        budgets = json.loads(QUERY_BUDGET_FILE.read_text())
+        for key, queries in counts[LARGE].items():
+            with self.subTest(key):
+                self.assertLessEqual(
+                    queries, counts[SMALL][key],
+                    f"{key}: {counts[SMALL][key]} queries with {SMALL} candidates, {queries} with {LARGE}",
+                )
+                self.assertIn(key, budgets, f"{key} has no entry in {QUERY_BUDGET_FILE.name}")
+                self.assertLessEqual(queries, budgets.get(key, 0), f"{key} is over its query budget")
+        self.assertEqual(set(budgets) - set(counts[LARGE]), set(), f"Stale entries in {QUERY_BUDGET_FILE.name}")
+
+
+class WorkerStartupTests(SimpleTestCase):
+    """Booting a server worker must not import the Excel, CV or duplicate-check libraries."""
+
+    def test_heavy_libraries_are_not_loaded_at_boot(self):
+        startup = startup_profile()
+        self.assertEqual(startup["heavy_modules"], [],
+                         f"Imported while booting a worker (of {', '.join(HEAVY_MODULES)})")
+
+
+class CVLinkCallbackTests(SimpleTestCase):
+    def test_quoted_media_names_resolve_to_the_stored_file(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            path = Path(media_root, "profile_pics", "Nakato Bé.png")
+            path.parent.mkdir()
+            path.write_bytes(b"not an image")  # no derivative can be built, so the original is used
+            self.assertEqual(link_callback("/media/profile_pics/Nakato%20B%C3%A9.png", None), str(path))
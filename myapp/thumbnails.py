@@ -0,0 +1,89 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Derivative name -> bounding box in pixels.
+SIZES = {
+    "thumb": (160, 160),
+    "medium": (640, 640),
+    "print": (800, 800),  # embedded in generated PDF/DOCX CVs
+}
+DOCUMENT_FIELDS = ("profile_picture", "full_photo", "passport_copy", "medical_copy", "interpol")
+JPEG_QUALITY = 80
+
+
+def derivative_name(name, size):
+    """``profile_pics/a.png`` -> ``profile_pics/a.thumb.jpg`` (stored next to the original)."""
+    root, _ = os.path.splitext(name)
+    return f"{root}.{size}.jpg"
+
+
+def render_derivative(image, size):
+    copy = image.copy()
+    copy.thumbnail(SIZES[size], Image.LANCZOS)
+    if copy.mode not in ("RGB", "L"):
+        copy = copy.convert("RGB")
+    buffer = BytesIO()
+    copy.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _open_image(storage, name):
+    with storage.open(name, "rb") as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    return image
+
+
+def generate_derivatives(fieldfile, force=False):
+    """Write every size in :data:`SIZES` for an image FieldFile.
+
+    Returns the number of derivatives written. Unreadable images are logged
+    and skipped so one bad upload never fails a save.
+    """
+    if not fieldfile:
+        return 0
+    storage = fieldfile.storage
+    pending = [
+        size for size in SIZES
+        if force or not storage.exists(derivative_name(fieldfile.name, size))
+    ]
+    if not pending:
+        return 0
+    try:
+        image = _open_image(storage, fieldfile.name)
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("Cannot build thumbnails for %s: %s", fieldfile.name, exc)
+        return 0
+
+    for size in pending:
+        name = derivative_name(fieldfile.name, size)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(render_derivative(image, size)))
+    return len(pending)
+
+
+def ensure_derivative(storage, name, size):
+    """Return the storage name of one derivative of ``name``, building it if missing.
+
+    Returns None when the original cannot be read as an image.
+    """
+    derivative = derivative_name(name, size)
+    if storage.exists(derivative):
+        return derivative
+    try:
+        image = _open_image(storage, name)
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("Cannot build %s derivative for %s: %s", size, name, exc)
+        return None
+    return storage.save(derivative, ContentFile(render_derivative(image, size)))
+
+
+def generate_for_candidate(candidate, fields=DOCUMENT_FIELDS, force=False):
+    return sum(generate_derivatives(getattr(candidate, field), force=force) for field in fields)
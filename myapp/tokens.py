@@ -0,0 +1,9 @@
+import hmac
+
+
+def has_bearer_token(request, tokens):
+    """True if the request sends ``Authorization: Bearer <token>`` with one of ``tokens``."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return any(hmac.compare_digest(token.encode(), allowed.encode()) for allowed in tokens)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, metrics, views
 
 urlpatterns = [
 
@@ -11,12 +11,18 @@ urlpatterns = [
 
     # ------------------- DASHBOARD -------------------
     path('dashboard/', views.dashboard_view, name='dashboard_view'),
+    path('reports/', views.reports_view, name='reports_view'),
 
     # ------------------- CLIENTS -------------------
     path('clients/add/', views.add_client, name='add_client'),
     path('clients/view/', views.view_clients, name='view_clients'),
     path('clients/update/', views.update_candidates, name='update_candidates'),
+    path('clients/search/', views.search_clients, name='search_clients'),
     path('clients/<int:candidate_id>/', views.view_candidate, name='view_candidate'),
+    path('clients/<int:candidate_id>/documents/<str:field>/', views.candidate_document, name='candidate_document'),
+    path('clients/<int:candidate_id>/documents/<str:field>/<str:size>/', views.candidate_document, name='candidate_document'),
+    path('clients/duplicates/', views.duplicate_review, name='duplicate_review'),
+    path('clients/duplicates/<int:match_id>/resolve/', views.resolve_duplicate, name='resolve_duplicate'),
 
     # ------------------- EXCEL -------------------
     path('export-excel/', views.export_excel, name='export_excel'),
@@ -25,4 +31,17 @@ urlpatterns = [
     # ------------------- CV DOWNLOAD -------------------
     path('clients/<int:candidate_id>/download/pdf/', views.download_cv_pdf, name='download_cv_pdf'),
     path('clients/<int:candidate_id>/download/word/', views.download_cv_word, name='download_cv_word'),
+    path('clients/download/cv-pack/', views.download_cv_batch, name='download_cv_batch'),
+
+    # ------------------- BACKGROUND JOBS -------------------
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/status/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
+
+    # ------------------- API v1 -------------------
+    path('api/v1/<slug:resource>/', api.resource_list, name='api_list'),
+    path('api/v1/<slug:resource>/<int:pk>/', api.resource_detail, name='api_detail'),
+
+    # ------------------- MONITORING -------------------
+    path('metrics', metrics.metrics_view, name='metrics'),
 ]
@@ -0,0 +1,58 @@
+import hashlib
+import os
+from datetime import datetime, time
+
+from django.utils import timezone
+
+from .thumbnails import DOCUMENT_FIELDS
+
+# Bump when view_candidate.html changes shape.
+PAGE_VERSION = 1
+
+
+def file_stat(storage, name):
+    """``os.stat`` of a stored file, or None when it is missing or not on local disk."""
+    try:
+        return os.stat(storage.path(name))
+    except (OSError, NotImplementedError, ValueError):
+        return None
+
+
+def file_signature(fieldfile):
+    if not fieldfile:
+        return ""
+    stat = file_stat(fieldfile.storage, fieldfile.name)
+    if stat is None:
+        return fieldfile.name
+    return f"{fieldfile.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def start_of_today():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min)).timestamp()
+
+
+def candidate_version(candidate):
+    """``(stamp, last_modified)`` for a candidate and its document files.
+
+    The stamp changes when the row is saved (``updated_at``), when its job,
+    country or agent changes, or when any document file is replaced;
+    ``last_modified`` is the newest of those times as a POSIX timestamp.
+    """
+    parts = [candidate.pk, candidate.updated_at.isoformat()]
+    times = [candidate.updated_at.timestamp()]
+    job = candidate.job_applied
+    if job is not None:
+        parts.append(job.updated_at.isoformat())
+        times.append(job.updated_at.timestamp())
+    parts.extend((str(candidate.job_location), str(candidate.referral_info)))
+    for field in DOCUMENT_FIELDS:
+        fieldfile = getattr(candidate, field)
+        parts.append(file_signature(fieldfile))
+        stat = file_stat(fieldfile.storage, fieldfile.name) if fieldfile else None
+        if stat is not None:
+            times.append(stat.st_mtime)
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest(), max(times)
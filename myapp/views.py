@@ -1,21 +1,100 @@
-import pandas as pd
-from datetime import date, timedelta
-
-from django.http import HttpResponse
-from django.shortcuts import render, redirect, get_object_or_404
+import os
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib import messages
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import never_cache, cache_control
 from django.contrib.auth.views import LogoutView
-from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, url_has_allowed_host_and_scheme
+from django.utils import timezone
+
+from . import background, cv_cache, lookups, summary
+from .cv import DOCX_CONTENT_TYPE, PDF_CONTENT_TYPE, CVRenderError
+from .cv_batch import renderer, stream_cv_zip
+from .exporter import DEFAULT_EXPORT_COLUMNS, EXPORT_COLUMNS, export_columns, export_rows, stream_csv, write_xlsx
+from .filters import candidate_filter_values, filter_candidates
+from .forms import CustomAuthenticationForm, RegistrationForm, CandidateApplicationForm
+from .grid import GRID_FIELDS, GridError, save_grid_changes
+from .importer import import_candidates, read_sheet
+from .models import BackgroundJob, Candidates, CandidateSummary, DuplicateMatch
+from .pagination import keyset_paginate, parse_cursor, parse_page_size
+from .search import search_candidates
+from .stats import candidate_status_counts
+from .thumbnails import DOCUMENT_FIELDS, SIZES, ensure_derivative
+from .versions import PAGE_VERSION, candidate_version, file_stat, make_etag, start_of_today
+
+# Async views keep the event loop free for slow clients: the ORM is used through its
+# async API and anything else that blocks (form parsing and validation, Pillow, CV
+# builds, file reads) is handed to a thread with sync_to_async.
+arender = sync_to_async(render)
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+async def _form_data(request):
+    """``(request.POST, request.FILES)``; parsing may spool a large upload to disk."""
+    return await sync_to_async(lambda: (request.POST, request.FILES))()
+
+
+# Django buffers a streamed body whose iterator type does not match the server:
+# under ASGI a sync iterator is read into a list before the first byte is sent,
+# under WSGI (runserver, the test client) an async one is. Bodies are built per
+# handler so neither deployment holds a whole export, ZIP or file in memory.
+_END = object()
+
+
+async def _async_chunks(chunks):
+    """Drive a sync iterator from the request's thread, one chunk per step.
+
+    Thread-sensitive, so a queryset iterator keeps using the connection it
+    was opened on.
+    """
+    step = sync_to_async(next)
+    try:
+        while (chunk := await step(chunks, _END)) is not _END:
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            await sync_to_async(chunks.close)()
+
+
+async def _file_chunks(handle):
+    read = sync_to_async(handle.read, thread_sensitive=False)
+    try:
+        while chunk := await read(FILE_CHUNK_SIZE):
+            yield chunk
+    finally:
+        await sync_to_async(handle.close, thread_sensitive=False)()
+
+
+def _streaming_response(request, chunks, **kwargs):
+    """A StreamingHttpResponse over ``chunks`` that neither ASGI nor WSGI buffers."""
+    if isinstance(request, ASGIRequest):
+        chunks = _async_chunks(iter(chunks))
+    return StreamingHttpResponse(chunks, **kwargs)
+
+
+def _open_file_response(request, handle, **kwargs):
+    """A FileResponse for an open file, read chunk by chunk from a thread under ASGI."""
+    if not isinstance(request, ASGIRequest):
+        return FileResponse(handle, **kwargs)
+    response = FileResponse(_file_chunks(handle), **kwargs)
+    response.set_headers(handle)
+    response._resource_closers.append(handle.close)  # in case the body is never iterated
+    return response
 
-from xhtml2pdf import pisa
-from docx import Document
-from docx.shared import Inches
 
-from .forms import CustomAuthenticationForm, RegistrationForm, CandidateApplicationForm
-from .models import Candidates, Jobs, Agents, Countries
+async def _file_response(request, open_file, **kwargs):
+    """``_open_file_response`` for ``open_file()``, opened off the event loop."""
+    handle = await sync_to_async(open_file, thread_sensitive=False)()
+    return _open_file_response(request, handle, **kwargs)
 
 
 # ----------------------------- HOME / REGISTRATION -----------------------------
@@ -70,34 +149,66 @@ class CustomLogoutView(LogoutView):
 @login_required
 @cache_control(no_cache=True, must_revalidate=True, no_store=True)
 def dashboard_view(request):
-    total_candidates = Candidates.objects.count()
-    pending_candidates = Candidates.objects.filter(candidate_status="Pending").count()
-    travelled_candidates = Candidates.objects.filter(candidate_status="Travelled").count()
+    counts = candidate_status_counts()
 
     context = {
-        "total_candidates": total_candidates,
-        "pending_candidates": pending_candidates,
-        "travelled_candidates": travelled_candidates,
+        "total_candidates": counts["total"],
+        "pending_candidates": counts["pending"],
+        "approved_candidates": counts["approved"],
+        "travelled_candidates": counts["travelled"],
     }
     return render(request, "myapp/dashboard.html", context)
 
 
+# ------------------------------ REPORTS ---------------------------------------
+# Summary dimension -> lookup holding its value labels.
+REPORT_LABELS = {
+    "job": "jobs",
+    "country": "countries",
+    "agent": "agents",
+}
+
+
+@never_cache
+@login_required
+@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+def reports_view(request):
+    """Candidate breakdowns read only from the CandidateSummary tables."""
+    statuses = [status for status, _ in Candidates.CANDIDATE_STATUS_CHOICES]
+    sections = []
+    for dimension, title in CandidateSummary.DIMENSION_CHOICES:
+        rows = summary.report(dimension)
+        labels = {}
+        if dimension in REPORT_LABELS:
+            labels = {str(pk): label for pk, label in lookups.options(REPORT_LABELS[dimension])}
+        elif dimension == "month":
+            labels = {summary.UNKNOWN_MONTH: "Unknown"}  # registered before months were recorded
+        sections.append({
+            "dimension": dimension,
+            "title": title,
+            "rows": [
+                (labels.get(value, value) or "Not set", [counts.get(status, 0) for status in statuses], total)
+                for value, counts, total in rows
+            ],
+        })
+    return render(request, "myapp/reports.html", {"statuses": statuses, "sections": sections})
+
+
 # ------------------------------ ADD CLIENT / FORM -----------------------------
 @never_cache
 @login_required
 @cache_control(no_cache=True, must_revalidate=True, no_store=True)
-def add_client(request):
+async def add_client(request):
     if request.method == "POST":
-        form = CandidateApplicationForm(request.POST, request.FILES)
-        if form.is_valid():
-            form.save()
+        form = CandidateApplicationForm(*await _form_data(request))
+        if await sync_to_async(form.is_valid)():
+            await sync_to_async(form.save)()
             messages.success(request, "Application submitted successfully!")
             return redirect("add_client")
         messages.error(request, "Please correct the errors below.")
-        print(form.errors)
     else:
         form = CandidateApplicationForm()
-    return render(request, "myapp/add_client.html", {"form": form})
+    return await arender(request, "myapp/add_client.html", {"form": form})
 
 
 # ------------------------------ VIEW CLIENTS ----------------------------------
@@ -105,47 +216,92 @@ def add_client(request):
 @login_required
 @cache_control(no_cache=True, must_revalidate=True, no_store=True)
 def view_clients(request):
+    candidates = filter_candidates(
+        Candidates.objects.select_related("job_applied", "job_location", "referral_info")
+        .only(*GRID_FIELDS),
+        request.GET,
+    )
+    page_size = parse_page_size(request.GET.get("page_size"))
+    page = keyset_paginate(
+        candidates,
+        page_size,
+        after=parse_cursor(request.GET.get("after")),
+        before=parse_cursor(request.GET.get("before")),
+    )
+
+    def page_query(**cursor):
+        query = request.GET.copy()
+        query.pop("after", None)
+        query.pop("before", None)
+        query.update(cursor)
+        return query.urlencode()
+
     context = {
-        "candidates": Candidates.objects.all(),
-        "jobs": Jobs.objects.all(),
-        "countries": Countries.objects.all(),
-        "agents": Agents.objects.all(),
+        "candidates": page,
+        "export_columns": [(key, header) for key, (_, header) in EXPORT_COLUMNS.items()],
+        "default_export_columns": DEFAULT_EXPORT_COLUMNS,
+        "page": page,
+        "filters": candidate_filter_values(request.GET),
+        "page_size": page_size,
+        "status_choices": Candidates.CANDIDATE_STATUS_CHOICES,
+        "next_query": page_query(after=page.next_cursor) if page.has_next else "",
+        "previous_query": page_query(before=page.previous_cursor) if page.has_previous else "",
+        "jobs": lookups.options("jobs"),
+        "countries": lookups.options("countries"),
+        "agents": lookups.options("agents"),
     }
     return render(request, "myapp/view_clients.html", context)
 
 
+# ------------------------------ SEARCH CLIENTS --------------------------------
+SEARCH_RESULT_FIELDS = (
+    "id", "full_name", "nin_number", "passport_number", "phone_number", "candidate_status",
+    "present_address_district", "job_applied__title", "job_location__name",
+)
+
+
+@never_cache
+@login_required
+@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+def search_clients(request):
+    query = request.GET.get("q", "").strip()
+    page_size = parse_page_size(request.GET.get("page_size"))
+    page_number = parse_cursor(request.GET.get("page")) or 1
+    results, has_next = [], False
+    if query:
+        results, has_next = search_candidates(
+            query, page_size, page_number,
+            Candidates.objects.select_related("job_applied", "job_location").only(*SEARCH_RESULT_FIELDS),
+        )
+    context = {
+        "query": query,
+        "results": results,
+        "page_number": page_number,
+        "has_next": has_next,
+        "page_size": page_size,
+    }
+    return render(request, "myapp/search_results.html", context)
+
+
 # --------------------------- UPDATE CANDIDATES --------------------------------
 @never_cache
 @login_required
 @cache_control(no_cache=True, must_revalidate=True, no_store=True)
-def update_candidates(request):
+async def update_candidates(request):
     if request.method == "POST":
-        for candidate in Candidates.objects.all():
-            candidate.full_name = request.POST.get(f"full_name_{candidate.id}", candidate.full_name)
-            candidate.gender = request.POST.get(f"gender_{candidate.id}", candidate.gender)
-            candidate.phone_number = request.POST.get(f"phone_number_{candidate.id}", candidate.phone_number)
-            dob = request.POST.get(f"date_of_birth_{candidate.id}")
-            if dob:
-                candidate.date_of_birth = dob
-            candidate.passport_number = request.POST.get(f"passport_number_{candidate.id}", candidate.passport_number)
-
-            job_id = request.POST.get(f"job_applied_{candidate.id}")
-            if job_id:
-                candidate.job_applied_id = job_id
-            location_id = request.POST.get(f"job_location_{candidate.id}")
-            if location_id:
-                candidate.job_location_id = location_id
-            agent_id = request.POST.get(f"agent_{candidate.id}")
-            if agent_id:
-                candidate.referral_info_id = agent_id
-
-            files = request.FILES
-            for field in ["profile_picture", "full_photo", "passport_copy", "medical_copy", "interpol"]:
-                key = f"{field}_{candidate.id}"
-                if key in files:
-                    setattr(candidate, field, files[key])
-            candidate.save()
-        messages.success(request, "All candidates updated successfully.")
+        post, files = await _form_data(request)
+        try:
+            updated = await sync_to_async(save_grid_changes)(post, files)
+        except GridError as e:
+            messages.error(request, f"Changes not saved. {e}")
+        else:
+            if updated:
+                messages.success(request, f"{len(updated)} candidate(s) updated successfully.")
+            else:
+                messages.info(request, "No changes to save.")
+        next_url = post.get("next")
+        if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+            return redirect(next_url)
         return redirect("view_clients")
     messages.error(request, "Invalid request method.")
     return redirect("view_clients")
@@ -155,177 +311,308 @@ def update_candidates(request):
 @never_cache
 @login_required
 def export_excel(request):
-    candidates = Candidates.objects.all().values(
-        "full_name", "gender", "phone_number", "passport_number",
-        "job_applied__title", "referral_info__full_name"
-    )
-    df = pd.DataFrame(list(candidates))
-    df.rename(columns={
-        "full_name": "Full Name",
-        "gender": "Gender",
-        "phone_number": "Phone Number",
-        "passport_number": "Passport Number",
-        "job_applied__title": "Job Applied",
-        "referral_info__full_name": "Referred By",
-    }, inplace=True)
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    if settings.BACKGROUND_JOBS:
+        job = background.enqueue("export_excel", request.user, {"query": request.GET.urlencode()})
+        return _job_accepted(request, job)
+
+    columns = export_columns(request.GET)
+    rows = export_rows(request.GET, columns)
+
+    if request.GET.get("format") == "csv":
+        response = _streaming_response(request, stream_csv(rows), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="candidates.csv"'
+        return response
+
+    return _open_file_response(
+        request,
+        write_xlsx(rows),
+        as_attachment=True,
+        filename="candidates.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
-    response["Content-Disposition"] = 'attachment; filename="candidates.xlsx"'
-    with pd.ExcelWriter(response, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Candidates")
-    return response
 
 
 # ------------------------------ IMPORT EXCEL ----------------------------------
 @never_cache
 @login_required
-def import_excel(request):
-    if request.method == "POST" and request.FILES.get("excel_file"):
-        excel_file = request.FILES["excel_file"]
+async def import_excel(request):
+    post, files = await _form_data(request)
+    if request.method == "POST" and files.get("excel_file"):
+        excel_file = files["excel_file"]
+        dry_run = bool(post.get("dry_run"))
+        if settings.BACKGROUND_JOBS:
+            job = await sync_to_async(background.enqueue)(
+                "import_excel", await request.auser(), {"dry_run": dry_run}, input_file=excel_file,
+            )
+            return _job_accepted(request, job)
         try:
-            df = pd.read_excel(excel_file)
-            df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
-            if "date_of_birth" in df.columns:
-                df["date_of_birth"] = pd.to_datetime(df["date_of_birth"], errors="coerce").dt.date
-
-            created_count, skipped_count = 0, 0
-            for _, row in df.iterrows():
-                full_name = row.get("full_name")
-                passport_number = row.get("passport_number")
-                job_title = row.get("job_applied_title")
-                referral_name = row.get("referral_full_name")
-
-                if not (full_name and passport_number and job_title and referral_name):
-                    skipped_count += 1
-                    continue
-                if Candidates.objects.filter(passport_number=passport_number).exists():
-                    skipped_count += 1
-                    continue
-
-                job = Jobs.objects.filter(title__iexact=job_title).first()
-                if not job:
-                    job = Jobs.objects.create(
-                        title=job_title,
-                        description="Imported job - no description provided.",
-                        location="Not specified",
-                        salary=0,
-                        closing_date=date.today() + timedelta(days=30),
-                        responsibilities="Imported job - responsibilities not specified.",
-                        status="open",
-                    )
-                referral = Agents.objects.filter(full_name__iexact=referral_name).first()
-                if not referral:
-                    referral = Agents.objects.create(full_name=referral_name)
-
-                Candidates.objects.create(
-                    full_name=full_name,
-                    gender=row.get("gender"),
-                    phone_number=row.get("phone_number"),
-                    passport_number=passport_number,
-                    date_of_birth=row.get("date_of_birth"),
-                    job_applied=job,
-                    referral_info=referral,
-                )
-                created_count += 1
-
-            if created_count:
-                messages.success(request, f"{created_count} candidate(s) imported successfully.")
-            if skipped_count:
-                messages.info(request, f"{skipped_count} row(s) skipped (duplicates/missing).")
-
+            result = await sync_to_async(lambda: import_candidates(read_sheet(excel_file), dry_run=dry_run))()
         except Exception as e:
             messages.error(request, f"Import failed: {e}")
-        return redirect("view_clients")
+            return redirect("view_clients")
+
+        if dry_run:
+            messages.info(request, f"Dry run: {result.created_count} candidate(s) would be imported.")
+        elif result.created_count:
+            messages.success(request, f"{result.created_count} candidate(s) imported successfully.")
+        if result.skipped_count:
+            messages.info(request, f"{result.skipped_count} row(s) skipped (duplicates/missing).")
+        return await arender(request, "myapp/import_report.html", {"result": result})
 
     messages.error(request, "No file uploaded.")
     return redirect("view_clients")
 
 
 # ------------------------------ VIEW CANDIDATE --------------------------------
-@never_cache
+# Private, revalidated on every use: browsers may keep a copy, shared proxies never do.
+private_revalidate = cache_control(private=True, no_cache=True)
+
+
 @login_required
-@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+@private_revalidate
 def view_candidate(request, candidate_id):
-    candidate = get_object_or_404(Candidates, id=candidate_id)
+    candidate = get_object_or_404(
+        Candidates.objects.select_related("job_applied", "job_location", "referral_info"),
+        id=candidate_id,
+    )
+    stamp, last_modified = candidate_version(candidate)
+    # The page also shows the user, the age (changes daily) and any flash messages.
+    etag = make_etag(stamp, PAGE_VERSION, request.user.pk, timezone.localdate())
+    last_modified = max(last_modified, start_of_today())
+    if not len(messages.get_messages(request)):
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
     job = candidate.job_applied
-    return render(request, "myapp/view_candidate.html", {"c": candidate, "job": job})
+    response = render(request, "myapp/view_candidate.html", {"c": candidate, "job": job})
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
 
 
-# ------------------------------ DOWNLOAD CV PDF --------------------------------
-@login_required
-def download_cv_pdf(request, candidate_id):
-    candidate = get_object_or_404(Candidates, id=candidate_id)
-    template_path = "myapp/cv_template.html"  # Use same template as view
-    context = {"c": candidate, "today_date": date.today(), "applicant_number": candidate.id}
+DOCUMENT_SIZES = ("original", *SIZES)
 
-    template = get_template(template_path)
-    html = template.render(context)
 
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="CV_{candidate.full_name}.pdf"'
+@login_required
+@private_revalidate
+async def candidate_document(request, candidate_id, field, size="original"):
+    """Serve a candidate document image (or one of its derivatives) with conditional GET."""
+    if field not in DOCUMENT_FIELDS or size not in DOCUMENT_SIZES:
+        raise Http404("Unknown document.")
+    candidate = await aget_object_or_404(Candidates.objects.only("id", field), id=candidate_id)
+    fieldfile = getattr(candidate, field)
+    if not fieldfile:
+        raise Http404("No such document.")
+    storage, name = fieldfile.storage, fieldfile.name
+    if size != "original":
+        name = await sync_to_async(ensure_derivative, thread_sensitive=False)(storage, name, size) or name
+    stat = await sync_to_async(file_stat, thread_sensitive=False)(storage, name)
+    if stat is None:
+        raise Http404("Document file is missing.")
+
+    etag = make_etag(name, stat.st_size, stat.st_mtime_ns)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=stat.st_mtime)
+    if not_modified is not None:
+        return not_modified
+    response = await _file_response(request, lambda: storage.open(name, "rb"))
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return response
 
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    if pisa_status.err:
-        return HttpResponse("Error generating PDF.")
+
+# ------------------------------ DOWNLOAD CV PDF --------------------------------
+def _cv_validators(candidate, kind):
+    etag = f'"{cv_cache.candidate_fingerprint(candidate, kind)}"'
+    _, last_modified = candidate_version(candidate)
+    return etag, last_modified
+
+
+async def _cached_cv_response(request, candidate, kind, content_type):
+    # Answer revalidations from the version stamp before touching the cache or rendering.
+    etag, last_modified = await sync_to_async(_cv_validators, thread_sensitive=False)(candidate, kind)
+    last_modified = max(last_modified, start_of_today())  # the CV prints today's date
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        # Rendering is CPU-bound: a thread waits on it, in a process pool if CV_RENDER_PROCESSES is set.
+        path, fingerprint = await sync_to_async(cv_cache.get_or_render)(candidate, kind, renderer(kind))
+    except CVRenderError as e:
+        return HttpResponse(str(e))
+
+    response = await _file_response(
+        request,
+        lambda: path.open("rb"),
+        as_attachment=True,
+        filename=f"CV_{candidate.full_name}.{cv_cache.EXTENSIONS[kind]}",
+        content_type=content_type,
+    )
+    response["ETag"] = f'"{fingerprint}"'
+    response["Last-Modified"] = http_date(last_modified)
     return response
 
 
+@login_required
+@private_revalidate
+async def download_cv_pdf(request, candidate_id):
+    candidate = await aget_object_or_404(
+        Candidates.objects.select_related("job_applied", "job_location", "referral_info"),
+        id=candidate_id,
+    )
+    return await _cached_cv_response(request, candidate, "pdf", PDF_CONTENT_TYPE)
+
+
 # ------------------------------ DOWNLOAD CV WORD --------------------------------
 @login_required
-def download_cv_word(request, candidate_id):
-    candidate = get_object_or_404(Candidates, id=candidate_id)
-    document = Document()
-    document.add_heading("CURRICULUM VITAE", 0)
-    document.add_paragraph(f"Company: CARBIB")
-    document.add_paragraph(f"Date: {date.today()}")
-    document.add_paragraph(f"Applicant No: {candidate.id}")
-
-    # Main info table
-    table = document.add_table(rows=6, cols=2)
-    table.style = "Table Grid"
-    table.cell(0, 0).text = "Job Applied For"
-    table.cell(0, 1).text = candidate.job_applied.title
-    table.cell(1, 0).text = "Full Name"
-    table.cell(1, 1).text = candidate.full_name
-    table.cell(2, 0).text = "Gender"
-    table.cell(2, 1).text = candidate.gender
-    table.cell(3, 0).text = "Phone"
-    table.cell(3, 1).text = candidate.phone_number
-    table.cell(4, 0).text = "Passport Number"
-    table.cell(4, 1).text = candidate.passport_number
-    table.cell(5, 0).text = "Date of Birth"
-    table.cell(5, 1).text = str(candidate.date_of_birth)
-
-    # Personal details
-    document.add_heading("Personal Details", level=1)
-    document.add_paragraph(f"Marital Status: {candidate.marital_status or 'N/A'}")
-    document.add_paragraph(f"Education Level: {candidate.education_level or 'N/A'}")
-
-    # Work experience
-    document.add_heading("Work Experience", level=1)
-    document.add_paragraph(candidate.working_experience or "N/A")
-
-    # Skills
-    document.add_heading("Skills", level=1)
-    document.add_paragraph(candidate.skills or "N/A")
-
-    # Full photo
-    if candidate.full_photo:
-        document.add_page_break()
-        document.add_heading("Full Photo", level=1)
-        document.add_picture(candidate.full_photo.path, width=Inches(2.5))
-
-    # Passport copy
-    if candidate.passport_copy:
-        document.add_page_break()
-        document.add_heading("Passport Copy", level=1)
-        document.add_picture(candidate.passport_copy.path, width=Inches(2.5))
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+@private_revalidate
+async def download_cv_word(request, candidate_id):
+    candidate = await aget_object_or_404(
+        Candidates.objects.select_related("job_applied", "job_location", "referral_info"),
+        id=candidate_id,
     )
-    response["Content-Disposition"] = f'attachment; filename="CV_{candidate.full_name}.docx"'
-    document.save(response)
+    return await _cached_cv_response(request, candidate, "docx", DOCX_CONTENT_TYPE)
+
+
+# ------------------------------ BATCH CV ZIP ------------------------------------
+BATCH_FORMATS = {"pdf": ("pdf",), "docx": ("docx",), "both": ("pdf", "docx")}
+
+
+@never_cache
+@login_required
+def download_cv_batch(request):
+    candidates = filter_candidates(Candidates.objects.order_by("pk"), request.GET)
+    ids = [int(value) for value in request.GET.get("ids", "").split(",") if value.strip().isdigit()]
+    if ids:
+        candidates = candidates.filter(pk__in=ids)
+
+    limit = settings.CV_BATCH_MAX_CANDIDATES
+    candidate_ids = list(candidates.values_list("pk", flat=True)[:limit + 1])
+    if not candidate_ids:
+        messages.error(request, "No candidates match the selected filters.")
+        return redirect("view_clients")
+    if len(candidate_ids) > limit:
+        messages.error(request, f"CV packs are limited to {limit} candidates; narrow the filters.")
+        return redirect("view_clients")
+
+    kinds = BATCH_FORMATS.get(request.GET.get("format"), BATCH_FORMATS["pdf"])
+    if settings.BACKGROUND_JOBS:
+        job = background.enqueue("cv_pack", request.user, {"candidate_ids": candidate_ids, "kinds": kinds})
+        return _job_accepted(request, job)
+    response = _streaming_response(request, stream_cv_zip(candidate_ids, kinds), content_type="application/zip")
+    response["Content-Disposition"] = 'attachment; filename="cv_pack.zip"'
     return response
+
+
+# ------------------------------ BACKGROUND JOBS ---------------------------------
+def _job_accepted(request, job):
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse(_job_payload(job), status=202)
+    messages.info(request, f"Job #{job.pk} queued.")
+    return redirect("job_detail", job_id=job.pk)
+
+
+def _job_payload(job):
+    return {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "error": job.error,
+        "status_url": reverse("job_status", args=[job.pk]),
+        "download_url": reverse("job_download", args=[job.pk]) if job.result_file else None,
+    }
+
+
+async def _get_job(request, job_id):
+    user = await request.auser()
+    jobs = BackgroundJob.objects.all()
+    if not user.is_staff:
+        jobs = jobs.filter(created_by=user)
+    return await aget_object_or_404(jobs, pk=job_id)
+
+
+@never_cache
+@login_required
+async def job_detail(request, job_id):
+    return await arender(request, "myapp/job_detail.html", {"job": await _get_job(request, job_id)})
+
+
+@never_cache
+@login_required
+async def job_status(request, job_id):
+    return JsonResponse(_job_payload(await _get_job(request, job_id)))
+
+
+@never_cache
+@login_required
+async def job_download(request, job_id):
+    job = await _get_job(request, job_id)
+    if not job.result_file:
+        raise Http404("This job has no result file.")
+    return await _file_response(request, lambda: job.result_file.open("rb"), as_attachment=True,
+                                filename=os.path.basename(job.result_file.name))
+
+
+# ------------------------------ DUPLICATE REVIEW --------------------------------
+DUPLICATE_FIELDS = tuple(
+    f"{side}__{field}"
+    for side in ("candidate_a", "candidate_b")
+    for field in ("id", "full_name", "date_of_birth", "phone_number", "nin_number", "passport_number",
+                  "candidate_status")
+)
+
+
+@never_cache
+@login_required
+@cache_control(no_cache=True, must_revalidate=True, no_store=True)
+def duplicate_review(request):
+    page_size = parse_page_size(request.GET.get("page_size"))
+    page_number = parse_cursor(request.GET.get("page")) or 1
+    offset = (page_number - 1) * page_size
+    matches = list(
+        DuplicateMatch.objects.filter(status=DuplicateMatch.PENDING)
+        .select_related("candidate_a", "candidate_b")
+        .only("score", "reasons", "status", *DUPLICATE_FIELDS)
+        .order_by("-score", "pk")[offset:offset + page_size + 1]
+    )
+    for match in matches:
+        match.candidates = (match.candidate_a, match.candidate_b)
+    context = {
+        "matches": matches[:page_size],
+        "has_next": len(matches) > page_size,
+        "page_number": page_number,
+        "page_size": page_size,
+    }
+    return render(request, "myapp/duplicate_review.html", context)
+
+
+@never_cache
+@login_required
+def resolve_duplicate(request, match_id):
+    if request.method != "POST":
+        messages.error(request, "Invalid request method.")
+        return redirect("duplicate_review")
+    decision = request.POST.get("decision")
+    if decision not in (DuplicateMatch.DUPLICATE, DuplicateMatch.DISTINCT):
+        messages.error(request, "Unknown review decision.")
+        return redirect("duplicate_review")
+    match = get_object_or_404(DuplicateMatch, pk=match_id)
+    with transaction.atomic():
+        match.status, match.reviewed_by, match.reviewed_at = decision, request.user, timezone.now()
+        match.save(update_fields=["status", "reviewed_by", "reviewed_at"])
+        still_set_aside = match.restore_set_aside_numbers()
+    messages.success(request, "Review saved.")
+    for number in still_set_aside:
+        messages.warning(
+            request,
+            f"{number.get_field_display()} {number.value} is still set aside for {number.candidate.full_name}: "
+            "another candidate holds it. Correct one of them, then set the match back to pending in the admin "
+            "and resolve it again.",
+        )
+    next_url = request.POST.get("next")
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect("duplicate_review")
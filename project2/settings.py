@@ -39,13 +39,15 @@ INSTALLED_APPS = [
 
 # 🔹 Middleware
 MIDDLEWARE = [
+    'myapp.middleware.MetricsMiddleware',  # per-view timings for /metrics; keep first
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files in production
+    'myapp.middleware.StaticFilesMiddleware',  # WhiteNoise static files, async-capable for ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'myapp.middleware.ProfilingMiddleware',  # opt-in cProfile captures; needs request.user
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -55,7 +57,7 @@ ROOT_URLCONF = 'project2.urls'
 # 🔹 Templates
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'myapp.metrics.TimedDjangoTemplates',  # DjangoTemplates + render timing
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -105,6 +107,75 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 🔹 Client list pagination
+CANDIDATES_PAGE_SIZE = config('CANDIDATES_PAGE_SIZE', default=50, cast=int)
+CANDIDATES_MAX_PAGE_SIZE = config('CANDIDATES_MAX_PAGE_SIZE', default=200, cast=int)
+
+# 🔹 Excel import
+IMPORT_BATCH_SIZE = config('IMPORT_BATCH_SIZE', default=500, cast=int)
+
+# 🔹 Excel/CSV export
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# 🔹 Cache, shared by every web worker and run_jobs (required: lookup invalidation goes through it).
+# The file cache covers one host; with several hosts point it at Redis or Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'django')),
+    }
+}
+
+# 🔹 Job/country/agent option lists (invalidated on every save/delete through the shared cache)
+LOOKUP_CACHE_TIMEOUT = config('LOOKUP_CACHE_TIMEOUT', default=3600, cast=int)
+
+# 🔹 Generated CV cache (LRU, bounded by size)
+CV_CACHE_DIR = config('CV_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'cv'))
+CV_CACHE_MAX_BYTES = config('CV_CACHE_MAX_BYTES', default=200 * 1024 * 1024, cast=int)
+
+# 🔹 Batch CV packs (process pool size and max candidates per pack)
+CV_BATCH_WORKERS = config('CV_BATCH_WORKERS', default=min(4, os.cpu_count() or 1), cast=int)
+CV_BATCH_MAX_CANDIDATES = config('CV_BATCH_MAX_CANDIDATES', default=500, cast=int)
+
+# 🔹 Single CV downloads (0 renders in a thread; >0 uses a shared process pool per server worker)
+CV_RENDER_PROCESSES = config('CV_RENDER_PROCESSES', default=0, cast=int)
+
+# 🔹 Background jobs (manage.py run_jobs)
+BACKGROUND_JOBS = config('BACKGROUND_JOBS', default=False, cast=bool)  # enqueue imports/exports/CV packs
+JOB_FILES_ROOT = config('JOB_FILES_ROOT', default=str(BASE_DIR / 'cache' / 'jobs'))
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=2, cast=float)
+JOB_LOCK_TIMEOUT = config('JOB_LOCK_TIMEOUT', default=3600, cast=int)  # seconds before a running job is requeued
+JOB_RETENTION_DAYS = config('JOB_RETENTION_DAYS', default=7, cast=int)
+
+# 🔹 Duplicate candidate detection
+DEDUPE_THRESHOLD = config('DEDUPE_THRESHOLD', default=0.7, cast=float)  # minimum score queued for review
+DEDUPE_MAX_BLOCK_SIZE = config('DEDUPE_MAX_BLOCK_SIZE', default=500, cast=int)  # larger blocks are too generic to compare
+
+# 🔹 Document upload ingest (EXIF stripped, recompressed, stored by content hash)
+INGEST_DOCUMENT_DIR = config('INGEST_DOCUMENT_DIR', default='documents')
+INGEST_MAX_DIMENSION = config('INGEST_MAX_DIMENSION', default=2000, cast=int)  # longest side in pixels
+INGEST_MAX_BYTES = config('INGEST_MAX_BYTES', default=600 * 1024, cast=int)
+INGEST_QUALITY = config('INGEST_QUALITY', default=85, cast=int)
+INGEST_MIN_QUALITY = config('INGEST_MIN_QUALITY', default=60, cast=int)
+
+# 🔹 Read-only JSON API (/api/v1/); partners send "Authorization: Bearer <token>"
+API_TOKENS = [token for token in config('API_TOKENS', default='').split(',') if token]
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=100, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=1000, cast=int)
+API_SYNC_OVERLAP = config('API_SYNC_OVERLAP', default=300, cast=int)  # seconds; at least the longest write transaction
+
+# 🔹 Request metrics (/metrics, Prometheus text format) and slow-request log
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKENS = [token for token in config('METRICS_TOKENS', default='').split(',') if token]  # bearer tokens for scrapers
+METRICS_SLOW_REQUEST_SECONDS = config('METRICS_SLOW_REQUEST_SECONDS', default=2.0, cast=float)
+METRICS_SLOW_SQL_LIMIT = config('METRICS_SLOW_SQL_LIMIT', default=5, cast=int)  # statements kept per slow request
+
+# 🔹 Request profiling (staff: ?_profile=1 or X-Profile: 1; captures listed at /admin/profiles/)
+PROFILE_ENABLED = config('PROFILE_ENABLED', default=True, cast=bool)
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)  # fraction of all requests profiled
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'cache' / 'profiles'))
+PROFILE_MAX_CAPTURES = config('PROFILE_MAX_CAPTURES', default=50, cast=int)  # oldest captures are deleted beyond this
+
 # 🔹 Default primary key field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
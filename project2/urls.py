@@ -3,7 +3,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from myapp import profiling
+
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(profiling.captures_view), name='profile_captures'),
+    path('admin/profiles/<str:capture_id>.<str:kind>', admin.site.admin_view(profiling.capture_file),
+         name='profile_capture_file'),
     path('admin/', admin.site.urls),
     path('', include('myapp.urls')),  # Main app URLs
 ]